@@ -11,12 +11,15 @@ Author: Auto-generated for GLM executor
 Date: 2026-01-03
 """
 
-import requests
+import numpy as np
 import pandas as pd
 import time
-from typing import List, Dict, Optional
+from typing import List, Dict, Tuple
 from datetime import datetime
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from wdi_client import BASE_URL, fetch_all_pages
 
 # Configure logging
 logging.basicConfig(
@@ -26,69 +29,15 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Constants
-BASE_URL = "https://api.worldbank.org/v2"
 INDICATOR_TOTAL = "FI.RES.TOTL.CD"
 INDICATOR_NON_GOLD = "FI.RES.XGLD.CD"
-PER_PAGE = 20000
-MAX_RETRIES = 3
-RETRY_DELAY = 2.0
-REQUEST_DELAY = 0.2
 
 # Output files
 OUTPUT_CSV = "reserves_gold_split_wdi.csv"
 OUTPUT_PARQUET = "reserves_gold_split_wdi.parquet"
-COVERAGE_REPORT_CSV = "coverage_report.csv"
-
-
-class WorldBankAPIError(Exception):
-    """Custom exception for World Bank API errors."""
-    pass
-
-
-def fetch_with_retry(url: str, params: Optional[Dict] = None, max_retries: int = MAX_RETRIES) -> Optional[Dict]:
-    """
-    Fetch data from URL with retry logic for network errors and 5xx status codes.
-
-    Args:
-        url: API endpoint URL
-        params: Query parameters
-        max_retries: Maximum number of retry attempts
-
-    Returns:
-        JSON response data or None if all retries fail
-    """
-    for attempt in range(max_retries):
-        try:
-            logger.info(f"Fetching: {url}")
-            response = requests.get(url, params=params, timeout=30)
-
-            # Check for server errors (5xx)
-            if response.status_code >= 500:
-                logger.warning(f"Server error {response.status_code} on attempt {attempt + 1}/{max_retries}")
-                if attempt < max_retries - 1:
-                    time.sleep(RETRY_DELAY * (attempt + 1))
-                    continue
-                else:
-                    raise WorldBankAPIError(f"Server error {response.status_code} after {max_retries} attempts")
-
-            # Check for client errors (4xx)
-            if response.status_code >= 400:
-                logger.error(f"Client error {response.status_code}: {response.text}")
-                raise WorldBankAPIError(f"Client error {response.status_code}")
-
-            # Success
-            response.raise_for_status()
-            return response.json()
-
-        except requests.exceptions.RequestException as e:
-            logger.warning(f"Request error on attempt {attempt + 1}/{max_retries}: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(RETRY_DELAY * (attempt + 1))
-            else:
-                logger.error(f"Failed after {max_retries} attempts: {e}")
-                return None
-
-    return None
+# Distinct from build_reserves_gold_dataset.py's coverage_report.csv: years here count
+# only when both indicators are present.
+COVERAGE_REPORT_CSV = "coverage_report_split_wdi.csv"
 
 
 def fetch_countries() -> List[Dict]:
@@ -101,68 +50,43 @@ def fetch_countries() -> List[Dict]:
     """
     logger.info("Fetching countries/economies from World Bank API...")
 
+    countries_raw = fetch_all_pages(f"{BASE_URL}/country")
     all_countries = []
-    page = 1
-    while True:
-        params = {
-            "format": "json",
-            "per_page": PER_PAGE,
-            "page": page
-        }
-
-        data = fetch_with_retry(f"{BASE_URL}/country", params=params)
-        if not data or not isinstance(data, list) or len(data) < 2:
-            logger.error(f"Failed to fetch page {page} of countries")
-            break
-
-        metadata = data[0]
-        countries_page = data[1]
-
-        # Process and filter countries
-        for country in countries_page:
-            # Extract relevant fields
-            region = country.get("region", {})
-            income_level = country.get("incomeLevel", {})
-            lending_type = country.get("lendingType", {})
-
-            # Filter out aggregates
-            region_id = region.get("id", "")
-            income_id = income_level.get("id", "")
-            lending_id = lending_type.get("id", "")
-
-            # Skip if any of these are "NA" (aggregate)
-            if region_id == "NA" or income_id == "NA" or lending_id == "NA":
-                continue
-
-            # Ensure valid ISO2 code
-            iso2 = country.get("iso2Code", "")
-            if not iso2 or len(iso2) != 2:
-                continue
-
-            # Add to list
-            all_countries.append({
-                "iso2": iso2,
-                "iso3": country.get("id", ""),
-                "country_name": country.get("name", ""),
-                "region_id": region_id,
-                "region_name": region.get("value", ""),
-                "income_level_id": income_id,
-                "income_level_name": income_level.get("value", ""),
-                "lending_type_id": lending_id,
-                "lending_type_name": lending_type.get("value", "")
-            })
-
-        logger.info(f"Page {page}: {len(countries_page)} fetched (kept {len(all_countries)} after filtering)")
-
-        # Check if there are more pages
-        total_pages = metadata.get("pages", 1)
-        if page >= total_pages:
-            break
-
-        page += 1
-        time.sleep(REQUEST_DELAY)
-
-    logger.info(f"Total countries after filtering aggregates: {len(all_countries)}")
+
+    for country in countries_raw:
+        # Extract relevant fields
+        region = country.get("region", {})
+        income_level = country.get("incomeLevel", {})
+        lending_type = country.get("lendingType", {})
+
+        # Filter out aggregates
+        region_id = region.get("id", "")
+        income_id = income_level.get("id", "")
+        lending_id = lending_type.get("id", "")
+
+        # Skip if any of these are "NA" (aggregate)
+        if region_id == "NA" or income_id == "NA" or lending_id == "NA":
+            continue
+
+        # Ensure valid ISO2 code
+        iso2 = country.get("iso2Code", "")
+        if not iso2 or len(iso2) != 2:
+            continue
+
+        # Add to list
+        all_countries.append({
+            "iso2": iso2,
+            "iso3": country.get("id", ""),
+            "country_name": country.get("name", ""),
+            "region_id": region_id,
+            "region_name": region.get("value", ""),
+            "income_level_id": income_id,
+            "income_level_name": income_level.get("value", ""),
+            "lending_type_id": lending_id,
+            "lending_type_name": lending_type.get("value", "")
+        })
+
+    logger.info(f"Total countries after filtering aggregates: {len(all_countries)} (of {len(countries_raw)} fetched)")
     return all_countries
 
 
@@ -183,73 +107,78 @@ def fetch_indicator_data(indicator_id: str, countries: List[Dict]) -> pd.DataFra
     valid_iso3_codes = {c["iso3"]: c for c in countries}
     logger.info(f"Filtering for {len(valid_iso3_codes)} valid countries")
 
+    records_raw = fetch_all_pages(f"{BASE_URL}/country/all/indicator/{indicator_id}")
     all_records = []
-    page = 1
-    total_records = 0
 
-    while True:
-        params = {
-            "format": "json",
-            "per_page": PER_PAGE,
-            "page": page
-        }
+    for record in records_raw:
+        country_iso3 = record.get("countryiso3code", "")
+        value = record.get("value")
 
-        url = f"{BASE_URL}/country/all/indicator/{indicator_id}"
-        data = fetch_with_retry(url, params=params)
+        # Skip null values first
+        if value is None:
+            continue
 
-        if not data or not isinstance(data, list) or len(data) < 2:
-            logger.error(f"Failed to fetch page {page} for indicator {indicator_id}")
-            break
+        # Skip if not a valid country (not in our filtered list)
+        if country_iso3 not in valid_iso3_codes:
+            continue
 
-        metadata = data[0]
-        records_page = data[1]
+        # Get country info from lookup
+        country_info = valid_iso3_codes[country_iso3]
 
-        # Process records
-        for record in records_page:
-            country_iso3 = record.get("countryiso3code", "")
-            value = record.get("value")
+        all_records.append({
+            "iso2": country_info["iso2"],
+            "iso3": country_iso3,
+            "country_name": country_info["country_name"],
+            "year": int(record.get("date", 0)),
+            "value": float(value),
+            "indicator_id": indicator_id
+        })
 
-            # Skip null values first
-            if value is None:
-                continue
+    logger.info(f"Total valid records for {indicator_id}: {len(all_records)} (of {len(records_raw)} fetched)")
 
-            # Skip if not a valid country (not in our filtered list)
-            if country_iso3 not in valid_iso3_codes:
-                continue
+    if not all_records:
+        return pd.DataFrame()
 
-            # Get country info from lookup
-            country_info = valid_iso3_codes[country_iso3]
-            iso2 = country_info["iso2"]
-            country_name = country_info["country_name"]
+    return pd.DataFrame(all_records)
 
-            year = int(record.get("date", 0))
 
-            all_records.append({
-                "iso2": iso2,
-                "iso3": country_iso3,
-                "country_name": country_name,
-                "year": year,
-                "value": float(value),
-                "indicator_id": indicator_id
-            })
+def fetch_reserves_indicators(countries: List[Dict]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Fetch TOTAL and NON_GOLD indicators in parallel.
 
-        total_records += len(records_page)
-        logger.info(f"Page {page}: {len(records_page)} records (processed: {len(all_records)} with non-null values)")
+    Args:
+        countries: List of country dictionaries
 
-        # Check pagination
-        total_pages = metadata.get("pages", 1)
-        if page >= total_pages:
-            break
+    Returns:
+        (df_total, df_non_gold)
+    """
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        total = pool.submit(fetch_indicator_data, INDICATOR_TOTAL, countries)
+        non_gold = pool.submit(fetch_indicator_data, INDICATOR_NON_GOLD, countries)
+        return total.result(), non_gold.result()
 
-        page += 1
-        time.sleep(REQUEST_DELAY)
 
-    logger.info(f"Total valid records for {indicator_id}: {len(all_records)}")
+def compute_quality_flags(gold: pd.Series, total: pd.Series) -> np.ndarray:
+    """
+    Quality flag per row (first matching condition wins):
+    MISSING_DATA, NEGATIVE_GOLD_INFERRED, GOLD_ZERO_OR_NOT_REPORTED, OK.
 
-    if not all_records:
-        return pd.DataFrame()
+    Args:
+        gold: Inferred gold value (total - non-gold)
+        total: Total reserves (includes gold)
 
-    return pd.DataFrame(all_records)
+    Returns:
+        Array of flag strings aligned with `gold`
+    """
+    return np.select(
+        [
+            gold.isna(),
+            gold < 0,
+            (gold == 0) & (total > 0),
+        ],
+        ["MISSING_DATA", "NEGATIVE_GOLD_INFERRED", "GOLD_ZERO_OR_NOT_REPORTED"],
+        default="OK",
+    )
 
 
 def calculate_gold_inference(df_total: pd.DataFrame, df_non_gold: pd.DataFrame) -> pd.DataFrame:
@@ -278,20 +207,7 @@ def calculate_gold_inference(df_total: pd.DataFrame, df_non_gold: pd.DataFrame)
     merged["gold_reserves_value_usd_inferred"] = merged["value_total"] - merged["value_non_gold"]
 
     # Add quality flags based on business logic
-    def assign_quality_flag(row):
-        gold_val = row.get("gold_reserves_value_usd_inferred")
-        total_val = row.get("value_total")
-
-        if pd.isna(gold_val):
-            return "MISSING_DATA"
-        elif gold_val < 0:
-            return "NEGATIVE_GOLD_INFERRED"
-        elif gold_val == 0 and pd.notna(total_val) and total_val > 0:
-            return "GOLD_ZERO_OR_NOT_REPORTED"
-        else:
-            return "OK"
-
-    merged["quality_flag"] = merged.apply(assign_quality_flag, axis=1)
+    merged["quality_flag"] = compute_quality_flags(merged["gold_reserves_value_usd_inferred"], merged["value_total"])
 
     # Rename columns for clarity
     merged.rename(columns={
@@ -335,51 +251,30 @@ def generate_coverage_report(df_total: pd.DataFrame, df_non_gold: pd.DataFrame,
     """
     logger.info("Generating coverage report...")
 
-    # Get unique countries
-    all_iso2 = set(df_total["iso2"].unique()) | set(df_non_gold["iso2"].unique())
+    total_iso2 = pd.Index(df_total["iso2"].unique())
+    non_gold_iso2 = pd.Index(df_non_gold["iso2"].unique())
+    merged = df_merged[df_merged["iso2"].isin(total_iso2.union(non_gold_iso2))]
 
-    coverage_data = []
-
-    for iso2 in sorted(all_iso2):
-        # Get country name from merged data
-        country_rows = df_merged[df_merged["iso2"] == iso2]
-        if country_rows.empty:
-            continue
-        country_name = country_rows["country_name"].iloc[0]
-
-        # Check availability
-        has_total = iso2 in df_total["iso2"].values
-        has_non_gold = iso2 in df_non_gold["iso2"].values
-        has_both = has_total and has_non_gold
-
-        # Get year range for records with both indicators
-        both_data = df_merged[
-            (df_merged["iso2"] == iso2) &
-            (df_merged["total_reserves_usd"].notna()) &
-            (df_merged["non_gold_reserves_usd"].notna())
-        ]
-
-        if not both_data.empty:
-            first_year = int(both_data["year"].min())
-            last_year = int(both_data["year"].max())
-            n_years = len(both_data["year"].unique())
-        else:
-            first_year = None
-            last_year = None
-            n_years = 0
-
-        coverage_data.append({
-            "iso2": iso2,
-            "country_name": country_name,
-            "has_total": has_total,
-            "has_non_gold": has_non_gold,
-            "has_both": has_both,
-            "first_year": first_year,
-            "last_year": last_year,
-            "n_years": n_years
-        })
+    # One row per country, named after its first merged row
+    df_coverage = (
+        merged.drop_duplicates("iso2")[["iso2", "country_name"]]
+        .sort_values("iso2", kind="mergesort")
+        .reset_index(drop=True)
+    )
+    df_coverage["has_total"] = df_coverage["iso2"].isin(total_iso2)
+    df_coverage["has_non_gold"] = df_coverage["iso2"].isin(non_gold_iso2)
+    df_coverage["has_both"] = df_coverage["has_total"] & df_coverage["has_non_gold"]
+
+    # Year range for records with both indicators
+    has_years = merged["total_reserves_usd"].notna() & merged["non_gold_reserves_usd"].notna()
+    years = merged.loc[has_years].groupby("iso2")["year"].agg(
+        first_year="min", last_year="max", n_years="nunique"
+    )
+    df_coverage = df_coverage.join(years, on="iso2")
+    df_coverage["n_years"] = df_coverage["n_years"].fillna(0).astype(int)
+    if df_coverage[["first_year", "last_year"]].notna().all().all():
+        df_coverage[["first_year", "last_year"]] = df_coverage[["first_year", "last_year"]].astype(int)
 
-    df_coverage = pd.DataFrame(coverage_data)
     return df_coverage
 
 
@@ -494,9 +389,8 @@ def main():
             logger.error("No countries found. Exiting.")
             return
 
-        # Step 2: Fetch indicator data
-        df_total = fetch_indicator_data(INDICATOR_TOTAL, countries)
-        df_non_gold = fetch_indicator_data(INDICATOR_NON_GOLD, countries)
+        # Step 2: Fetch both indicators in parallel
+        df_total, df_non_gold = fetch_reserves_indicators(countries)
 
         if df_total.empty and df_non_gold.empty:
             logger.error("No indicator data found. Exiting.")
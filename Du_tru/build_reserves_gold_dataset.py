@@ -13,13 +13,18 @@ Author: Auto-generated for GLM executor
 Date: 2026-01-03
 """
 
-import requests
+import argparse
+import os
+import numpy as np
 import pandas as pd
 import time
 import json
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from wdi_client import BASE_URL, fetch_all_pages
 
 # Configure logging
 logging.basicConfig(
@@ -29,13 +34,8 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Constants
-BASE_URL = "https://api.worldbank.org/v2"
 INDICATOR_TOTAL = "FI.RES.TOTL.CD"
 INDICATOR_NON_GOLD = "FI.RES.XGLD.CD"
-PER_PAGE = 20000  # Max records per page
-MAX_RETRIES = 3
-RETRY_DELAY = 2.0  # seconds between retries
-REQUEST_DELAY = 0.2  # seconds between requests (rate limiting)
 
 # Output files
 OUTPUT_CSV = "reserves_gold_by_country_year.csv"
@@ -43,56 +43,8 @@ COVERAGE_REPORT_CSV = "coverage_report.csv"
 README_FILE = "README_reserves_gold.md"
 SQL_SCHEMA_FILE = "schema_reserves_gold.sql"
 
-
-class WorldBankAPIError(Exception):
-    """Custom exception for World Bank API errors."""
-    pass
-
-
-def fetch_with_retry(url: str, params: Optional[Dict] = None, max_retries: int = MAX_RETRIES) -> Optional[Dict]:
-    """
-    Fetch data from URL with retry logic for network errors and 5xx status codes.
-
-    Args:
-        url: API endpoint URL
-        params: Query parameters
-        max_retries: Maximum number of retry attempts
-
-    Returns:
-        JSON response data or None if all retries fail
-    """
-    for attempt in range(max_retries):
-        try:
-            logger.info(f"Fetching: {url}")
-            response = requests.get(url, params=params, timeout=30)
-
-            # Check for server errors (5xx)
-            if response.status_code >= 500:
-                logger.warning(f"Server error {response.status_code} on attempt {attempt + 1}/{max_retries}")
-                if attempt < max_retries - 1:
-                    time.sleep(RETRY_DELAY * (attempt + 1))  # Exponential backoff
-                    continue
-                else:
-                    raise WorldBankAPIError(f"Server error {response.status_code} after {max_retries} attempts")
-
-            # Check for client errors (4xx)
-            if response.status_code >= 400:
-                logger.error(f"Client error {response.status_code}: {response.text}")
-                raise WorldBankAPIError(f"Client error {response.status_code}")
-
-            # Success
-            response.raise_for_status()
-            return response.json()
-
-        except requests.exceptions.RequestException as e:
-            logger.warning(f"Request error on attempt {attempt + 1}/{max_retries}: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(RETRY_DELAY * (attempt + 1))
-            else:
-                logger.error(f"Failed after {max_retries} attempts: {e}")
-                return None
-
-    return None
+# Incremental mode: re-fetch only the most recent years (WDI revises these)
+INCREMENTAL_YEARS = 3
 
 
 def fetch_countries() -> List[Dict]:
@@ -105,155 +57,199 @@ def fetch_countries() -> List[Dict]:
     """
     logger.info("Fetching countries/economies from World Bank API...")
 
+    countries_raw = fetch_all_pages(f"{BASE_URL}/country")
     all_countries = []
-    page = 1
-    while True:
-        params = {
-            "format": "json",
-            "per_page": PER_PAGE,
-            "page": page
-        }
-
-        data = fetch_with_retry(f"{BASE_URL}/country", params=params)
-        if not data or not isinstance(data, list) or len(data) < 2:
-            logger.error(f"Failed to fetch page {page} of countries")
-            break
-
-        metadata = data[0]
-        countries_page = data[1]
-
-        # Process and filter countries
-        for country in countries_page:
-            # Extract relevant fields
-            region = country.get("region", {})
-            income_level = country.get("incomeLevel", {})
-            lending_type = country.get("lendingType", {})
-
-            # Filter out aggregates
-            region_id = region.get("id", "")
-            income_id = income_level.get("id", "")
-            lending_id = lending_type.get("id", "")
-
-            # Skip if any of these are "NA" (aggregate)
-            if region_id == "NA" or income_id == "NA" or lending_id == "NA":
-                continue
-
-            # Ensure valid ISO2 code
-            iso2 = country.get("iso2Code", "")
-            if not iso2 or len(iso2) != 2:
-                continue
-
-            # Add to list
-            all_countries.append({
-                "iso2": iso2,
-                "iso3": country.get("id", ""),
-                "country_name": country.get("name", ""),
-                "region_id": region_id,
-                "region_name": region.get("value", ""),
-                "income_level_id": income_id,
-                "income_level_name": income_level.get("value", ""),
-                "lending_type_id": lending_id,
-                "lending_type_name": lending_type.get("value", "")
-            })
-
-        logger.info(f"Fetched page {page}: {len(countries_page)} countries (kept {len(all_countries)} after filtering)")
-
-        # Check if there are more pages
-        total_pages = metadata.get("pages", 1)
-        if page >= total_pages:
-            break
-
-        page += 1
-        time.sleep(REQUEST_DELAY)
-
-    logger.info(f"Total countries after filtering aggregates: {len(all_countries)}")
+
+    for country in countries_raw:
+        # Extract relevant fields
+        region = country.get("region", {})
+        income_level = country.get("incomeLevel", {})
+        lending_type = country.get("lendingType", {})
+
+        # Filter out aggregates
+        region_id = region.get("id", "")
+        income_id = income_level.get("id", "")
+        lending_id = lending_type.get("id", "")
+
+        # Skip if any of these are "NA" (aggregate)
+        if region_id == "NA" or income_id == "NA" or lending_id == "NA":
+            continue
+
+        # Ensure valid ISO2 code
+        iso2 = country.get("iso2Code", "")
+        if not iso2 or len(iso2) != 2:
+            continue
+
+        # Add to list
+        all_countries.append({
+            "iso2": iso2,
+            "iso3": country.get("id", ""),
+            "country_name": country.get("name", ""),
+            "region_id": region_id,
+            "region_name": region.get("value", ""),
+            "income_level_id": income_id,
+            "income_level_name": income_level.get("value", ""),
+            "lending_type_id": lending_id,
+            "lending_type_name": lending_type.get("value", "")
+        })
+
+    logger.info(f"Total countries after filtering aggregates: {len(all_countries)} (of {len(countries_raw)} fetched)")
     return all_countries
 
 
-def fetch_indicator_data(indicator_id: str, countries: List[Dict]) -> pd.DataFrame:
+def fetch_indicator_data(indicator_id: str, countries: List[Dict],
+                         date_range: Optional[str] = None) -> pd.DataFrame:
     """
     Fetch indicator data for all countries with pagination.
 
     Args:
         indicator_id: World Bank indicator code
         countries: List of country dictionaries
+        date_range: Optional WDI `date` filter, e.g. "2022:2025"
 
     Returns:
         DataFrame with columns: iso2, iso3, country_name, year, value, indicator_id
     """
-    logger.info(f"Fetching indicator {indicator_id}...")
+    logger.info(f"Fetching indicator {indicator_id}{f' for {date_range}' if date_range else ''}...")
 
     # Create a set of valid ISO3 codes for quick lookup
     valid_iso3_codes = {c["iso3"]: c for c in countries}
     logger.info(f"Filtering for {len(valid_iso3_codes)} valid countries")
 
+    params = {"date": date_range} if date_range else None
+    records_raw = fetch_all_pages(f"{BASE_URL}/country/all/indicator/{indicator_id}", params=params)
     all_records = []
-    page = 1
-    total_records = 0
 
-    while True:
-        params = {
-            "format": "json",
-            "per_page": PER_PAGE,
-            "page": page
-        }
+    for record in records_raw:
+        country_iso3 = record.get("countryiso3code", "")
+        value = record.get("value")
 
-        url = f"{BASE_URL}/country/all/indicator/{indicator_id}"
-        data = fetch_with_retry(url, params=params)
+        # Skip null values first
+        if value is None:
+            continue
 
-        if not data or not isinstance(data, list) or len(data) < 2:
-            logger.error(f"Failed to fetch page {page} for indicator {indicator_id}")
-            break
+        # Skip if not a valid country (not in our filtered list)
+        if country_iso3 not in valid_iso3_codes:
+            continue
 
-        metadata = data[0]
-        records_page = data[1]
+        # Get country info from lookup
+        country_info = valid_iso3_codes[country_iso3]
 
-        # Process records
-        for record in records_page:
-            country_iso3 = record.get("countryiso3code", "")
-            value = record.get("value")
+        all_records.append({
+            "iso2": country_info["iso2"],
+            "iso3": country_iso3,
+            "country_name": country_info["country_name"],
+            "year": int(record.get("date", 0)),
+            "value": float(value),
+            "indicator_id": indicator_id
+        })
 
-            # Skip null values first
-            if value is None:
-                continue
+    logger.info(f"Total valid records for {indicator_id}: {len(all_records)} (of {len(records_raw)} fetched)")
 
-            # Skip if not a valid country (not in our filtered list)
-            if country_iso3 not in valid_iso3_codes:
-                continue
+    if not all_records:
+        return pd.DataFrame()
 
-            # Get country info from lookup
-            country_info = valid_iso3_codes[country_iso3]
-            iso2 = country_info["iso2"]
-            country_name = country_info["country_name"]
+    return pd.DataFrame(all_records)
 
-            year = int(record.get("date", 0))
 
-            all_records.append({
-                "iso2": iso2,
-                "iso3": country_iso3,
-                "country_name": country_name,
-                "year": year,
-                "value": float(value),
-                "indicator_id": indicator_id
-            })
+def fetch_reserves_indicators(countries: List[Dict],
+                              date_range: Optional[str] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Fetch TOTAL and NON_GOLD indicators in parallel.
 
-        total_records += len(records_page)
-        logger.info(f"Page {page}: {len(records_page)} records (processed: {len(all_records)} with non-null values for valid countries)")
+    Args:
+        countries: List of country dictionaries
+        date_range: Optional WDI `date` filter, e.g. "2022:2025"
 
-        # Check pagination
-        total_pages = metadata.get("pages", 1)
-        if page >= total_pages:
-            break
+    Returns:
+        (df_total, df_non_gold)
+    """
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        total = pool.submit(fetch_indicator_data, INDICATOR_TOTAL, countries, date_range)
+        non_gold = pool.submit(fetch_indicator_data, INDICATOR_NON_GOLD, countries, date_range)
+        return total.result(), non_gold.result()
 
-        page += 1
-        time.sleep(REQUEST_DELAY)
 
-    logger.info(f"Total valid records for {indicator_id}: {len(all_records)}")
+def load_existing_dataset(csv_path: str = OUTPUT_CSV) -> Optional[pd.DataFrame]:
+    """
+    Load a previously exported dataset, preferring the Parquet copy when it is
+    at least as new as the CSV.
 
-    if not all_records:
-        return pd.DataFrame()
+    Args:
+        csv_path: Path of the exported CSV
+
+    Returns:
+        DataFrame, or None when no usable export exists
+    """
+    parquet_path = csv_path.replace(".csv", ".parquet")
+    try:
+        if os.path.exists(parquet_path) and (
+            not os.path.exists(csv_path) or os.path.getmtime(parquet_path) >= os.path.getmtime(csv_path)
+        ):
+            df = pd.read_parquet(parquet_path)
+            logger.info(f"Loaded {len(df):,} existing records from {parquet_path}")
+            return df
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"Could not read {parquet_path}: {e}")
+
+    if not os.path.exists(csv_path):
+        return None
+    # Only empty cells are missing: Namibia's iso2 "NA" must not become NaN
+    df = pd.read_csv(csv_path, keep_default_na=False, na_values=[""])
+    logger.info(f"Loaded {len(df):,} existing records from {csv_path}")
+    return df
+
+
+def merge_incremental(df_existing: pd.DataFrame, df_recent: pd.DataFrame) -> pd.DataFrame:
+    """
+    Merge freshly fetched recent years into an existing dataset.
+    Rows are deduplicated on (iso2, year); fetched rows win.
+
+    Args:
+        df_existing: Previously exported dataset
+        df_recent: Output of calculate_gold_inference() for the recent years
+
+    Returns:
+        Merged DataFrame sorted by iso2, year
+    """
+    merged = pd.concat([df_existing[df_recent.columns], df_recent], ignore_index=True)
+    merged = merged.drop_duplicates(subset=["iso2", "year"], keep="last")
+    merged = merged.sort_values(["iso2", "year"], kind="mergesort").reset_index(drop=True)
+    logger.info(
+        f"Incremental merge: {len(df_existing):,} existing + {len(df_recent):,} fetched "
+        f"-> {len(merged):,} records"
+    )
+    return merged
 
-    return pd.DataFrame(all_records)
+
+def split_indicators(df_merged: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Rebuild per-indicator frames from a merged dataset (for coverage/statistics).
+
+    Args:
+        df_merged: Merged DataFrame
+
+    Returns:
+        (df_total, df_non_gold) with columns: iso2, country_name, year, value
+    """
+    frames = []
+    for column in ("total_reserves_usd", "non_gold_reserves_usd"):
+        rows = df_merged[df_merged[column].notna()]
+        frames.append(rows[["iso2", "country_name", "year", column]].rename(columns={column: "value"}))
+    return frames[0], frames[1]
+
+
+def compute_quality_flags(gold: pd.Series) -> np.ndarray:
+    """
+    Quality flag per row: NEGATIVE_GOLD_INFERRED when gold < 0, otherwise OK.
+
+    Args:
+        gold: Inferred gold value (total - non-gold)
+
+    Returns:
+        Array of flag strings aligned with `gold`
+    """
+    return np.where(gold < 0, "NEGATIVE_GOLD_INFERRED", "OK")
 
 
 def calculate_gold_inference(df_total: pd.DataFrame, df_non_gold: pd.DataFrame) -> pd.DataFrame:
@@ -282,10 +278,7 @@ def calculate_gold_inference(df_total: pd.DataFrame, df_non_gold: pd.DataFrame)
     merged["gold_value_usd_inferred"] = merged["value_total"] - merged["value_non_gold"]
 
     # Add quality flags
-    merged["quality_flag"] = merged.apply(
-        lambda row: "NEGATIVE_GOLD_INFERRED" if row["gold_value_usd_inferred"] < 0 else "OK",
-        axis=1
-    )
+    merged["quality_flag"] = compute_quality_flags(merged["gold_value_usd_inferred"])
 
     # Rename columns for clarity
     merged.rename(columns={
@@ -315,7 +308,8 @@ def calculate_gold_inference(df_total: pd.DataFrame, df_non_gold: pd.DataFrame)
     return merged
 
 
-def generate_coverage_report(df_total: pd.DataFrame, df_non_gold: pd.DataFrame, df_merged: pd.DataFrame) -> pd.DataFrame:
+def generate_coverage_report(df_total: pd.DataFrame, df_non_gold: pd.DataFrame,
+                             df_merged: pd.DataFrame) -> pd.DataFrame:
     """
     Generate coverage report by country.
 
@@ -329,51 +323,30 @@ def generate_coverage_report(df_total: pd.DataFrame, df_non_gold: pd.DataFrame,
     """
     logger.info("Generating coverage report...")
 
-    # Get unique countries
-    all_iso2 = set(df_total["iso2"].unique()) | set(df_non_gold["iso2"].unique())
-
-    coverage_data = []
-
-    for iso2 in sorted(all_iso2):
-        # Get country name from merged data
-        country_rows = df_merged[df_merged["iso2"] == iso2]
-        if country_rows.empty:
-            continue
-        country_name = country_rows["country_name"].iloc[0]
-
-        # Check availability
-        has_total = iso2 in df_total["iso2"].values
-        has_non_gold = iso2 in df_non_gold["iso2"].values
-        has_both = has_total and has_non_gold
-
-        # Get year range
-        country_data = df_merged[df_merged["iso2"] == iso2]
-        country_data = country_data[
-            (country_data["total_reserves_usd"].notna()) |
-            (country_data["non_gold_reserves_usd"].notna())
-        ]
-
-        if not country_data.empty:
-            first_year = int(country_data["year"].min())
-            last_year = int(country_data["year"].max())
-            n_years = len(country_data["year"].unique())
-        else:
-            first_year = None
-            last_year = None
-            n_years = 0
+    total_iso2 = pd.Index(df_total["iso2"].unique())
+    non_gold_iso2 = pd.Index(df_non_gold["iso2"].unique())
+    merged = df_merged[df_merged["iso2"].isin(total_iso2.union(non_gold_iso2))]
 
-        coverage_data.append({
-            "iso2": iso2,
-            "country_name": country_name,
-            "has_total": has_total,
-            "has_non_gold": has_non_gold,
-            "has_both": has_both,
-            "first_year": first_year,
-            "last_year": last_year,
-            "n_years": n_years
-        })
+    # One row per country, named after its first merged row
+    df_coverage = (
+        merged.drop_duplicates("iso2")[["iso2", "country_name"]]
+        .sort_values("iso2", kind="mergesort")
+        .reset_index(drop=True)
+    )
+    df_coverage["has_total"] = df_coverage["iso2"].isin(total_iso2)
+    df_coverage["has_non_gold"] = df_coverage["iso2"].isin(non_gold_iso2)
+    df_coverage["has_both"] = df_coverage["has_total"] & df_coverage["has_non_gold"]
+
+    # Year range for records with at least one indicator
+    has_years = merged["total_reserves_usd"].notna() | merged["non_gold_reserves_usd"].notna()
+    years = merged.loc[has_years].groupby("iso2")["year"].agg(
+        first_year="min", last_year="max", n_years="nunique"
+    )
+    df_coverage = df_coverage.join(years, on="iso2")
+    df_coverage["n_years"] = df_coverage["n_years"].fillna(0).astype(int)
+    if df_coverage[["first_year", "last_year"]].notna().all().all():
+        df_coverage[["first_year", "last_year"]] = df_coverage[["first_year", "last_year"]].astype(int)
 
-    df_coverage = pd.DataFrame(coverage_data)
     return df_coverage
 
 
@@ -445,6 +418,27 @@ def print_summary_statistics(df_total: pd.DataFrame, df_non_gold: pd.DataFrame,
     logger.info("\n" + "="*80 + "\n")
 
 
+def write_atomic(df: pd.DataFrame, path: str):
+    """
+    Write a DataFrame to CSV or Parquet (by extension) via a temp file and
+    os.replace, so readers never see a partially written file.
+
+    Args:
+        df: DataFrame to write
+        path: Destination path
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        if path.endswith(".parquet"):
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
 def export_data(df_merged: pd.DataFrame, df_coverage: pd.DataFrame):
     """
     Export data to CSV and optionally Parquet.
@@ -456,17 +450,17 @@ def export_data(df_merged: pd.DataFrame, df_coverage: pd.DataFrame):
     logger.info("Exporting data...")
 
     # Export main dataset
-    df_merged.to_csv(OUTPUT_CSV, index=False)
+    write_atomic(df_merged, OUTPUT_CSV)
     logger.info(f"Exported {len(df_merged):,} records to {OUTPUT_CSV}")
 
     # Export coverage report
-    df_coverage.to_csv(COVERAGE_REPORT_CSV, index=False)
+    write_atomic(df_coverage, COVERAGE_REPORT_CSV)
     logger.info(f"Exported coverage report to {COVERAGE_REPORT_CSV}")
 
     # Try to export Parquet if pyarrow is available
     try:
-        df_merged.to_parquet(OUTPUT_CSV.replace(".csv", ".parquet"), index=False)
-        df_coverage.to_parquet(COVERAGE_REPORT_CSV.replace(".csv", ".parquet"), index=False)
+        write_atomic(df_merged, OUTPUT_CSV.replace(".csv", ".parquet"))
+        write_atomic(df_coverage, COVERAGE_REPORT_CSV.replace(".csv", ".parquet"))
         logger.info("Also exported to Parquet format")
     except ImportError:
         logger.info("Parquet export skipped (pyarrow not installed)")
@@ -511,6 +505,28 @@ GOLD_VALUE_USD_INFERRED = TOTAL_RESERVES_USD - NON_GOLD_RESERVES_USD
 python build_reserves_gold_dataset.py
 ```
 
+To refresh an existing export, re-fetch only the last few years and merge them in
+(rows are deduplicated on `iso2`, `year`; files are replaced atomically):
+
+```bash
+python build_reserves_gold_dataset.py --incremental            # last 3 years
+python build_reserves_gold_dataset.py --incremental --years 5
+```
+
+API responses are cached on disk in `.wdi_cache/` (24h TTL). Set `WDI_CACHE_MODE`
+to `off`, `cache` (default), `record` (always fetch, store) or `replay` (stored
+responses only, no network). To run against a local stand-in serving recorded pages:
+
+```bash
+python wdi_client.py serve --port 8765
+WDI_BASE_URL=http://127.0.0.1:8765 WDI_CACHE_MODE=off python build_reserves_gold_dataset.py
+```
+
+`wdi_pipeline.py` builds this dataset and `reserves_gold_split_wdi.csv` in one run
+(fetch -> normalize -> infer -> QA -> export), downloading each indicator once.
+Stage outputs are cached as Parquet in `.wdi_stages/`; `--from-stage infer` re-runs
+the later stages without fetching. Nothing is exported if a blocking QA check fails.
+
 **Requirements:**
 - Python 3.7+
 - `requests`
@@ -533,7 +549,8 @@ The pipeline automatically:
 - Fetches data for all economies (excluding aggregates like "World", "income groups", etc.)
 - Handles pagination for large datasets
 - Implements retry logic for network errors
-- Respects rate limits (0.2s delay between requests)
+- Fetches pages and both indicators concurrently over pooled keep-alive connections
+- Respects rate limits (token bucket, 5 requests/second shared by all threads)
 - Generates coverage reports showing data availability by country
 
 ## Schema
@@ -605,14 +622,45 @@ CREATE TABLE IF NOT EXISTS reserves_yearly (
     logger.info(f"Generated SQL schema: {SQL_SCHEMA_FILE}")
 
 
-def main():
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    ap = argparse.ArgumentParser(description="Build the World Bank reserves vs gold dataset")
+    ap.add_argument(
+        "--incremental",
+        action="store_true",
+        help=f"Only re-fetch recent years and merge them into the existing {OUTPUT_CSV}",
+    )
+    ap.add_argument(
+        "--years",
+        type=int,
+        default=INCREMENTAL_YEARS,
+        help=f"Years to re-fetch in incremental mode (default: {INCREMENTAL_YEARS})",
+    )
+    return ap.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
     """Main pipeline execution."""
+    args = parse_args(argv)
     start_time = time.time()
 
     logger.info("="*80)
     logger.info("WORLD BANK RESERVES VS GOLD DATASET - PIPELINE START")
     logger.info("="*80 + "\n")
 
+    df_existing = None
+    date_range = None
+    if args.incremental:
+        df_existing = load_existing_dataset()
+        if df_existing is None or df_existing.empty:
+            logger.warning(f"No existing {OUTPUT_CSV}; running a full build")
+            df_existing = None
+        else:
+            end_year = datetime.now().year
+            start_year = min(int(df_existing["year"].max()), end_year) - max(args.years, 1) + 1
+            date_range = f"{start_year}:{end_year}"
+            logger.info(f"Incremental mode: fetching {date_range}")
+
     try:
         # Step 1: Fetch countries (filter out aggregates)
         countries = fetch_countries()
@@ -621,9 +669,8 @@ def main():
             logger.error("No countries found. Exiting.")
             return
 
-        # Step 2: Fetch indicator data
-        df_total = fetch_indicator_data(INDICATOR_TOTAL, countries)
-        df_non_gold = fetch_indicator_data(INDICATOR_NON_GOLD, countries)
+        # Step 2: Fetch both indicators in parallel
+        df_total, df_non_gold = fetch_reserves_indicators(countries, date_range)
 
         if df_total.empty and df_non_gold.empty:
             logger.error("No indicator data found. Exiting.")
@@ -632,6 +679,10 @@ def main():
         # Step 3: Calculate inferred gold value
         df_merged = calculate_gold_inference(df_total, df_non_gold)
 
+        if df_existing is not None:
+            df_merged = merge_incremental(df_existing, df_merged)
+            df_total, df_non_gold = split_indicators(df_merged)
+
         # Step 4: Generate coverage report
         df_coverage = generate_coverage_report(df_total, df_non_gold, df_merged)
 
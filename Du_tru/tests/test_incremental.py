@@ -0,0 +1,60 @@
+"""
+Tests for the incremental update path of build_reserves_gold_dataset (no network)
+"""
+
+import pandas as pd
+
+import build_reserves_gold_dataset as builder
+
+
+def _indicator(rows, indicator_id):
+    return pd.DataFrame(
+        [{"iso2": iso2, "country_name": name, "year": year, "value": value, "indicator_id": indicator_id}
+         for iso2, name, year, value in rows]
+    )
+
+
+def _inference(total_rows, non_gold_rows):
+    return builder.calculate_gold_inference(
+        _indicator(total_rows, builder.INDICATOR_TOTAL),
+        _indicator(non_gold_rows, builder.INDICATOR_NON_GOLD),
+    )
+
+
+def test_merge_incremental_keeps_namibia_through_csv(tmp_path):
+    """iso2 "NA" survives the CSV round-trip and deduplicates against fetched rows"""
+    existing = _inference(
+        [("NA", "Namibia", 2021, 2.6e9), ("NA", "Namibia", 2022, 2.7e9), ("VN", "Viet Nam", 2022, 8.6e10)],
+        [("NA", "Namibia", 2021, 2.5e9), ("NA", "Namibia", 2022, 2.6e9), ("VN", "Viet Nam", 2022, 8.5e10)],
+    )
+    csv_path = str(tmp_path / "reserves_gold_dataset.csv")
+    builder.write_atomic(existing, csv_path)
+
+    loaded = builder.load_existing_dataset(csv_path)
+    assert loaded["iso2"].tolist() == ["NA", "NA", "VN"]
+
+    recent = _inference(
+        [("NA", "Namibia", 2022, 2.8e9), ("NA", "Namibia", 2023, 2.9e9)],
+        [("NA", "Namibia", 2022, 2.7e9), ("NA", "Namibia", 2023, 2.8e9)],
+    )
+    merged = builder.merge_incremental(loaded, recent)
+
+    assert merged["iso2"].notna().all()
+    assert not merged.duplicated(subset=["iso2", "year"]).any()
+    assert list(zip(merged["iso2"], merged["year"])) == [("NA", 2021), ("NA", 2022), ("NA", 2023), ("VN", 2022)]
+    # Fetched rows win over the exported ones
+    assert merged.loc[(merged["iso2"] == "NA") & (merged["year"] == 2022), "total_reserves_usd"].item() == 2.8e9
+
+
+def test_load_existing_dataset_keeps_empty_cells_missing(tmp_path):
+    """Only empty cells are read as missing values"""
+    csv_path = tmp_path / "reserves_gold_dataset.csv"
+    csv_path.write_text(
+        "iso2,country_name,year,total_reserves_usd,non_gold_reserves_usd,gold_value_usd_inferred,quality_flag\n"
+        "NA,Namibia,2022,2700000000.0,,,OK\n"
+    )
+
+    df = builder.load_existing_dataset(str(csv_path))
+    assert df["iso2"].item() == "NA"
+    assert pd.isna(df["non_gold_reserves_usd"].item())
+    assert df["non_gold_reserves_usd"].dtype == float
@@ -0,0 +1,59 @@
+"""
+Tests for World Bank pagination and response caching (no network)
+"""
+
+import pytest
+
+import wdi_client
+
+URL = f"{wdi_client.BASE_URL}/country/all/indicator/FI.RES.TOTL.CD"
+ERROR = [{"message": [{"id": "120", "key": "Invalid value", "value": "The provided parameter value is not valid"}]}]
+
+
+def _page(page, pages, records):
+    return [{"page": page, "pages": pages, "per_page": 2, "total": 2 * pages}, records]
+
+
+@pytest.fixture
+def fake_live(monkeypatch, tmp_path):
+    """Route fetch_with_retry to canned responses keyed by page, through a fresh cache."""
+    monkeypatch.setattr(wdi_client, "_CACHE", wdi_client.ResponseCache(root=str(tmp_path), mode="cache"))
+    responses = {}
+    calls = []
+
+    def fetch_live(url, params=None, max_retries=wdi_client.MAX_RETRIES):
+        calls.append(params["page"])
+        return responses.get(params["page"])
+
+    monkeypatch.setattr(wdi_client, "_fetch_live", fetch_live)
+    return responses, calls
+
+
+def test_fetch_all_pages_in_page_order(fake_live):
+    responses, _ = fake_live
+    responses.update({p: _page(p, 3, [{"page": p, "i": i} for i in range(2)]) for p in (1, 2, 3)})
+
+    records = wdi_client.fetch_all_pages(URL)
+    assert [(r["page"], r["i"]) for r in records] == [(1, 0), (1, 1), (2, 0), (2, 1), (3, 0), (3, 1)]
+
+
+@pytest.mark.parametrize("failed_page, payload", [(1, None), (2, None), (3, ERROR)])
+def test_fetch_all_pages_raises_on_failed_page(fake_live, failed_page, payload):
+    """A missing or error page aborts the fetch instead of returning partial data"""
+    responses, _ = fake_live
+    responses.update({p: _page(p, 3, [{"page": p}]) for p in (1, 2, 3)})
+    responses[failed_page] = payload
+
+    with pytest.raises(wdi_client.WorldBankAPIError, match=f"page {failed_page}"):
+        wdi_client.fetch_all_pages(URL)
+
+
+def test_error_payload_is_not_cached(fake_live):
+    responses, calls = fake_live
+    responses[1] = ERROR
+    assert wdi_client.fetch_with_retry(URL, params={"page": 1}) == ERROR
+
+    responses[1] = _page(1, 1, [{"page": 1}])
+    assert wdi_client.fetch_with_retry(URL, params={"page": 1}) == responses[1]
+    assert wdi_client.fetch_with_retry(URL, params={"page": 1}) == responses[1]
+    assert calls == [1, 1]
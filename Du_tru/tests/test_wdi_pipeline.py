@@ -0,0 +1,136 @@
+"""
+Tests for the staged WDI pipeline with stubbed World Bank fetches (no network)
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import build_gold_column_wdi as split_builder
+import build_reserves_gold_dataset as reserves_builder
+import wdi_pipeline
+
+COUNTRIES = [
+    {"iso2": "NA", "iso3": "NAM", "country_name": "Namibia"},
+    {"iso2": "VN", "iso3": "VNM", "country_name": "Viet Nam"},
+    {"iso2": "ZW", "iso3": "ZWE", "country_name": "Zimbabwe"},
+]
+OUTPUTS = [
+    reserves_builder.OUTPUT_CSV,
+    split_builder.OUTPUT_CSV,
+    reserves_builder.COVERAGE_REPORT_CSV,
+    split_builder.COVERAGE_REPORT_CSV,
+    wdi_pipeline.QA_REPORT_JSON,
+]
+
+
+def _indicator(indicator_id, values):
+    names = {c["iso2"]: c for c in COUNTRIES}
+    return pd.DataFrame([
+        {"iso2": iso2, "iso3": names[iso2]["iso3"], "country_name": names[iso2]["country_name"],
+         "year": year, "value": value, "indicator_id": indicator_id}
+        for (iso2, year), value in values.items()
+    ])
+
+
+TOTAL = _indicator(reserves_builder.INDICATOR_TOTAL, {
+    ("NA", 2022): 2.7e9, ("NA", 2023): 2.9e9, ("VN", 2022): 8.6e10, ("VN", 2023): 9.2e10, ("ZW", 2023): 1.2e8,
+})
+NON_GOLD = _indicator(reserves_builder.INDICATOR_NON_GOLD, {
+    ("NA", 2022): 2.7e9, ("NA", 2023): 2.8e9, ("VN", 2022): 8.5e10, ("VN", 2023): 9.0e10,
+})
+
+
+@pytest.fixture
+def stub_fetch(monkeypatch):
+    calls = []
+
+    def fetch_reserves_indicators(countries, date_range=None):
+        calls.append(len(countries))
+        return TOTAL.copy(), NON_GOLD.copy()
+
+    monkeypatch.setattr(reserves_builder, "fetch_countries", lambda: list(COUNTRIES))
+    monkeypatch.setattr(reserves_builder, "fetch_reserves_indicators", fetch_reserves_indicators)
+    return calls
+
+
+def test_run_pipeline_writes_both_datasets_and_coverage_reports(tmp_path, stub_fetch):
+    outdir = str(tmp_path / "out")
+    report = wdi_pipeline.run_pipeline(outdir)
+
+    for name in OUTPUTS:
+        assert os.path.exists(os.path.join(outdir, name)), name
+    assert report["reserves"]["passed"] and report["split"]["passed"]
+
+    reserves = reserves_builder.load_existing_dataset(os.path.join(outdir, reserves_builder.OUTPUT_CSV))
+    assert list(reserves.columns) == wdi_pipeline.RESERVES_COLUMNS
+    assert len(reserves) == 5
+    split = pd.read_csv(os.path.join(outdir, split_builder.OUTPUT_CSV), keep_default_na=False, na_values=[""])
+    assert list(split.columns) == wdi_pipeline.SPLIT_COLUMNS
+
+    # Zimbabwe has only TOTAL: counted by the either-indicator report, not the both-indicators one
+    coverage = pd.read_csv(os.path.join(outdir, reserves_builder.COVERAGE_REPORT_CSV),
+                           keep_default_na=False, na_values=[""]).set_index("iso2")
+    split_coverage = pd.read_csv(os.path.join(outdir, split_builder.COVERAGE_REPORT_CSV),
+                                 keep_default_na=False, na_values=[""]).set_index("iso2")
+    assert coverage.loc["ZW", "n_years"] == 1
+    assert split_coverage.loc["ZW", "n_years"] == 0
+    assert coverage.loc["NA", "n_years"] == split_coverage.loc["NA", "n_years"] == 2
+
+
+def test_rerun_from_qa_uses_stage_cache(tmp_path, stub_fetch):
+    pytest.importorskip("pyarrow")
+    outdir = str(tmp_path / "out")
+    wdi_pipeline.run_pipeline(outdir)
+    assert stub_fetch == [len(COUNTRIES)]
+
+    rerun_dir = str(tmp_path / "rerun")
+    stage_dir = os.path.join(outdir, wdi_pipeline.STAGE_DIR)
+    wdi_pipeline.run_pipeline(rerun_dir, stage_dir, "qa")
+
+    assert stub_fetch == [len(COUNTRIES)]  # no second fetch
+    for name in OUTPUTS[:-1]:
+        with open(os.path.join(outdir, name)) as a, open(os.path.join(rerun_dir, name)) as b:
+            assert a.read() == b.read(), name
+
+
+def test_qa_failure_blocks_export(tmp_path, stub_fetch):
+    pytest.importorskip("pyarrow")
+    outdir = str(tmp_path / "out")
+    stage_dir = os.path.join(outdir, wdi_pipeline.STAGE_DIR)
+    wdi_pipeline.run_pipeline(outdir)
+
+    # Corrupt the cached inference output: a duplicate key and a gold value off by 1 USD
+    store = wdi_pipeline.StageStore(stage_dir)
+    inferred = store.load(["reserves", "split"])
+    split = inferred["split"]
+    split.loc[0, "gold_reserves_value_usd_inferred"] += 1.0
+    store.save({"reserves": pd.concat([inferred["reserves"], inferred["reserves"].head(1)]), "split": split})
+
+    rerun_dir = str(tmp_path / "rerun")
+    with pytest.raises(wdi_pipeline.QAError) as excinfo:
+        wdi_pipeline.run_pipeline(rerun_dir, stage_dir, "qa")
+    assert "duplicate" in str(excinfo.value) and "gold != total - non_gold" in str(excinfo.value)
+    assert not os.path.exists(rerun_dir) or not os.listdir(rerun_dir)
+
+
+def test_empty_indicator_is_rejected(monkeypatch, tmp_path):
+    monkeypatch.setattr(reserves_builder, "fetch_countries", lambda: list(COUNTRIES))
+    monkeypatch.setattr(reserves_builder, "fetch_reserves_indicators",
+                        lambda countries, date_range=None: (TOTAL.copy(), pd.DataFrame()))
+
+    with pytest.raises(RuntimeError, match=reserves_builder.INDICATOR_NON_GOLD):
+        wdi_pipeline.run_pipeline(str(tmp_path / "out"))
+    assert not os.path.exists(tmp_path / "out" / reserves_builder.OUTPUT_CSV)
+
+
+def test_main_exits_nonzero_on_qa_failure(tmp_path, monkeypatch):
+    def failing_pipeline(outdir, stage_dir, from_stage):
+        raise wdi_pipeline.QAError("1 duplicate (iso2, year) rows")
+
+    monkeypatch.setattr(wdi_pipeline, "run_pipeline", failing_pipeline)
+    with pytest.raises(SystemExit) as excinfo:
+        wdi_pipeline.main(["--outdir", str(tmp_path)])
+    assert excinfo.value.code == 1
+    assert os.listdir(tmp_path) == []
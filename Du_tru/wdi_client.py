@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+World Bank API client shared by the WDI builders.
+
+- One pooled keep-alive requests.Session for every call
+- Token-bucket rate limiting shared across worker threads
+- Paginated endpoints: page 1 is fetched first to learn `pages`, the
+  remaining pages are fetched concurrently
+- On-disk response cache keyed by (path, params), with a TTL and
+  record/replay modes (WDI_CACHE_MODE)
+
+Replaying recorded pages through a local stand-in server:
+
+    python wdi_client.py serve --port 8765
+    WDI_BASE_URL=http://127.0.0.1:8765 WDI_CACHE_MODE=off python build_gold_column_wdi.py
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+BASE_URL = os.environ.get("WDI_BASE_URL", "https://api.worldbank.org/v2").rstrip("/")
+PER_PAGE = 20000  # Max records per page
+MAX_RETRIES = 3
+RETRY_DELAY = 2.0  # seconds, multiplied by the attempt number
+REQUEST_TIMEOUT = 30
+REQUESTS_PER_SECOND = 5.0  # sustained rate across all threads
+REQUEST_BURST = 4  # requests allowed back-to-back before throttling
+MAX_WORKERS = 4  # concurrent page fetches per paginated call
+POOL_SIZE = 16  # keep-alive connections kept per host
+
+# Response cache. Modes:
+#   off    - always fetch live, never write
+#   cache  - serve fresh entries (younger than the TTL), fetch and store misses
+#   record - always fetch live and store the response
+#   replay - serve stored entries regardless of age, never touch the network
+CACHE_MODES = ("off", "cache", "record", "replay")
+CACHE_DIR = os.environ.get("WDI_CACHE_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), ".wdi_cache")
+CACHE_MODE = os.environ.get("WDI_CACHE_MODE", "cache")
+CACHE_TTL_SECONDS = float(os.environ.get("WDI_CACHE_TTL", 24 * 3600))
+
+
+class WorldBankAPIError(Exception):
+    """Custom exception for World Bank API errors."""
+    pass
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/second, at most `capacity` banked."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until one token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ResponseCache:
+    """
+    JSON responses stored under <root>/<key[:2]>/<key>.json, where key is the
+    SHA-256 of the request path (relative to BASE_URL) and its sorted params.
+    Keys do not depend on the host, so pages recorded against the live API
+    are also found when BASE_URL points at the replay server.
+    """
+
+    def __init__(self, root: str = CACHE_DIR, mode: str = CACHE_MODE, ttl: float = CACHE_TTL_SECONDS):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r} (expected one of {', '.join(CACHE_MODES)})")
+        self.root = root
+        self.mode = mode
+        self.ttl = ttl
+
+    @staticmethod
+    def request_key(path: str, params: Optional[Dict] = None) -> str:
+        canonical = json.dumps(
+            {"path": "/" + path.strip("/"), "params": sorted((str(k), str(v)) for k, v in (params or {}).items())},
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def path_of(url: str) -> str:
+        """Request path relative to BASE_URL (the full URL for other hosts)."""
+        if url.startswith(BASE_URL):
+            return url[len(BASE_URL):] or "/"
+        return url
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key: str, ttl: Optional[float] = None) -> Optional[Any]:
+        """Stored response for `key`, or None when missing or older than `ttl` seconds."""
+        try:
+            with open(self._file(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if ttl is not None and time.time() - float(entry.get("fetched_at", 0)) > ttl:
+            return None
+        return entry.get("data")
+
+    def put(self, key: str, path: str, params: Optional[Dict], data: Any) -> None:
+        target = self._file(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        entry = {"path": path, "params": params or {}, "fetched_at": time.time(), "data": data}
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, separators=(",", ":"))
+            os.replace(tmp, target)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+
+_RATE_LIMITER = TokenBucket(REQUESTS_PER_SECOND, REQUEST_BURST)
+_CACHE = ResponseCache()
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Process-wide session with a connection pool sized for the worker threads."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _SESSION = session
+        return _SESSION
+
+
+def set_cache(mode: Optional[str] = None, root: Optional[str] = None, ttl: Optional[float] = None) -> ResponseCache:
+    """Reconfigure the process-wide response cache (unset arguments keep their value)."""
+    global _CACHE
+    _CACHE = ResponseCache(
+        root=root if root is not None else _CACHE.root,
+        mode=mode if mode is not None else _CACHE.mode,
+        ttl=ttl if ttl is not None else _CACHE.ttl,
+    )
+    return _CACHE
+
+
+def _is_data_payload(data) -> bool:
+    """World Bank data responses are [metadata, records]; errors come back as [{"message": ...}]."""
+    return isinstance(data, list) and len(data) >= 2 and isinstance(data[0], dict) and "message" not in data[0]
+
+
+def fetch_with_retry(url: str, params: Optional[Dict] = None, max_retries: int = MAX_RETRIES,
+                     ttl: Optional[float] = None) -> Optional[Dict]:
+    """
+    Fetch data from URL, going through the response cache.
+
+    Args:
+        url: API endpoint URL
+        params: Query parameters
+        max_retries: Maximum number of retry attempts
+        ttl: Cache freshness in seconds (defaults to the cache TTL)
+
+    Returns:
+        JSON response data or None if all retries fail
+    """
+    cache = _CACHE
+    if cache.mode == "off":
+        return _fetch_live(url, params, max_retries)
+
+    path = cache.path_of(url)
+    key = cache.request_key(path, params)
+    if cache.mode in ("cache", "replay"):
+        data = cache.get(key, ttl=None if cache.mode == "replay" else (cache.ttl if ttl is None else ttl))
+        if _is_data_payload(data):
+            logger.debug(f"Cache hit: {path} {params or ''}")
+            return data
+        if cache.mode == "replay":
+            raise WorldBankAPIError(f"No recorded response for {path} {params or ''} in {cache.root}")
+
+    data = _fetch_live(url, params, max_retries)
+    # Never record error payloads: a cached API error would be replayed until the TTL runs out
+    if _is_data_payload(data):
+        cache.put(key, path, params, data)
+    return data
+
+
+def _fetch_live(url: str, params: Optional[Dict] = None, max_retries: int = MAX_RETRIES) -> Optional[Dict]:
+    """Fetch data from URL with retry logic for network errors and 5xx status codes."""
+    session = get_session()
+    for attempt in range(max_retries):
+        try:
+            _RATE_LIMITER.acquire()
+            logger.info(f"Fetching: {url} {params or ''}")
+            response = session.get(url, params=params, timeout=REQUEST_TIMEOUT)
+
+            # Check for server errors (5xx)
+            if response.status_code >= 500:
+                logger.warning(f"Server error {response.status_code} on attempt {attempt + 1}/{max_retries}")
+                if attempt < max_retries - 1:
+                    time.sleep(RETRY_DELAY * (attempt + 1))
+                    continue
+                else:
+                    raise WorldBankAPIError(f"Server error {response.status_code} after {max_retries} attempts")
+
+            # Check for client errors (4xx)
+            if response.status_code >= 400:
+                logger.error(f"Client error {response.status_code}: {response.text}")
+                raise WorldBankAPIError(f"Client error {response.status_code}")
+
+            # Success
+            response.raise_for_status()
+            return response.json()
+
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Request error on attempt {attempt + 1}/{max_retries}: {e}")
+            if attempt < max_retries - 1:
+                time.sleep(RETRY_DELAY * (attempt + 1))
+            else:
+                logger.error(f"Failed after {max_retries} attempts: {e}")
+                return None
+
+    return None
+
+
+def _page_records(data, url: str, page: int) -> List[Dict]:
+    if not _is_data_payload(data):
+        detail = data[0].get("message") if isinstance(data, list) and data and isinstance(data[0], dict) else None
+        raise WorldBankAPIError(f"Failed to fetch page {page} of {url}{f': {detail}' if detail else ''}")
+    return data[1] or []
+
+
+def fetch_all_pages(url: str, params: Optional[Dict] = None, max_workers: int = MAX_WORKERS) -> List[Dict]:
+    """
+    Fetch every page of a paginated World Bank endpoint.
+
+    Page 1 is fetched first to learn the page count; pages 2..N are then
+    fetched concurrently. Records are returned in page order. A page that
+    fails after retries aborts the fetch, so a partial dataset is never exported.
+
+    Args:
+        url: API endpoint URL
+        params: Extra query parameters (format/per_page/page are set here)
+        max_workers: Maximum concurrent page fetches
+
+    Returns:
+        List of records from all pages
+
+    Raises:
+        WorldBankAPIError: If any page cannot be fetched
+    """
+    base_params = dict(params or {})
+    base_params.setdefault("format", "json")
+    base_params.setdefault("per_page", PER_PAGE)
+
+    def fetch_page(page: int) -> List[Dict]:
+        return _page_records(fetch_with_retry(url, params={**base_params, "page": page}), url, page)
+
+    first = fetch_with_retry(url, params={**base_params, "page": 1})
+    records = _page_records(first, url, 1)
+    total_pages = int(first[0].get("pages", 1) or 1)
+    logger.info(f"Page 1/{total_pages}: {len(records)} records")
+    if total_pages <= 1:
+        return list(records)
+
+    all_records = list(records)
+    with ThreadPoolExecutor(max_workers=min(max_workers, total_pages - 1)) as pool:
+        for page, page_records in enumerate(pool.map(fetch_page, range(2, total_pages + 1)), start=2):
+            all_records.extend(page_records)
+            logger.info(f"Page {page}/{total_pages}: {len(page_records)} records")
+    return all_records
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    """Serves recorded responses by request key; 404 for anything not recorded."""
+
+    protocol_version = "HTTP/1.1"
+    cache: ResponseCache
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        key = ResponseCache.request_key(parts.path, dict(parse_qsl(parts.query)))
+        data = self.cache.get(key)
+        if data is None:
+            status, body = 404, [{"message": [{"id": "404", "value": f"Not recorded: {self.path}"}]}]
+        else:
+            status, body = 200, data
+        payload = json.dumps(body, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, fmt, *args):
+        logger.info(f"replay {self.address_string()} {fmt % args}")
+
+
+def serve_replay(host: str = "127.0.0.1", port: int = 8765, cache_dir: str = CACHE_DIR) -> None:
+    """Run a local stand-in for the World Bank API backed by recorded responses."""
+    handler = type("ReplayHandler", (_ReplayHandler,), {"cache": ResponseCache(root=cache_dir, mode="replay")})
+    server = ThreadingHTTPServer((host, port), handler)
+    logger.info(f"Replaying {cache_dir} on http://{host}:{port} (set WDI_BASE_URL to this address)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="World Bank API client utilities")
+    sub = ap.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="Serve recorded responses as a local World Bank API stand-in")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--cache-dir", default=CACHE_DIR)
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.command == "serve":
+        serve_replay(args.host, args.port, args.cache_dir)
+
+
+if __name__ == "__main__":
+    main()
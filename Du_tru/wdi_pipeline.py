@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+World Bank WDI reserves pipeline: fetch -> normalize -> infer -> qa -> export
+
+Builds both reserves outputs from one download of each indicator:
+- reserves_gold_by_country_year.csv (build_reserves_gold_dataset.py schema)
+- reserves_gold_split_wdi.csv (build_gold_column_wdi.py schema)
+plus each builder's coverage report: coverage_report.csv counts years with
+either indicator, coverage_report_split_wdi.csv only years with both.
+
+Stage outputs are cached as Parquet in --stage-dir; --from-stage re-runs the
+pipeline from a later stage using the cached inputs (e.g. tweak QA or export
+without touching the network).
+
+Usage:
+    python wdi_pipeline.py
+    python wdi_pipeline.py --from-stage infer
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import build_gold_column_wdi as split_builder
+import build_reserves_gold_dataset as reserves_builder
+from wdi_client import WorldBankAPIError
+
+logger = logging.getLogger(__name__)
+
+STAGES = ["fetch", "normalize", "infer", "qa", "export"]
+STAGE_DIR = ".wdi_stages"
+QA_REPORT_JSON = "qa_report.json"
+QA_TOLERANCE_USD = 0.01  # max abs(gold - (total - non_gold))
+
+KEY_COLUMNS = ["iso2", "country_name", "year"]
+RESERVES_COLUMNS = [
+    "iso2", "country_name", "year",
+    "total_reserves_usd", "non_gold_reserves_usd", "gold_value_usd_inferred",
+    "quality_flag"
+]
+SPLIT_COLUMNS = [
+    "iso2", "country_name", "year",
+    "total_reserves_usd", "non_gold_reserves_usd", "gold_reserves_value_usd_inferred",
+    "quality_flag"
+]
+
+
+class QAError(Exception):
+    """Raised when a blocking QA check fails."""
+    pass
+
+
+class StageStore:
+    """Parquet cache for stage outputs (disabled when pyarrow is missing)."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.enabled = True
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, f"{name}.parquet")
+
+    def save(self, frames: Dict[str, pd.DataFrame]):
+        if not self.enabled:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        try:
+            for name, df in frames.items():
+                reserves_builder.write_atomic(df, self._path(name))
+        except ImportError:
+            logger.info("Stage caching skipped (pyarrow not installed)")
+            self.enabled = False
+
+    def load(self, names: List[str]) -> Dict[str, pd.DataFrame]:
+        missing = [n for n in names if not os.path.exists(self._path(n))]
+        if missing:
+            raise FileNotFoundError(f"Cached stage outputs not found in {self.root}: {', '.join(missing)}")
+        return {name: pd.read_parquet(self._path(name)) for name in names}
+
+
+# --- Stages ------------------------------------------------------------------
+
+def stage_fetch() -> Dict[str, pd.DataFrame]:
+    """Both indicators, each downloaded once (the country list only filters them)."""
+    countries = reserves_builder.fetch_countries()
+    if not countries:
+        raise RuntimeError("No countries found")
+    df_total, df_non_gold = reserves_builder.fetch_reserves_indicators(countries)
+    # Gold is inferred from both indicators; an empty one also has no columns to merge on
+    for indicator_id, df in ((reserves_builder.INDICATOR_TOTAL, df_total),
+                             (reserves_builder.INDICATOR_NON_GOLD, df_non_gold)):
+        if df.empty:
+            raise RuntimeError(f"No data found for indicator {indicator_id}")
+    return {
+        "fetch_total": df_total,
+        "fetch_non_gold": df_non_gold,
+    }
+
+
+def stage_normalize(df_total: pd.DataFrame, df_non_gold: pd.DataFrame) -> pd.DataFrame:
+    """One row per (iso2, country_name, year) with both indicator columns."""
+    normalized = pd.merge(
+        df_total[KEY_COLUMNS + ["value"]].rename(columns={"value": "total_reserves_usd"}),
+        df_non_gold[KEY_COLUMNS + ["value"]].rename(columns={"value": "non_gold_reserves_usd"}),
+        on=KEY_COLUMNS,
+        how="outer",
+        sort=True,
+    )
+    normalized = normalized[
+        normalized["total_reserves_usd"].notna() | normalized["non_gold_reserves_usd"].notna()
+    ].reset_index(drop=True)
+    logger.info(f"Normalized {len(normalized):,} country-year rows")
+    return normalized
+
+
+def stage_infer(normalized: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Inferred gold value plus each builder's quality flags."""
+    gold = normalized["total_reserves_usd"] - normalized["non_gold_reserves_usd"]
+
+    df_reserves = normalized.assign(
+        gold_value_usd_inferred=gold,
+        quality_flag=reserves_builder.compute_quality_flags(gold),
+    )[RESERVES_COLUMNS]
+    df_split = normalized.assign(
+        gold_reserves_value_usd_inferred=gold,
+        quality_flag=split_builder.compute_quality_flags(gold, normalized["total_reserves_usd"]),
+    )[SPLIT_COLUMNS]
+
+    logger.info(f"Quality flag distribution:\n{df_split['quality_flag'].value_counts().to_string()}")
+    return {"reserves": df_reserves, "split": df_split}
+
+
+def run_qa_checks(df: pd.DataFrame, gold_col: str = "gold_reserves_value_usd_inferred") -> Dict:
+    """
+    Vectorized version of the qa_check.py checks on an in-memory frame.
+
+    Blocking failures (listed in "failures"): duplicate (iso2, year) rows and
+    gold values that do not equal total - non_gold. Everything else is
+    reported for information.
+
+    Args:
+        df: Output frame with total/non-gold/gold columns and quality_flag
+        gold_col: Name of the inferred gold column
+
+    Returns:
+        Report dict (JSON serializable)
+    """
+    total = df["total_reserves_usd"]
+    non_gold = df["non_gold_reserves_usd"]
+    gold = df[gold_col]
+    failures = []
+
+    # 1) Nulls
+    nulls = df[["total_reserves_usd", "non_gold_reserves_usd", gold_col]].isna().sum()
+
+    # 2) Subtraction
+    max_diff = float((gold - (total - non_gold)).abs().max()) if len(df) else 0.0
+    if not max_diff < QA_TOLERANCE_USD:
+        failures.append(f"gold != total - non_gold (max abs diff {max_diff})")
+
+    # Uniqueness of the primary key
+    duplicates = int(df.duplicated(subset=["iso2", "year"]).sum())
+    if duplicates:
+        failures.append(f"{duplicates} duplicate (iso2, year) rows")
+
+    # 3) Negative / zero gold
+    zero = gold == 0
+
+    # 5) Economy-level coverage from per-indicator year sets
+    has_total = total.notna()
+    has_non_gold = non_gold.notna()
+    coverage = (
+        df.assign(
+            year_total=df["year"].where(has_total),
+            year_non_gold=df["year"].where(has_non_gold),
+            year_both=df["year"].where(has_total & has_non_gold),
+        )
+        .groupby("iso2")
+        .agg(
+            n_years_total=("year_total", "nunique"),
+            n_years_non_gold=("year_non_gold", "nunique"),
+            n_years_both=("year_both", "nunique"),
+            first_year=("year", "min"),
+            last_year=("year", "max"),
+        )
+    )
+    missing_one = coverage[(coverage["n_years_total"] == 0) | (coverage["n_years_non_gold"] == 0)]
+
+    # 9) Gold value by quality flag
+    by_flag = df.groupby("quality_flag")[gold_col].agg(["count", "mean", "median", "min", "max"])
+    by_flag["negative"] = (gold < 0).groupby(df["quality_flag"]).sum()
+    by_flag["zero"] = zero.groupby(df["quality_flag"]).sum()
+
+    def _clean(value):
+        if isinstance(value, (np.integer,)):
+            return int(value)
+        if isinstance(value, (np.floating, float)):
+            return None if np.isnan(value) else float(value)
+        return value
+
+    return {
+        "passed": not failures,
+        "failures": failures,
+        "rows": int(len(df)),
+        "nulls": {k: int(v) for k, v in nulls.items()},
+        "max_abs_subtraction_diff": max_diff,
+        "duplicate_keys": duplicates,
+        "negative_gold": int((gold < 0).sum()),
+        "zero_gold_with_total": int((zero & (total > 0)).sum()),
+        "zero_gold_with_null_total": int((zero & total.isna()).sum()),
+        "quality_flags": {k: int(v) for k, v in df["quality_flag"].value_counts().items()},
+        "economies": int(len(coverage)),
+        "economies_with_total": int((coverage["n_years_total"] > 0).sum()),
+        "economies_with_non_gold": int((coverage["n_years_non_gold"] > 0).sum()),
+        "economies_with_both": int((coverage["n_years_both"] > 0).sum()),
+        "economies_missing_one_indicator": sorted(missing_one.index.tolist()),
+        "year_min": _clean(df["year"].min()) if len(df) else None,
+        "year_max": _clean(df["year"].max()) if len(df) else None,
+        "gold_by_flag": {
+            flag: {k: _clean(v) for k, v in row.items()} for flag, row in by_flag.iterrows()
+        },
+    }
+
+
+def stage_qa(df_reserves: pd.DataFrame, df_split: pd.DataFrame) -> Dict:
+    """Run QA on both outputs; raise QAError on blocking failures."""
+    report = {
+        "split": run_qa_checks(df_split, "gold_reserves_value_usd_inferred"),
+        "reserves": run_qa_checks(df_reserves, "gold_value_usd_inferred"),
+    }
+    split = report["split"]
+    logger.info(
+        f"QA: {split['rows']:,} rows, {split['economies']} economies "
+        f"({split['economies_with_both']} with both indicators), "
+        f"negative gold {split['negative_gold']}, zero gold with total {split['zero_gold_with_total']}"
+    )
+    failures = [f"{name}: {msg}" for name, r in report.items() for msg in r["failures"]]
+    if failures:
+        raise QAError("; ".join(failures))
+    logger.info("QA: all blocking checks passed")
+    return report
+
+
+def stage_export(df_reserves: pd.DataFrame, df_split: pd.DataFrame, df_coverage: pd.DataFrame,
+                 df_split_coverage: pd.DataFrame, qa_report: Dict, outdir: str):
+    """Write both datasets and their coverage reports (CSV + Parquet), and the QA report."""
+    os.makedirs(outdir, exist_ok=True)
+    outputs = [
+        (df_reserves, reserves_builder.OUTPUT_CSV),
+        (df_split, split_builder.OUTPUT_CSV),
+        (df_coverage, reserves_builder.COVERAGE_REPORT_CSV),
+        (df_split_coverage, split_builder.COVERAGE_REPORT_CSV),
+    ]
+    for df, name in outputs:
+        reserves_builder.write_atomic(df, os.path.join(outdir, name))
+        logger.info(f"Exported {len(df):,} records to {name}")
+    try:
+        for df, name in outputs:
+            reserves_builder.write_atomic(df, os.path.join(outdir, name.replace(".csv", ".parquet")))
+        logger.info("Also exported to Parquet format")
+    except ImportError:
+        logger.info("Parquet export skipped (pyarrow not installed)")
+
+    qa_path = os.path.join(outdir, QA_REPORT_JSON)
+    with open(qa_path, "w", encoding="utf-8") as f:
+        json.dump(qa_report, f, indent=2)
+    logger.info(f"Wrote QA report to {QA_REPORT_JSON}")
+
+
+# -----------------------------------------------------------------------------
+
+def run_pipeline(outdir: str = ".", stage_dir: Optional[str] = None, from_stage: str = "fetch") -> Dict:
+    """
+    Run the pipeline, loading the inputs of `from_stage` from the stage cache.
+
+    Returns:
+        QA report
+    """
+    store = StageStore(stage_dir or os.path.join(outdir, STAGE_DIR))
+    start = STAGES.index(from_stage)
+
+    def timed(name, fn, *args):
+        t0 = time.time()
+        result = fn(*args)
+        logger.info(f"[{name}] done in {time.time() - t0:.2f}s")
+        return result
+
+    if start <= STAGES.index("fetch"):
+        fetched = timed("fetch", stage_fetch)
+        store.save(fetched)
+    else:
+        fetched = store.load(["fetch_total", "fetch_non_gold"])
+    df_total, df_non_gold = fetched["fetch_total"], fetched["fetch_non_gold"]
+
+    if start <= STAGES.index("normalize"):
+        normalized = timed("normalize", stage_normalize, df_total, df_non_gold)
+        store.save({"normalized": normalized})
+    else:
+        normalized = store.load(["normalized"])["normalized"]
+
+    if start <= STAGES.index("infer"):
+        inferred = timed("infer", stage_infer, normalized)
+        store.save(inferred)
+    else:
+        inferred = store.load(["reserves", "split"])
+    df_reserves, df_split = inferred["reserves"], inferred["split"]
+
+    qa_report = timed("qa", stage_qa, df_reserves, df_split)
+    df_coverage = reserves_builder.generate_coverage_report(df_total, df_non_gold, df_reserves)
+    df_split_coverage = split_builder.generate_coverage_report(df_total, df_non_gold, df_split)
+    timed("export", stage_export, df_reserves, df_split, df_coverage, df_split_coverage, qa_report, outdir)
+    return qa_report
+
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Build both WDI reserves datasets in one staged run")
+    ap.add_argument("--outdir", default=".", help="Output directory (default: current directory)")
+    ap.add_argument("--stage-dir", default=None, help=f"Stage cache directory (default: <outdir>/{STAGE_DIR})")
+    ap.add_argument("--from-stage", choices=STAGES, default="fetch",
+                    help="Start from this stage, loading earlier stage outputs from the cache")
+    args = ap.parse_args(argv)
+
+    start_time = time.time()
+    logger.info("=" * 80)
+    logger.info("WORLD BANK WDI RESERVES PIPELINE")
+    logger.info("=" * 80 + "\n")
+    try:
+        run_pipeline(args.outdir, args.stage_dir, args.from_stage)
+    except QAError as e:
+        logger.error(f"QA failed, nothing exported: {e}")
+        raise SystemExit(1)
+    except WorldBankAPIError as e:
+        logger.error(f"Fetch failed, nothing exported: {e}")
+        raise SystemExit(1)
+    logger.info(f"\nPipeline completed successfully in {time.time() - start_time:.1f} seconds")
+
+
+if __name__ == "__main__":
+    main()
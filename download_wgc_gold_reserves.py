@@ -9,6 +9,9 @@ Outputs (in --outdir):
   - wgc_gold_reserves_latest.csv
   - wgc_gold_reserves_latest.parquet (optional)
 
+Worker mode: `--serve 127.0.0.1:8765` keeps a warm process (and Chromium in playwright
+mode); `--worker 127.0.0.1:8765` sends a refresh to it.
+
 Requires:
   - requests
   - pandas
@@ -21,6 +24,7 @@ from __future__ import annotations
 import argparse
 import csv
 import hashlib
+import json
 import logging
 import os
 import re
@@ -40,6 +44,22 @@ LANDING_URL = "https://www.gold.org/goldhub/data/gold-reserves-by-country"
 DEFAULT_OUTDIR = "./data_wgc"
 AUTH_COOKIE_NAME = "wgcAuth_cookie"
 AUTH_COOKIE_ENV = "WGC_AUTH_COOKIE"
+LATEST_CSV_FILENAME = "wgc_gold_reserves_latest.csv"
+# Validators (ETag/Last-Modified/sha256) of the last download, plus an interrupted one to resume.
+DOWNLOAD_STATE_FILENAME = "wgc_download_state.json"
+DOWNLOAD_RESUME_ATTEMPTS = 4
+OUTPUT_COLUMNS = [
+    "country_name",
+    "tonnes",
+    "pct_of_reserves",
+    "value_usd",
+    "holdings_as_of",
+    "source",
+    "retrieved_at_utc",
+]
+# Bump when parsing/normalization changes so cached parses are not reused.
+PARSER_VERSION = 2
+PARSE_CACHE_FILENAME = "wgc_parse_cache.json"
 
 
 log = logging.getLogger("wgc_downloader")
@@ -92,10 +112,6 @@ def utc_now_iso() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
 
 
-def _sleep_rl() -> None:
-    time.sleep(0.2)
-
-
 def _is_retryable_status(code: int) -> bool:
     return code in {429} or 500 <= code <= 599
 
@@ -113,7 +129,6 @@ def request_with_retries(
 ) -> requests.Response:
     last_err: Optional[BaseException] = None
     for attempt in range(1, max_retries + 1):
-        _sleep_rl()
         try:
             resp = session.request(
                 method=method.upper(),
@@ -138,6 +153,8 @@ def request_with_retries(
                 # Non-retryable HTTP errors should fail fast (4xx).
                 resp.raise_for_status()
                 return resp
+        except requests.HTTPError:
+            raise
         except requests.RequestException as e:
             last_err = e
             log.warning("Request error (attempt %d/%d): %s", attempt, max_retries, e)
@@ -156,7 +173,6 @@ def fetch_html(session: requests.Session, url: str) -> str:
         "Accept": "text/html,application/xhtml+xml",
     }
     resp = request_with_retries(session, "GET", url, headers=headers, timeout=(10.0, 30.0))
-    _sleep_rl()
     resp.encoding = resp.encoding or "utf-8"
     return resp.text
 
@@ -226,6 +242,61 @@ class DownloadResult:
     path: str
     size_bytes: int
     sha256: str
+    # Same content as the last download (HTTP 304 or identical sha256).
+    unchanged: bool = False
+
+
+def _read_download_state(outdir: str) -> dict:
+    try:
+        with open(os.path.join(outdir, DOWNLOAD_STATE_FILENAME), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_download_state(outdir: str, **fields) -> dict:
+    """Merge `fields` into the state file (None removes a key) and stamp `checked_at_utc`."""
+    state = _read_download_state(outdir)
+    for k, v in fields.items():
+        if v is None:
+            state.pop(k, None)
+        else:
+            state[k] = v
+    state["checked_at_utc"] = utc_now_iso()
+    path = os.path.join(outdir, DOWNLOAD_STATE_FILENAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+    return state
+
+
+def _conditional_headers(state: dict, outdir: str) -> dict:
+    """If-None-Match/If-Modified-Since from the last download, while its output still exists."""
+    if not state.get("sha256") or not os.path.exists(os.path.join(outdir, LATEST_CSV_FILENAME)):
+        return {}
+    headers = {}
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+    return headers
+
+
+def _unchanged_result(state: dict, final_url: str) -> DownloadResult:
+    return DownloadResult(
+        final_url=state.get("final_url") or final_url,
+        path=state.get("path") or "",
+        size_bytes=int(state.get("size_bytes") or 0),
+        sha256=state.get("sha256") or "",
+        unchanged=True,
+    )
+
+
+def _content_range_start(resp: requests.Response) -> Optional[int]:
+    m = re.match(r"bytes\s+(\d+)-", resp.headers.get("Content-Range") or "")
+    return int(m.group(1)) if m else None
 
 
 def _filename_from_response(resp: requests.Response, fallback_name: str) -> str:
@@ -247,58 +318,142 @@ def _sanitize_filename(name: str) -> str:
     return name
 
 
-def download_file(session: requests.Session, download_url: str, outdir: str) -> DownloadResult:
+def download_file(
+    session: requests.Session, download_url: str, outdir: str, *, state: Optional[dict] = None
+) -> DownloadResult:
+    """
+    Conditional, resumable download of the XLSX into `outdir`.
+
+    - Sends the stored ETag/Last-Modified; HTTP 304 returns the previous result (unchanged).
+    - Streams into `<file>.part`; an interrupted stream resumes with `Range` + `If-Range`
+      (also across runs, via the state file). A server that ignores the range restarts it.
+    - A complete download whose sha256 matches the previous one is also reported unchanged.
+    """
     log.info("Downloading XLSX...")
     os.makedirs(outdir, exist_ok=True)
+    state = _read_download_state(outdir) if state is None else state
 
-    headers = {
+    base_headers = {
         "User-Agent": "Mozilla/5.0 (compatible; WGCReservesBot/1.0; +https://example.invalid)",
         "Referer": LANDING_URL,
         "Accept": "*/*",
     }
     auth_cookie = os.environ.get(AUTH_COOKIE_ENV)
     if auth_cookie:
-        headers["Cookie"] = f"{AUTH_COOKIE_NAME}={auth_cookie}"
-    resp = request_with_retries(session, "GET", download_url, headers=headers, stream=True, timeout=(10.0, 60.0))
-    final_url = resp.url
-
-    # Determine filename
-    parsed = urlparse(final_url)
-    fallback = os.path.basename(parsed.path) or "wgc_gold_reserves_latest.xlsx"
-    filename = _sanitize_filename(_filename_from_response(resp, fallback))
-    out_path = os.path.join(outdir, filename)
-
-    hasher = hashlib.sha256()
-    size = 0
+        base_headers["Cookie"] = f"{AUTH_COOKIE_NAME}={auth_cookie}"
+
+    partial = state.get("partial") if isinstance(state.get("partial"), dict) else {}
+    if partial.get("url") != download_url:
+        partial = {}
+    out_path: Optional[str] = partial.get("out_path")
+    part_path: Optional[str] = partial.get("part_path")
+    etag: Optional[str] = partial.get("etag")
+    last_modified: Optional[str] = partial.get("last_modified")
+    offset = os.path.getsize(part_path) if part_path and os.path.exists(part_path) else 0
+    final_url = download_url
 
-    # Validate by magic bytes: XLSX is a ZIP file, starts with b"PK"
-    first_chunk = None
-    try:
-        for chunk in resp.iter_content(chunk_size=1024 * 64):
-            if not chunk:
+    last_err: Optional[BaseException] = None
+    range_reset = False
+    for attempt in range(1, DOWNLOAD_RESUME_ATTEMPTS + 1):
+        headers = dict(base_headers)
+        validator = etag or last_modified
+        if offset > 0 and validator:
+            headers["Range"] = f"bytes={offset}-"
+            headers["If-Range"] = validator
+            log.info("Resuming download at byte %d", offset)
+        else:
+            offset = 0
+            headers.update(_conditional_headers(state, outdir))
+        try:
+            resp = request_with_retries(session, "GET", download_url, headers=headers, stream=True, timeout=(10.0, 60.0))
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if status != 416 or "Range" not in headers or range_reset:
+                raise
+            # The partial file no longer matches the server's copy: drop it and start over once.
+            log.warning("Range request rejected (HTTP 416); discarding partial download and restarting")
+            if part_path and os.path.exists(part_path):
+                os.remove(part_path)
+            _write_download_state(outdir, partial=None)
+            offset = 0
+            etag = last_modified = None
+            range_reset = True
+            continue
+        try:
+            if resp.status_code == 304:
+                log.info("XLSX not modified since last download (HTTP 304).")
+                _write_download_state(outdir, download_url=download_url, partial=None)
+                return _unchanged_result(state, resp.url)
+
+            final_url = resp.url
+            if resp.status_code == 206 and _content_range_start(resp) != offset:
+                log.warning("Unexpected Content-Range %r; restarting download", resp.headers.get("Content-Range"))
+                offset = 0
                 continue
-            if first_chunk is None:
-                first_chunk = chunk
-                sniff = chunk[:256].lstrip()
-                ct = (resp.headers.get("Content-Type") or "").lower()
-                if ct.startswith("text/html") or sniff.startswith(b"<!doctype") or sniff.startswith(b"<html") or sniff.startswith(b"<"):
-                    raise DownloadBlockedError(
-                        f"Download blocked (likely requires login). Try setting {AUTH_COOKIE_ENV} or use --local-xlsx."
-                    )
-                if not chunk.startswith(b"PK"):
-                    raise RuntimeError("Downloaded content does not look like an XLSX (missing ZIP magic bytes 'PK').")
-            with open(out_path, "ab") as f:
-                f.write(chunk)
-            hasher.update(chunk)
-            size += len(chunk)
-    finally:
-        resp.close()
+            if resp.status_code != 206:
+                # Full body: (re)start from scratch.
+                offset = 0
+                etag = resp.headers.get("ETag")
+                last_modified = resp.headers.get("Last-Modified")
+                parsed = urlparse(final_url)
+                fallback = os.path.basename(parsed.path) or "wgc_gold_reserves_latest.xlsx"
+                out_path = os.path.join(outdir, _sanitize_filename(_filename_from_response(resp, fallback)))
+                part_path = f"{out_path}.part"
+
+            with open(part_path, "ab" if offset else "wb") as f:
+                for chunk in resp.iter_content(chunk_size=1024 * 64):
+                    if not chunk:
+                        continue
+                    if offset == 0:
+                        # Validate by magic bytes: XLSX is a ZIP file, starts with b"PK"
+                        sniff = chunk[:256].lstrip()
+                        ct = (resp.headers.get("Content-Type") or "").lower()
+                        if ct.startswith("text/html") or sniff.startswith(b"<!doctype") or sniff.startswith(b"<html") or sniff.startswith(b"<"):
+                            raise DownloadBlockedError(
+                                f"Download blocked (likely requires login). Try setting {AUTH_COOKIE_ENV} or use --local-xlsx."
+                            )
+                        if not chunk.startswith(b"PK"):
+                            raise RuntimeError("Downloaded content does not look like an XLSX (missing ZIP magic bytes 'PK').")
+                    f.write(chunk)
+                    offset += len(chunk)
+            break
+        except requests.RequestException as e:
+            last_err = e
+            log.warning("Download interrupted at %d bytes (attempt %d/%d): %s", offset, attempt, DOWNLOAD_RESUME_ATTEMPTS, e)
+            _write_download_state(
+                outdir,
+                partial={
+                    "url": download_url,
+                    "out_path": out_path,
+                    "part_path": part_path,
+                    "etag": etag,
+                    "last_modified": last_modified,
+                },
+            )
+        finally:
+            resp.close()
+    else:
+        raise RuntimeError(f"Download failed after {DOWNLOAD_RESUME_ATTEMPTS} attempts: {download_url}") from last_err
 
-    if size <= 0:
+    if offset <= 0:
         raise RuntimeError("Download completed but file is empty.")
 
-    log.info("Downloaded to: %s", out_path)
-    return DownloadResult(final_url=final_url, path=out_path, size_bytes=size, sha256=hasher.hexdigest())
+    sha256 = _sha256_file(part_path)
+    os.replace(part_path, out_path)
+    unchanged = sha256 == state.get("sha256")
+    _write_download_state(
+        outdir,
+        download_url=download_url,
+        final_url=final_url,
+        path=out_path,
+        size_bytes=offset,
+        sha256=sha256,
+        etag=etag,
+        last_modified=last_modified,
+        partial=None,
+    )
+    log.info("Downloaded to: %s%s", out_path, " (content unchanged)" if unchanged else "")
+    return DownloadResult(final_url=final_url, path=out_path, size_bytes=offset, sha256=sha256, unchanged=unchanged)
 
 def _looks_like_html(payload: bytes) -> bool:
     sniff = payload[:512].lstrip().lower()
@@ -312,130 +467,227 @@ def _ensure_xlsx_bytes(payload: bytes) -> None:
     if not payload.startswith(b"PK"):
         raise RuntimeError("Downloaded content does not look like an XLSX (missing ZIP magic bytes 'PK').")
 
-def _download_via_playwright(download_url: str, outdir: str, *, headless: bool = True) -> DownloadResult:
-    """
-    Browser-automation download using Playwright (headless Chromium).
-    This is intended to bypass WAF/bot protection that blocks plain HTTP clients.
+def _record_playwright_download(
+    outdir: str, state: dict, download_url: str, final_url: str, out_path: str, *, etag=None, last_modified=None
+) -> DownloadResult:
+    size = os.path.getsize(out_path)
+    sha256 = _sha256_file(out_path)
+    unchanged = sha256 == state.get("sha256")
+    _write_download_state(
+        outdir,
+        download_url=download_url,
+        final_url=final_url,
+        path=out_path,
+        size_bytes=size,
+        sha256=sha256,
+        etag=etag,
+        last_modified=last_modified,
+        partial=None,
+    )
+    return DownloadResult(final_url=final_url, path=out_path, size_bytes=size, sha256=sha256, unchanged=unchanged)
+
+
+class PlaywrightDownloader:
     """
-    try:
-        from playwright.sync_api import sync_playwright  # type: ignore
-    except Exception as e:
-        raise MissingDependencyError(
-            "Missing dependency: playwright. Install with:\n"
-            "  pip install playwright\n"
-            "  playwright install chromium"
-        ) from e
+    Chromium context carrying the WGC auth cookie, reusable across downloads.
 
-    os.makedirs(outdir, exist_ok=True)
+    Used once per run by `_download_via_playwright`, or kept warm by the download worker
+    (`--serve`). Playwright's sync API is thread-bound: use an instance from the thread
+    that created it.
+    """
 
-    # Retry wrapper (3 attempts) because some runs may fail due to transient WAF/network.
-    last_err: Optional[BaseException] = None
-    for attempt in range(1, 4):
-        _sleep_rl()
+    def __init__(self, *, headless: bool = True, landing_url: str = LANDING_URL) -> None:
+        try:
+            from playwright.sync_api import sync_playwright  # type: ignore
+        except Exception as e:
+            raise MissingDependencyError(
+                "Missing dependency: playwright. Install with:\n"
+                "  pip install playwright\n"
+                "  playwright install chromium"
+            ) from e
+        self.landing_url = landing_url
+        self._pw = sync_playwright().start()
+        self._browser = None
+        self._context = None
+        self._cookie: Optional[str] = None
         try:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=headless)
-                context = browser.new_context(
-                    user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
-                    "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-                    accept_downloads=True,
+            self._browser = self._pw.chromium.launch(headless=headless)
+        except Exception:
+            self._pw.stop()
+            raise
+
+    def _ensure_context(self, auth_cookie: Optional[str]):
+        if self._context is not None and auth_cookie == self._cookie:
+            return self._context
+        self._reset_context()
+        context = self._browser.new_context(
+            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
+            accept_downloads=True,
+        )
+        if auth_cookie:
+            parsed = urlparse(self.landing_url)
+            try:
+                context.add_cookies(
+                    [
+                        {
+                            "name": AUTH_COOKIE_NAME,
+                            "value": auth_cookie,
+                            "domain": parsed.hostname or "www.gold.org",
+                            "path": "/",
+                            "httpOnly": True,
+                            "secure": parsed.scheme == "https",
+                            "sameSite": "Lax",
+                        }
+                    ]
                 )
-                auth_cookie = os.environ.get(AUTH_COOKIE_ENV)
-                if auth_cookie:
-                    try:
-                        context.add_cookies(
-                            [
-                                {
-                                    "name": AUTH_COOKIE_NAME,
-                                    "value": auth_cookie,
-                                    "domain": "www.gold.org",
-                                    "path": "/",
-                                    "httpOnly": True,
-                                    "secure": True,
-                                    "sameSite": "Lax",
-                                }
-                            ]
-                        )
-                    except Exception:
-                        pass
-                page = context.new_page()
-                page.goto(LANDING_URL, wait_until="domcontentloaded", timeout=60_000)
-                # Light attempt to accept cookie banners if present.
-                try:
-                    for label in ["Accept", "I agree", "Agree", "Accept all", "OK"]:
-                        btn = page.get_by_role("button", name=re.compile(rf"^{re.escape(label)}$", re.IGNORECASE))
-                        if btn.count() > 0:
-                            btn.first.click(timeout=1_500)
-                            break
-                except Exception:
-                    pass
+            except Exception:
+                pass
+        self._context = context
+        self._cookie = auth_cookie
+        return context
+
+    def _reset_context(self) -> None:
+        if self._context is not None:
+            try:
+                self._context.close()
+            except Exception:
+                pass
+        self._context = None
+        self._cookie = None
+
+    def close(self) -> None:
+        self._reset_context()
+        try:
+            if self._browser is not None:
+                self._browser.close()
+        finally:
+            self._pw.stop()
+
+    def __enter__(self) -> "PlaywrightDownloader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def download(self, download_url: str, outdir: str, *, state: Optional[dict] = None) -> DownloadResult:
+        """
+        Browser-automation download (bypasses WAF/bot protection that blocks plain HTTP
+        clients). The request-context fallback is conditional (HTTP 304 -> unchanged);
+        browser downloads are compared to the previous sha256.
+        """
+        os.makedirs(outdir, exist_ok=True)
+        state = _read_download_state(outdir) if state is None else state
+
+        # Retry wrapper (3 attempts) because some runs may fail due to transient WAF/network.
+        last_err: Optional[BaseException] = None
+        for attempt in range(1, 4):
+            try:
+                return self._download_once(download_url, outdir, state)
+            except Exception as e:
+                last_err = e
+                log.warning("Playwright download failed (attempt %d/3): %s", attempt, e)
+                # Start the next attempt from a clean context (cookies, WAF state).
+                self._reset_context()
+                if attempt < 3:
+                    time.sleep(0.6 * (2 ** (attempt - 1)))
+
+        raise RuntimeError("Playwright download failed after 3 attempts.") from last_err
+
+    def _download_once(self, download_url: str, outdir: str, state: dict) -> DownloadResult:
+        context = self._ensure_context(os.environ.get(AUTH_COOKIE_ENV))
+        page = context.new_page()
+        try:
+            page.goto(self.landing_url, wait_until="domcontentloaded", timeout=60_000)
+            # Light attempt to accept cookie banners if present.
+            try:
+                for label in ["Accept", "I agree", "Agree", "Accept all", "OK"]:
+                    btn = page.get_by_role("button", name=re.compile(rf"^{re.escape(label)}$", re.IGNORECASE))
+                    if btn.count() > 0:
+                        btn.first.click(timeout=1_500)
+                        break
+            except Exception:
+                pass
 
-                # Prefer "real user" click download; some WAFs block direct file endpoints.
+            # Prefer "real user" click download; some WAFs block direct file endpoints.
+            download_obj = None
+            try:
+                locator = page.get_by_role(
+                    "link",
+                    name=re.compile(r"download\\s+xlsx\\s+latest\\s+world\\s+official\\s+gold\\s+reserves", re.IGNORECASE),
+                )
+                if locator.count() > 0:
+                    with page.expect_download(timeout=60_000) as dl:
+                        locator.first.click()
+                    download_obj = dl.value
+            except Exception:
                 download_obj = None
-                try:
-                    locator = page.get_by_role(
-                        "link",
-                        name=re.compile(r"download\\s+xlsx\\s+latest\\s+world\\s+official\\s+gold\\s+reserves", re.IGNORECASE),
-                    )
-                    if locator.count() > 0:
-                        with page.expect_download(timeout=60_000) as dl:
-                            locator.first.click()
-                        download_obj = dl.value
-                except Exception:
-                    download_obj = None
-
-                if download_obj is not None:
-                    final_url = download_obj.url
-                    suggested = _sanitize_filename(download_obj.suggested_filename or "wgc_gold_reserves_latest.xlsx")
-                    out_path = os.path.join(outdir, suggested)
-                    download_obj.save_as(out_path)
-                    with open(out_path, "rb") as f:
-                        payload = f.read(4096)
-                    _ensure_xlsx_bytes(payload)
-                    size = os.path.getsize(out_path)
-                    with open(out_path, "rb") as f:
-                        sha256 = hashlib.sha256(f.read()).hexdigest()
-                    browser.close()
-                    return DownloadResult(final_url=final_url, path=out_path, size_bytes=size, sha256=sha256)
-
-                # Fallback: Use the browser's request context (shares cookies/session).
-                headers = {"Referer": LANDING_URL, "Accept": "*/*"}
-                resp = context.request.get(download_url, headers=headers, timeout=60_000)
-                status = resp.status
-                if status in {401, 403}:
-                    raise DownloadBlockedError(
-                        f"Download blocked (HTTP {status}). Try setting {AUTH_COOKIE_ENV} or use --local-xlsx."
-                    )
-                if _is_retryable_status(status):
-                    raise RuntimeError(f"Retryable HTTP {status} for {download_url}")
-                if status >= 400:
-                    raise RuntimeError(f"HTTP {status} for {download_url}")
 
-                payload = resp.body()
+            if download_obj is not None:
+                final_url = download_obj.url
+                suggested = _sanitize_filename(download_obj.suggested_filename or "wgc_gold_reserves_latest.xlsx")
+                out_path = os.path.join(outdir, suggested)
+                download_obj.save_as(out_path)
+                with open(out_path, "rb") as f:
+                    payload = f.read(4096)
                 _ensure_xlsx_bytes(payload)
+                return _record_playwright_download(outdir, state, download_url, final_url, out_path)
+        finally:
+            page.close()
+
+        # Fallback: Use the browser's request context (shares cookies/session).
+        headers = {"Referer": self.landing_url, "Accept": "*/*", **_conditional_headers(state, outdir)}
+        resp = context.request.get(download_url, headers=headers, timeout=60_000)
+        status = resp.status
+        if status == 304:
+            log.info("XLSX not modified since last download (HTTP 304).")
+            _write_download_state(outdir, download_url=download_url, partial=None)
+            return _unchanged_result(state, resp.url)
+        if status in {401, 403}:
+            raise DownloadBlockedError(
+                f"Download blocked (HTTP {status}). Try setting {AUTH_COOKIE_ENV} or use --local-xlsx."
+            )
+        if _is_retryable_status(status):
+            raise RuntimeError(f"Retryable HTTP {status} for {download_url}")
+        if status >= 400:
+            raise RuntimeError(f"HTTP {status} for {download_url}")
+
+        payload = resp.body()
+        _ensure_xlsx_bytes(payload)
+
+        final_url = resp.url
+        cd = resp.headers.get("content-disposition") or resp.headers.get("Content-Disposition") or ""
+        parsed = urlparse(final_url)
+        fallback = os.path.basename(parsed.path) or "wgc_gold_reserves_latest.xlsx"
+        class _Hdr:
+            headers = {"Content-Disposition": cd}
+        filename = _sanitize_filename(_filename_from_response(_Hdr(), fallback))  # type: ignore[arg-type]
+        out_path = os.path.join(outdir, filename)
+        with open(out_path, "wb") as f:
+            f.write(payload)
+
+        return _record_playwright_download(
+            outdir,
+            state,
+            download_url,
+            final_url,
+            out_path,
+            etag=resp.headers.get("etag"),
+            last_modified=resp.headers.get("last-modified"),
+        )
 
-                final_url = resp.url
-                cd = resp.headers.get("content-disposition") or resp.headers.get("Content-Disposition") or ""
-                parsed = urlparse(final_url)
-                fallback = os.path.basename(parsed.path) or "wgc_gold_reserves_latest.xlsx"
-                class _Hdr:
-                    headers = {"Content-Disposition": cd}
-                filename = _sanitize_filename(_filename_from_response(_Hdr(), fallback))  # type: ignore[arg-type]
-                out_path = os.path.join(outdir, filename)
-                with open(out_path, "wb") as f:
-                    f.write(payload)
-                sha256 = hashlib.sha256(payload).hexdigest()
-                size = len(payload)
-                browser.close()
-
-                return DownloadResult(final_url=final_url, path=out_path, size_bytes=size, sha256=sha256)
-        except Exception as e:
-            last_err = e
-            log.warning("Playwright download failed (attempt %d/3): %s", attempt, e)
-            if attempt < 3:
-                time.sleep(0.6 * (2 ** (attempt - 1)))
 
-    raise RuntimeError("Playwright download failed after 3 attempts.") from last_err
+def _download_via_playwright(
+    download_url: str,
+    outdir: str,
+    *,
+    headless: bool = True,
+    state: Optional[dict] = None,
+    landing_url: str = LANDING_URL,
+) -> DownloadResult:
+    """One-shot Playwright download (fresh browser, closed afterwards)."""
+    with PlaywrightDownloader(headless=headless, landing_url=landing_url) as downloader:
+        return downloader.download(download_url, outdir, state=state)
 
 
 def _normalize_columns(cols: Iterable[str]) -> list[str]:
@@ -486,47 +738,49 @@ def _infer_holdings_as_of_from_preview(preview: pd.DataFrame) -> Optional[str]:
     return None
 
 
-def _find_header_row(preview: pd.DataFrame) -> Optional[int]:
-    # Find a row that likely contains headers: "country" and "tonnes" etc.
-    keysets = [
-        {"country", "tonnes"},
-        {"country", "tonne"},
-        {"country", "gold"},
-        {"country", "holdings"},
-    ]
-    for i in range(min(30, len(preview))):
-        row = preview.iloc[i].fillna("").astype(str).str.lower().tolist()
-        row_text = " ".join(row)
-        tokens = set(re.findall(r"[a-z]{3,}", row_text))
-        for ks in keysets:
-            if ks.issubset(tokens):
-                return i
-        if "country" in tokens and ("tonnes" in tokens or "tonne" in tokens or "holdings" in tokens):
-            return i
-    return None
+_HEADER_KEYSETS = [
+    {"country", "tonnes"},
+    {"country", "tonne"},
+    {"country", "gold"},
+    {"country", "holdings"},
+]
+HEADER_SCAN_ROWS = 30
+PDF_HEADER_SCAN_ROWS = 40
+
+
+def _cell_text(v) -> str:
+    if v is None or (isinstance(v, float) and pd.isna(v)):
+        return ""
+    return str(v)
+
 
+def _is_header_row(values: Iterable) -> bool:
+    # A row that likely contains headers: "country" and "tonnes" etc.
+    row_text = " ".join(_cell_text(v).lower() for v in values)
+    tokens = set(re.findall(r"[a-z]{3,}", row_text))
+    for ks in _HEADER_KEYSETS:
+        if ks.issubset(tokens):
+            return True
+    return "country" in tokens and ("tonnes" in tokens or "tonne" in tokens or "holdings" in tokens)
 
-def _parse_pdf_style_sheet(xl: pd.ExcelFile, sheet_name: str) -> pd.DataFrame:
+
+def _pdf_header_tonnes_cols(values: Iterable) -> list[int]:
+    """Tonnes column indexes if `values` is the header of the side-by-side 'PDF' layout."""
+    row_l = [_cell_text(v).strip().lower() for v in values]
+    joined = " ".join(row_l)
+    if "tonnes" in joined and "holdings as of" in joined and ("% of reserves" in joined or "of reserves" in joined):
+        return [j for j, v in enumerate(row_l) if v == "tonnes"]
+    return []
+
+
+def _parse_pdf_style_sheet(raw: pd.DataFrame, header_row: int, tonnes_cols: list[int]) -> pd.DataFrame:
     """
     Some WGC downloads appear as a single sheet named 'PDF' with two side-by-side tables:
       [rank, country, tonnes, % of reserves, holdings as of] + same repeated to the right.
+    `raw` is the whole sheet (no header); the header row was detected while scanning it.
     """
-    raw = pd.read_excel(xl, sheet_name=sheet_name, header=None, engine="openpyxl")
     if raw is None or raw.empty:
         raise RuntimeError("Empty sheet")
-
-    header_row = None
-    tonnes_cols: list[int] = []
-
-    for i in range(min(40, len(raw))):
-        row = raw.iloc[i].fillna("").astype(str).str.strip().tolist()
-        row_l = [str(x).lower() for x in row]
-        joined = " ".join(row_l)
-        if "tonnes" in joined and "holdings as of" in joined and ("% of reserves" in joined or "of reserves" in joined):
-            header_row = i
-            tonnes_cols = [j for j, v in enumerate(row_l) if v.strip() == "tonnes"]
-            break
-
     if header_row is None or not tonnes_cols:
         raise RuntimeError("Could not detect PDF-style header row")
 
@@ -610,25 +864,77 @@ def _parse_pdf_style_sheet(xl: pd.ExcelFile, sheet_name: str) -> pd.DataFrame:
     out["source"] = "WGC"
     out["retrieved_at_utc"] = utc_now_iso()
 
-    out = out[
-        [
-            "country_name",
-            "tonnes",
-            "pct_of_reserves",
-            "value_usd",
-            "holdings_as_of",
-            "source",
-            "retrieved_at_utc",
-        ]
-    ].reset_index(drop=True)
+    out = out[OUTPUT_COLUMNS].reset_index(drop=True)
 
     return out
 
 
+@dataclass
+class SheetScan:
+    name: str
+    rows: list[tuple]
+    header_row: Optional[int]
+    pdf_header_row: Optional[int]
+    pdf_tonnes_cols: list[int]
+
+
+def _scan_sheet(ws) -> SheetScan:
+    """
+    One streaming pass over a read-only worksheet: collect row values and detect both
+    header layouts on the fly (no separate preview read).
+    """
+    if hasattr(ws, "reset_dimensions"):
+        # Some exporters write a wrong <dimension>; let openpyxl discover the extent.
+        ws.reset_dimensions()
+    rows: list[tuple] = []
+    header_row: Optional[int] = None
+    pdf_header_row: Optional[int] = None
+    pdf_tonnes_cols: list[int] = []
+    for i, values in enumerate(ws.iter_rows(values_only=True)):
+        rows.append(values)
+        if header_row is None and i < HEADER_SCAN_ROWS and _is_header_row(values):
+            header_row = i
+        if pdf_header_row is None and i < PDF_HEADER_SCAN_ROWS:
+            cols = _pdf_header_tonnes_cols(values)
+            if cols:
+                pdf_header_row, pdf_tonnes_cols = i, cols
+    # Drop trailing empty rows (pandas does the same when reading a sheet).
+    while rows and all(v is None for v in rows[-1]):
+        rows.pop()
+    return SheetScan(ws.title, rows, header_row, pdf_header_row, pdf_tonnes_cols)
+
+
+def _header_names(values: Iterable) -> list[str]:
+    # Mirror pandas: blank headers become "Unnamed: i", duplicates get ".1", ".2"...
+    names: list[str] = []
+    seen: dict[str, int] = {}
+    for j, v in enumerate(values):
+        name = _cell_text(v).strip() or f"Unnamed: {j}"
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _sheet_frame(scan: SheetScan) -> pd.DataFrame:
+    """Table below the detected header (first row when none was found)."""
+    header_idx = scan.header_row if scan.header_row is not None else 0
+    if len(scan.rows) <= header_idx:
+        return pd.DataFrame()
+    header = scan.rows[header_idx]
+    body = [r for r in scan.rows[header_idx + 1 :] if any(v is not None for v in r)]
+    width = max([len(header), *(len(r) for r in body)])
+    header = tuple(header) + (None,) * (width - len(header))
+    return pd.DataFrame(body, columns=_header_names(header))
+
+
 def parse_xlsx(xlsx_path: str) -> pd.DataFrame:
     log.info("Parsing XLSX: %s", xlsx_path)
     try:
-        xl = pd.ExcelFile(xlsx_path, engine="openpyxl")
+        from openpyxl import load_workbook  # type: ignore
     except ImportError as e:
         raise RuntimeError("Missing dependency: openpyxl. Install with: pip install openpyxl") from e
 
@@ -636,54 +942,56 @@ def parse_xlsx(xlsx_path: str) -> pd.DataFrame:
     best_score = -1
     best_as_of: Optional[str] = None
 
-    for sheet in xl.sheet_names:
-        # Special case: WGC "PDF" sheet layout (two side-by-side tables).
-        if str(sheet).strip().lower() == "pdf":
+    wb = load_workbook(xlsx_path, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
             try:
-                return _parse_pdf_style_sheet(xl, sheet)
+                scan = _scan_sheet(ws)
             except Exception:
-                pass
+                continue
 
-        try:
-            preview = pd.read_excel(xl, sheet_name=sheet, header=None, nrows=30, engine="openpyxl")
-        except Exception:
-            continue
+            # Special case: WGC "PDF" sheet layout (two side-by-side tables).
+            if str(scan.name).strip().lower() == "pdf":
+                try:
+                    return _parse_pdf_style_sheet(
+                        pd.DataFrame(scan.rows), scan.pdf_header_row, scan.pdf_tonnes_cols
+                    )
+                except Exception:
+                    pass
 
-        header_row = _find_header_row(preview)
-        as_of = _infer_holdings_as_of_from_preview(preview)
+            as_of = _infer_holdings_as_of_from_preview(pd.DataFrame(scan.rows[:HEADER_SCAN_ROWS]))
 
-        try:
-            if header_row is not None:
-                df = pd.read_excel(xl, sheet_name=sheet, header=header_row, engine="openpyxl")
-            else:
-                df = pd.read_excel(xl, sheet_name=sheet, engine="openpyxl")
-        except Exception:
-            continue
+            try:
+                df = _sheet_frame(scan)
+            except Exception:
+                continue
 
-        if df is None or df.empty:
-            continue
+            if df is None or df.empty:
+                continue
 
-        df.columns = _normalize_columns(df.columns)
-        cols = set(df.columns)
+            df.columns = _normalize_columns(df.columns)
+            cols = set(df.columns)
 
-        def has_any(*names: str) -> bool:
-            return any(n in cols for n in names)
+            def has_any(*names: str) -> bool:
+                return any(n in cols for n in names)
 
-        # Score sheet by presence of key columns
-        score = 0
-        if has_any("country", "country_name", "economy", "economy_name"):
-            score += 3
-        if any("tonne" in c for c in cols):
-            score += 3
-        if any("pct" in c and "reserve" in c for c in cols) or any("percent" in c and "reserve" in c for c in cols):
-            score += 1
-        if any("usd" in c or ("value" in c and "usd" in c) for c in cols):
-            score += 1
+            # Score sheet by presence of key columns
+            score = 0
+            if has_any("country", "country_name", "economy", "economy_name"):
+                score += 3
+            if any("tonne" in c for c in cols):
+                score += 3
+            if any("pct" in c and "reserve" in c for c in cols) or any("percent" in c and "reserve" in c for c in cols):
+                score += 1
+            if any("usd" in c or ("value" in c and "usd" in c) for c in cols):
+                score += 1
 
-        if score > best_score:
-            best_score = score
-            best_df = df
-            best_as_of = as_of
+            if score > best_score:
+                best_score = score
+                best_df = df
+                best_as_of = as_of
+    finally:
+        wb.close()
 
     if best_df is None or best_df.empty:
         raise RuntimeError("Could not find a usable sheet in the XLSX.")
@@ -719,7 +1027,7 @@ def parse_xlsx(xlsx_path: str) -> pd.DataFrame:
     else:
         out["holdings_as_of"] = best_as_of
 
-    out["country_name"] = out["country_name"].astype(str).str.strip()
+    out["country_name"] = out["country_name"].map(_cell_text).str.strip()
     out = out[out["country_name"].notna() & (out["country_name"] != "")].copy()
 
     out["tonnes"] = _clean_numeric_series(out["tonnes"])
@@ -752,24 +1060,64 @@ def parse_xlsx(xlsx_path: str) -> pd.DataFrame:
     out = out[~out["country_name"].str.lower().str.contains(r"^total$", na=False)]
 
     # Ensure column order
-    out = out[
-        [
-            "country_name",
-            "tonnes",
-            "pct_of_reserves",
-            "value_usd",
-            "holdings_as_of",
-            "source",
-            "retrieved_at_utc",
-        ]
-    ]
+    out = out[OUTPUT_COLUMNS]
 
     return out.reset_index(drop=True)
 
 
+def _sha256_file(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _read_parse_cache(cache_path: str) -> Optional[dict]:
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else None
+    except (OSError, ValueError):
+        return None
+
+
+def _write_parse_cache(cache_path: str, sha256: str, df: pd.DataFrame) -> None:
+    rows = df.drop(columns=["retrieved_at_utc"]).astype(object)
+    rows = rows.where(rows.notna(), None).to_dict("records")
+    payload = {"sha256": sha256, "parser_version": PARSER_VERSION, "rows": rows}
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+
+
+def parse_xlsx_cached(xlsx_path: str, cache_path: str, *, sha256: Optional[str] = None) -> pd.DataFrame:
+    """
+    `parse_xlsx`, skipped when the XLSX content hash matches the last parse stored in
+    `cache_path` (normalized rows are reused; only `retrieved_at_utc` is refreshed).
+    """
+    digest = sha256 or _sha256_file(xlsx_path)
+    cached = _read_parse_cache(cache_path)
+    if cached and cached.get("sha256") == digest and cached.get("parser_version") == PARSER_VERSION:
+        log.info("XLSX unchanged (sha256 %s); reusing cached parse", digest[:12])
+        df = pd.DataFrame(cached.get("rows") or [], columns=[c for c in OUTPUT_COLUMNS if c != "retrieved_at_utc"])
+        for col in ("tonnes", "pct_of_reserves", "value_usd"):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        df["retrieved_at_utc"] = utc_now_iso()
+        return df[OUTPUT_COLUMNS]
+
+    df = parse_xlsx(xlsx_path)
+    try:
+        _write_parse_cache(cache_path, digest, df)
+    except Exception as e:
+        log.warning("Could not write parse cache: %s", e)
+    return df
+
+
 def export_outputs(df: pd.DataFrame, outdir: str, *, write_parquet: bool = True) -> tuple[str, Optional[str]]:
     os.makedirs(outdir, exist_ok=True)
-    csv_path = os.path.join(outdir, "wgc_gold_reserves_latest.csv")
+    csv_path = os.path.join(outdir, LATEST_CSV_FILENAME)
     parquet_path = os.path.join(outdir, "wgc_gold_reserves_latest.parquet") if write_parquet else None
 
     log.info("Writing CSV: %s", csv_path)
@@ -797,80 +1145,364 @@ def _print_top10(df: pd.DataFrame) -> None:
         log.info("  %2d) %-30s %s", i, getattr(row, "country_name"), getattr(row, "tonnes"))
 
 
-def main(argv: list[str]) -> int:
-    ap = argparse.ArgumentParser(description="Download and parse WGC gold reserves XLSX.")
-    ap.add_argument("--outdir", default=DEFAULT_OUTDIR, help=f"Output directory (default: {DEFAULT_OUTDIR})")
-    ap.add_argument("--keep-raw", default=True, action=argparse.BooleanOptionalAction, help="Keep downloaded XLSX (default: true)")
-    ap.add_argument("--local-xlsx", default=None, help="Use local XLSX path instead of downloading")
-    ap.add_argument("--no-parquet", action="store_true", help="Disable parquet output")
-    ap.add_argument(
-        "--mode",
-        choices=["requests", "playwright"],
-        default="requests",
-        help="Download mode: requests (default) or playwright (browser automation).",
-    )
-    ap.add_argument(
-        "--headful",
-        action="store_true",
-        help="Run Playwright in headed mode (debug). Default is headless.",
-    )
-    args = ap.parse_args(argv)
-
-    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+def refresh(
+    outdir: str,
+    *,
+    mode: str = "requests",
+    headless: bool = True,
+    local_xlsx: Optional[str] = None,
+    keep_raw: bool = True,
+    write_parquet: bool = True,
+    parse_cache: bool = True,
+    landing_url: str = LANDING_URL,
+    session: Optional[requests.Session] = None,
+    browser: Optional[PlaywrightDownloader] = None,
+) -> dict:
+    """
+    Download (conditionally), parse and export the WGC snapshot into `outdir`.
 
-    outdir = args.outdir
+    `session`/`browser` let a long-lived caller (the `--serve` worker) reuse a warm HTTP
+    session and Chromium context. Returns a summary dict (JSON-serializable).
+    """
     os.makedirs(outdir, exist_ok=True)
 
-    session = requests.Session()
-    session.headers.update({"Accept-Language": "en-US,en;q=0.9"})
+    if session is None:
+        session = requests.Session()
+        session.headers.update({"Accept-Language": "en-US,en;q=0.9"})
 
     xlsx_path: Optional[str] = None
     dl_info: Optional[DownloadResult] = None
 
-    if args.local_xlsx:
-        xlsx_path = args.local_xlsx
+    if local_xlsx:
+        xlsx_path = local_xlsx
         if not os.path.exists(xlsx_path):
-            log.error("Local XLSX not found: %s", xlsx_path)
-            return 2
+            raise FileNotFoundError(f"Local XLSX not found: {xlsx_path}")
         log.info("Using local XLSX: %s", xlsx_path)
         try:
             log.info("File size: %s bytes", os.path.getsize(xlsx_path))
         except Exception:
             pass
     else:
-        html = fetch_html(session, LANDING_URL)
-        download_url = extract_download_url(LANDING_URL, html)
-        if args.mode == "playwright":
-            dl_info = _download_via_playwright(download_url, outdir, headless=not args.headful)
-        else:
-            dl_info = download_file(session, download_url, outdir)
+        state = _read_download_state(outdir)
+        if state.get("download_url"):
+            # Known file URL: a single conditional GET, no landing page round trip.
+            try:
+                dl_info = download_file(session, state["download_url"], outdir, state=state)
+            except DownloadBlockedError:
+                if mode != "playwright":
+                    raise
+                log.info("Direct download blocked; falling back to Playwright.")
+            except Exception as e:
+                log.warning("Stored download URL failed (%s); re-discovering from landing page.", e)
+        if dl_info is None:
+            html = fetch_html(session, landing_url)
+            download_url = extract_download_url(landing_url, html)
+            if mode == "playwright" and browser is not None:
+                dl_info = browser.download(download_url, outdir, state=state)
+            elif mode == "playwright":
+                dl_info = _download_via_playwright(
+                    download_url, outdir, headless=headless, state=state, landing_url=landing_url
+                )
+            else:
+                dl_info = download_file(session, download_url, outdir, state=state)
+
+        if dl_info.unchanged and os.path.exists(os.path.join(outdir, LATEST_CSV_FILENAME)):
+            log.info("WGC file unchanged since last run; outputs are up to date.")
+            if not keep_raw and dl_info.path and os.path.exists(dl_info.path):
+                os.remove(dl_info.path)
+            return {"status": "unchanged", "sha256": dl_info.sha256, "csv_path": os.path.join(outdir, LATEST_CSV_FILENAME)}
         xlsx_path = dl_info.path
 
         log.info("Final download URL: %s", dl_info.final_url)
         log.info("File size: %s bytes", dl_info.size_bytes)
         log.info("SHA256: %s", dl_info.sha256)
 
-        if not args.keep_raw:
-            # We'll delete after parsing.
-            pass
-
-    df = parse_xlsx(xlsx_path)
+    if parse_cache:
+        df = parse_xlsx_cached(
+            xlsx_path,
+            os.path.join(outdir, PARSE_CACHE_FILENAME),
+            sha256=dl_info.sha256 if dl_info else None,
+        )
+    else:
+        df = parse_xlsx(xlsx_path)
     log.info("Parsed rows: %d", len(df))
     _print_top10(df)
 
-    csv_path, parquet_path = export_outputs(df, outdir, write_parquet=not args.no_parquet)
+    csv_path, parquet_path = export_outputs(df, outdir, write_parquet=write_parquet)
 
     log.info("Wrote CSV: %s", csv_path)
     if parquet_path:
         log.info("Wrote Parquet: %s", parquet_path)
 
-    if dl_info and (not args.keep_raw):
+    if dl_info and (not keep_raw):
         try:
             os.remove(dl_info.path)
             log.info("Deleted raw XLSX (keep-raw disabled): %s", dl_info.path)
         except Exception as e:
             log.warning("Could not delete raw XLSX: %s", e)
 
+    return {
+        "status": "updated",
+        "rows": len(df),
+        "sha256": dl_info.sha256 if dl_info else None,
+        "csv_path": csv_path,
+        "parquet_path": parquet_path,
+    }
+
+
+# --- Download worker -------------------------------------------------------------------
+# A long-lived process (`--serve HOST:PORT`) that keeps the interpreter, pandas/openpyxl,
+# an HTTP session and (in playwright mode) a Chromium context warm, and runs refresh jobs
+# sent over a local multiprocessing.connection socket, one at a time.
+# multiprocessing.connection exchanges pickles, so the shared key is what stands between a
+# client and code execution in the worker: it must be set explicitly and be long.
+WORKER_AUTHKEY_ENV = "WGC_WORKER_AUTHKEY"
+WORKER_AUTHKEY_MIN_LENGTH = 32
+# Job options a client may set. Paths (outdir, local XLSX) are pinned by the worker's own
+# arguments so clients cannot choose what the worker reads or writes.
+_WORKER_JOB_OPTIONS = {"keep_raw", "write_parquet", "parse_cache"}
+
+
+def _parse_address(value: str) -> tuple[str, int]:
+    host, _, port = (value or "").rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def _worker_authkey() -> bytes:
+    """Shared worker key from the environment; raises ValueError if unset or too short."""
+    key = (os.environ.get(WORKER_AUTHKEY_ENV) or "").strip()
+    if len(key) < WORKER_AUTHKEY_MIN_LENGTH:
+        raise ValueError(
+            f"{WORKER_AUTHKEY_ENV} must be set to a random key of at least {WORKER_AUTHKEY_MIN_LENGTH} characters "
+            '(e.g. python -c "import secrets; print(secrets.token_hex(32))")'
+        )
+    return key.encode("utf-8")
+
+
+class _ConnectionLogHandler(logging.Handler):
+    """Forward this job's log records to the client as they happen."""
+
+    def __init__(self, conn) -> None:
+        super().__init__(level=logging.INFO)
+        self._conn = conn
+        self.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self._conn.send({"type": "log", "line": self.format(record)})
+        except Exception:
+            pass
+
+
+def _worker_job_error(job) -> Optional[str]:
+    """Why `job` is not a valid worker request, or None."""
+    if not isinstance(job, dict):
+        return f"Job must be a dict, got {type(job).__name__}"
+    cookie = job.get("auth_cookie")
+    if cookie is not None and not isinstance(cookie, str):
+        return "auth_cookie must be a string"
+    return None
+
+
+def serve_worker(
+    address: tuple[str, int],
+    *,
+    outdir: str = DEFAULT_OUTDIR,
+    mode: str = "playwright",
+    headless: bool = True,
+    landing_url: str = LANDING_URL,
+    max_jobs: Optional[int] = None,
+) -> None:
+    from multiprocessing.connection import Listener
+
+    authkey = _worker_authkey()
+    outdir = os.path.abspath(outdir)
+    session = requests.Session()
+    session.headers.update({"Accept-Language": "en-US,en;q=0.9"})
+    browser: Optional[PlaywrightDownloader] = None
+    jobs = 0
+    if log.getEffectiveLevel() > logging.INFO:
+        # Job progress is forwarded to clients at INFO.
+        log.setLevel(logging.INFO)
+    try:
+        with Listener(address, authkey=authkey) as listener:
+            log.info(
+                "WGC download worker listening on %s:%d (mode=%s, outdir=%s)",
+                address[0], listener.address[1], mode, outdir,
+            )
+            while max_jobs is None or jobs < max_jobs:
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    log.warning("Rejected worker connection: %s", e)
+                    continue
+                with conn:
+                    try:
+                        job = conn.recv()
+                    except EOFError:
+                        continue
+                    except Exception as e:
+                        # e.g. a pickle referencing a class this process cannot import
+                        job, error = None, f"Unreadable job: {e}"
+                    else:
+                        error = _worker_job_error(job)
+                    if error:
+                        log.warning("Rejected worker job: %s", error)
+                        try:
+                            conn.send({"type": "result", "ok": False, "error": error, "blocked": False})
+                        except Exception:
+                            pass
+                        continue
+                    if job.get("op") == "shutdown":
+                        conn.send({"type": "result", "ok": True, "result": {"status": "shutdown"}})
+                        break
+                    jobs += 1
+                    # Auth cookie may rotate between jobs; a new value gets a new context.
+                    if job.get("auth_cookie"):
+                        os.environ[AUTH_COOKIE_ENV] = job["auth_cookie"]
+                    handler = _ConnectionLogHandler(conn)
+                    log.addHandler(handler)
+                    try:
+                        if mode == "playwright" and browser is None:
+                            browser = PlaywrightDownloader(headless=headless, landing_url=landing_url)
+                        options = {k: v for k, v in job.items() if k in _WORKER_JOB_OPTIONS}
+                        result = refresh(
+                            outdir,
+                            mode=mode,
+                            headless=headless,
+                            landing_url=landing_url,
+                            session=session,
+                            browser=browser,
+                            **options,
+                        )
+                        reply = {"type": "result", "ok": True, "result": result}
+                    except Exception as e:
+                        log.error("Worker job failed: %s", e)
+                        reply = {
+                            "type": "result",
+                            "ok": False,
+                            "error": str(e),
+                            "blocked": isinstance(e, DownloadBlockedError),
+                        }
+                    finally:
+                        log.removeHandler(handler)
+                    try:
+                        conn.send(reply)
+                    except Exception:
+                        pass
+    finally:
+        if browser is not None:
+            browser.close()
+
+
+def submit_worker_job(address: tuple[str, int], job: dict, *, on_log=None) -> dict:
+    """
+    Run a refresh on the worker at `address` and return its summary dict (the worker
+    writes to its own --outdir). Raises ValueError if the auth key is not configured,
+    ConnectionError if no worker is listening, DownloadBlockedError/RuntimeError if the
+    job failed.
+    """
+    from multiprocessing.connection import Client
+
+    authkey = _worker_authkey()
+    with Client(address, authkey=authkey) as conn:
+        conn.send(job)
+        while True:
+            msg = conn.recv()
+            if msg.get("type") == "log":
+                if on_log is not None:
+                    on_log(msg.get("line") or "")
+                continue
+            if msg.get("ok"):
+                return msg.get("result") or {}
+            err = msg.get("error") or "WGC worker job failed"
+            raise DownloadBlockedError(err) if msg.get("blocked") else RuntimeError(err)
+
+
+def main(argv: list[str]) -> int:
+    ap = argparse.ArgumentParser(description="Download and parse WGC gold reserves XLSX.")
+    ap.add_argument("--outdir", default=DEFAULT_OUTDIR, help=f"Output directory (default: {DEFAULT_OUTDIR})")
+    ap.add_argument("--keep-raw", default=True, action=argparse.BooleanOptionalAction, help="Keep downloaded XLSX (default: true)")
+    ap.add_argument("--local-xlsx", default=None, help="Use local XLSX path instead of downloading")
+    ap.add_argument("--no-parquet", action="store_true", help="Disable parquet output")
+    ap.add_argument(
+        "--no-parse-cache",
+        action="store_true",
+        help=f"Always re-parse the XLSX (ignore {PARSE_CACHE_FILENAME} in --outdir)",
+    )
+    ap.add_argument(
+        "--mode",
+        choices=["requests", "playwright"],
+        default="requests",
+        help="Download mode: requests (default) or playwright (browser automation).",
+    )
+    ap.add_argument(
+        "--headful",
+        action="store_true",
+        help="Run Playwright in headed mode (debug). Default is headless.",
+    )
+    ap.add_argument("--landing-url", default=LANDING_URL, help="Landing page to discover the XLSX link from")
+    ap.add_argument(
+        "--serve",
+        metavar="HOST:PORT",
+        default=None,
+        help=(
+            f"Run as a long-lived download worker on HOST:PORT, writing to --outdir "
+            f"(requires env {WORKER_AUTHKEY_ENV}, at least {WORKER_AUTHKEY_MIN_LENGTH} characters)"
+        ),
+    )
+    ap.add_argument(
+        "--worker",
+        metavar="HOST:PORT",
+        default=None,
+        help="Send this refresh to a running --serve worker (falls back to running locally if none is listening)",
+    )
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    if args.serve:
+        try:
+            serve_worker(
+                _parse_address(args.serve),
+                outdir=args.outdir,
+                mode=args.mode,
+                headless=not args.headful,
+                landing_url=args.landing_url,
+            )
+        except ValueError as e:
+            log.error(str(e))
+            return 2
+        return 0
+
+    options = {
+        "outdir": os.path.abspath(args.outdir),
+        "local_xlsx": os.path.abspath(args.local_xlsx) if args.local_xlsx else None,
+        "keep_raw": args.keep_raw,
+        "write_parquet": not args.no_parquet,
+        "parse_cache": not args.no_parse_cache,
+    }
+    if args.worker and args.local_xlsx:
+        log.warning("--local-xlsx is not sent to workers; running locally.")
+    elif args.worker:
+        job = {k: v for k, v in options.items() if k in _WORKER_JOB_OPTIONS}
+        if os.environ.get(AUTH_COOKIE_ENV):
+            job["auth_cookie"] = os.environ[AUTH_COOKIE_ENV]
+        try:
+            result = submit_worker_job(_parse_address(args.worker), job, on_log=print)
+            log.info("Worker result: %s", result)
+            return 0
+        except ValueError as e:
+            log.error(str(e))
+            return 2
+        except ConnectionError as e:
+            log.warning("No WGC worker at %s (%s); running locally.", args.worker, e)
+
+    try:
+        refresh(mode=args.mode, headless=not args.headful, landing_url=args.landing_url, **options)
+    except FileNotFoundError as e:
+        log.error(str(e))
+        return 2
     return 0
 
 
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: MSN Money redux-data extraction
+
+Compares the old path (BeautifulSoup html.parser tree + json) with the byte
+scanner in international_metals_pkg.core (extract_redux_payload +
+decode_redux_payload, orjson when installed) on saved landing pages.
+
+Requires beautifulsoup4 (pip install .[bench]).
+
+Usage:
+    python benchmarks/bench_msn_redux.py                       # tests/fixtures/*.html
+    python benchmarks/bench_msn_redux.py saved_page.html --repeat 20
+    python benchmarks/bench_msn_redux.py --scale 50            # pad markup to real-page size
+
+Save a live page with:
+    curl -A "Mozilla/5.0" "https://www.msn.com/en-us/money?ocid=msn" -o msn.html
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from international_metals_pkg.core import decode_redux_payload, extract_redux_payload, orjson  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "fixtures", "*.html")
+
+
+def soup_extract(html: bytes):
+    """Previous implementation"""
+    soup = BeautifulSoup(html.decode("utf-8"), "html.parser")
+    script = soup.find("script", {"id": "redux-data"})
+    return json.loads(script.string)
+
+
+def scan_extract_stdlib(html: bytes):
+    return json.loads(extract_redux_payload(html))
+
+
+def scan_extract(html: bytes):
+    return decode_redux_payload(extract_redux_payload(html))
+
+
+def scaled(html: bytes, scale: int) -> bytes:
+    """Repeat the markup in front of the redux-data script `scale` times"""
+    if scale <= 1:
+        return html
+    cut = html.lower().find(b'<script type="application/json" id="redux-data"')
+    if cut == -1:
+        cut = html.find(b"redux-data")
+        cut = html.rfind(b"<", 0, cut)
+    return html[:cut] * scale + html[cut:]
+
+
+def best_ms(fn, html: bytes, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(html)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark MSN redux-data extraction")
+    ap.add_argument("files", nargs="*", help=f"Saved MSN HTML pages (default: {FIXTURES})")
+    ap.add_argument("--repeat", type=int, default=10)
+    ap.add_argument("--scale", type=int, default=1, help="Repeat non-redux markup N times")
+    args = ap.parse_args()
+
+    files = args.files or sorted(glob.glob(FIXTURES))
+    if not files:
+        ap.error("no HTML fixtures found")
+
+    print(f"JSON decoder: {'orjson ' + orjson.__version__ if orjson else 'stdlib json (pip install orjson for the fast path)'}")
+    for path in files:
+        with open(path, "rb") as f:
+            html = scaled(f.read(), args.scale)
+
+        expected = soup_extract(html)
+        assert scan_extract(html) == expected, f"{path}: byte scan result differs from BeautifulSoup"
+        payload = extract_redux_payload(html)
+
+        t_soup = best_ms(soup_extract, html, args.repeat)
+        t_scan_std = best_ms(scan_extract_stdlib, html, args.repeat)
+        t_scan = best_ms(scan_extract, html, args.repeat)
+        print(f"\n{os.path.basename(path)}: page {len(html) / 1024:,.0f} KiB, redux-data {len(payload) / 1024:,.0f} KiB")
+        print(f"  BeautifulSoup + json      {t_soup:9.2f} ms")
+        print(f"  byte scan + json          {t_scan_std:9.2f} ms   x{t_soup / t_scan_std:.1f}")
+        print(f"  byte scan + fast decoder  {t_scan:9.2f} ms   x{t_soup / t_scan:.1f}")
+
+
+if __name__ == "__main__":
+    main()
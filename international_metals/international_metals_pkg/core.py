@@ -4,19 +4,131 @@ Core module for fetching precious metals prices
 
 import requests
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import time
 import logging
-from bs4 import BeautifulSoup
+import re
 import json as json_module
 import uuid
 import csv
 import io
 
+try:
+    import orjson  # Optional: faster decoding of the MSN redux-data blob
+except ImportError:
+    orjson = None
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Fields identifying a quote in the MSN redux state
+MSN_QUOTE_KEY = ("displayName", "currency", "securityType", "exchangeName")
+QuoteKey = Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]
+
+
+def _key_part(value) -> Optional[str]:
+    # Key fields are normally strings; nested objects (e.g. {"code": "USD"}) must not break hashing
+    return value if value is None or isinstance(value, str) else str(value)
+
+
+# id="redux-data" as a whole attribute: not data-id=..., not id=redux-data-x
+_REDUX_ID_RE = re.compile(rb"""(?<=[\s"'/])(?i:id)\s*=\s*(?:"redux-data"|'redux-data'|redux-data(?=[\s>]))""")
+_SCRIPT_CLOSE_RE = re.compile(rb"</script", re.IGNORECASE)
+
+
+def extract_redux_payload(html) -> Optional[bytes]:
+    """
+    Raw JSON text of `<script id="redux-data">`, located by byte scanning.
+
+    Avoids building a DOM for the whole landing page: find the id marker,
+    check that it sits in a <script> open tag, and slice up to the next
+    </script> (script content is raw text, so no entity decoding is needed).
+
+    Args:
+        html: Page as bytes (preferred, e.g. response.content) or str
+    """
+    data = html.encode("utf-8") if isinstance(html, str) else html
+    for match in _REDUX_ID_RE.finditer(data):
+        pos = match.start()
+        tag_start = data.rfind(b"<", 0, pos)
+        tag_end = data.find(b">", match.end())
+        in_open_tag = tag_start != -1 and tag_end != -1 and data.find(b">", tag_start, pos) == -1
+        if in_open_tag and data[tag_start + 1:tag_start + 7].lower() == b"script":
+            close = _SCRIPT_CLOSE_RE.search(data, tag_end + 1)
+            if close is None:
+                return None
+            payload = data[tag_end + 1:close.start()]
+            return payload if payload.strip() else None
+    return None
+
+
+def decode_redux_payload(payload: bytes):
+    """Decode redux-data JSON, with orjson when installed"""
+    if orjson is not None:
+        try:
+            return orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN or >64-bit ints, which the stdlib accepts
+    return json_module.loads(payload)
+
+
+class MsnQuoteIndex:
+    """
+    Priced quotes from one MSN redux-data snapshot, indexed by
+    (displayName, currency, securityType, exchangeName).
+
+    Built with a single iterative traversal of the state; lookups for any
+    commodity are then dict hits. Quotes keep their document order, so
+    "first match" matches a pre-order walk of the JSON.
+    """
+
+    def __init__(self, state):
+        self.quotes: Dict[QuoteKey, List[Dict]] = {}
+        self._by_name: Dict[str, List[Dict]] = {}
+
+        stack = [state]
+        while stack:
+            obj = stack.pop()
+            if isinstance(obj, dict):
+                name = obj.get("displayName")
+                if isinstance(name, str) and isinstance(obj.get("priceNumber"), (int, float)):
+                    key = tuple(_key_part(obj.get(field)) for field in MSN_QUOTE_KEY)
+                    self.quotes.setdefault(key, []).append(obj)
+                    self._by_name.setdefault(name, []).append(obj)
+                children = obj.values()
+            elif isinstance(obj, list):
+                children = obj
+            else:
+                continue
+            # Reversed so the next pop is the first child (pre-order)
+            stack.extend(reversed([v for v in children if isinstance(v, (dict, list))]))
+
+    def __len__(self) -> int:
+        return sum(len(v) for v in self.quotes.values())
+
+    def get(self, display_name: str, currency: Optional[str] = None,
+            security_type: Optional[str] = None, exchange: Optional[str] = None) -> Optional[Dict]:
+        """First quote with exactly this key, or None"""
+        matches = self.quotes.get((display_name, currency, security_type, exchange))
+        return matches[0] if matches else None
+
+    def find(self, display_name: str, currency: str = "USD",
+             prefer: Tuple[str, str] = ("future", "COMEX")) -> Optional[Dict]:
+        """
+        Quote for `display_name` in `currency` (quotes without a currency also
+        match). Prefers the (securityType, exchangeName) pair in `prefer`,
+        otherwise returns the first match.
+        """
+        candidates = [
+            q for q in self._by_name.get(display_name, ())
+            if not q.get("currency") or q.get("currency") == currency
+        ]
+        for q in candidates:
+            if (q.get("securityType"), q.get("exchangeName")) == prefer:
+                return q
+        return candidates[0] if candidates else None
+
 
 class PreciousMetalsPrice:
     """Class to fetch and cache gold and silver prices"""
@@ -31,6 +143,7 @@ class PreciousMetalsPrice:
         self.cache_duration = cache_duration
         self.primary_source = primary_source.lower().strip()
         self._msn_state_cache: Optional[Dict] = None
+        self._msn_quote_index: Optional[MsnQuoteIndex] = None
         self._msn_state_cached_at: Optional[datetime] = None
         self._msn_state_failed_at: Optional[datetime] = None
         self._msn_state_fail_reason: Optional[str] = None
@@ -76,7 +189,7 @@ class PreciousMetalsPrice:
             "Cache-Control": "no-cache",
         }
 
-        response_text = None
+        payload = None
         attempt_params = [
             lambda: {"ocid": "msn", "cvid": uuid.uuid4().hex},
             lambda: {"ocid": "msn"},
@@ -92,39 +205,47 @@ class PreciousMetalsPrice:
                 continue
             if resp.status_code != 200:
                 continue
-            if 'id="redux-data"' not in resp.text:
+            payload = extract_redux_payload(resp.content)
+            if payload is None:
                 continue
-            response_text = resp.text
             break
 
-        if response_text is None:
+        if payload is None:
             self._msn_state_failed_at = datetime.now()
             self._msn_state_fail_reason = "no redux-data SSR payload"
             logger.warning("MSN Money did not return a redux-data SSR payload after retries")
             return None
 
-        soup = BeautifulSoup(response_text, "html.parser")
-        redux_script = soup.find("script", {"id": "redux-data"})
-        if not redux_script or not redux_script.string:
+        try:
+            state = decode_redux_payload(payload)
+        except Exception as e:
             self._msn_state_failed_at = datetime.now()
-            self._msn_state_fail_reason = "missing redux-data script"
-            logger.warning("MSN Money landing page missing redux-data script")
+            self._msn_state_fail_reason = f"json parse error: {e}"
+            logger.warning(f"Failed to parse MSN redux-data JSON: {e}")
             return None
 
         try:
-            state = json_module.loads(redux_script.string)
+            index = MsnQuoteIndex(state)
         except Exception as e:
             self._msn_state_failed_at = datetime.now()
-            self._msn_state_fail_reason = f"json parse error: {e}"
-            logger.warning(f"Failed to parse MSN redux-data JSON: {e}")
+            self._msn_state_fail_reason = f"quote index error: {e}"
+            logger.warning(f"Failed to index MSN redux-data quotes: {e}")
             return None
 
+        # Swap state and index together so they never describe different snapshots
         self._msn_state_cache = state
+        self._msn_quote_index = index
         self._msn_state_cached_at = datetime.now()
         self._msn_state_failed_at = None
         self._msn_state_fail_reason = None
         return state
 
+    def _fetch_msn_quote_index(self) -> Optional[MsnQuoteIndex]:
+        """Quote index for the current (cached) MSN redux state"""
+        if self._fetch_msn_redux_state() is None:
+            return None
+        return self._msn_quote_index
+
     def _is_cache_valid(self, key: str) -> bool:
         """Check if cache is still valid"""
         if key not in self.cache:
@@ -251,44 +372,17 @@ class PreciousMetalsPrice:
             if metal not in ["gold", "silver"]:
                 return None
 
-            state = self._fetch_msn_redux_state()
-            if state is None:
+            quotes = self._fetch_msn_quote_index()
+            if quotes is None:
                 return None
 
             target_name = "Gold" if metal == "gold" else "Silver"
 
-            def iter_dicts(obj):
-                if isinstance(obj, dict):
-                    yield obj
-                    for v in obj.values():
-                        yield from iter_dicts(v)
-                elif isinstance(obj, list):
-                    for v in obj:
-                        yield from iter_dicts(v)
-
-            candidates = []
-            for d in iter_dicts(state):
-                if d.get("displayName") != target_name:
-                    continue
-                price = d.get("priceNumber")
-                if not isinstance(price, (int, float)):
-                    continue
-                if d.get("currency") and d.get("currency") != "USD":
-                    continue
-                candidates.append(d)
-
-            if not candidates:
-                logger.warning(f"MSN redux-data did not contain quote for {target_name}")
-                return None
-
             # Prefer futures (COMEX) if multiple entries exist.
-            chosen = None
-            for d in candidates:
-                if d.get("securityType") == "future" and d.get("exchangeName") == "COMEX":
-                    chosen = d
-                    break
+            chosen = quotes.find(target_name, currency="USD", prefer=("future", "COMEX"))
             if chosen is None:
-                chosen = candidates[0]
+                logger.warning(f"MSN redux-data did not contain quote for {target_name}")
+                return None
 
             price = float(chosen.get("priceNumber"))
             change = chosen.get("changeValueNumber")
@@ -41,8 +41,6 @@ setup(
         'yfinance>=0.2.28',
         'requests>=2.31.0',
         'pandas>=2.0.0',
-        'beautifulsoup4>=4.12.0',
-        'lxml>=4.9.0',
     ],
     extras_require={
         'dev': [
@@ -52,6 +50,12 @@ setup(
             'flake8>=6.0.0',
             'mypy>=1.0.0',
         ],
+        'fast': [
+            'orjson>=3.8.0',
+        ],
+        'bench': [
+            'beautifulsoup4>=4.12.0',
+        ],
     },
     entry_points={
         'console_scripts': [
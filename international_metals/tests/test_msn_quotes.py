@@ -0,0 +1,177 @@
+"""
+Tests for MSN redux-data extraction and quote lookup (no network)
+"""
+
+import os
+
+from international_metals_pkg.core import (
+    MsnQuoteIndex,
+    PreciousMetalsPrice,
+    decode_redux_payload,
+    extract_redux_payload,
+)
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "msn_money_landing.html")
+
+
+def _quote(name, price, currency="USD", security_type="future", exchange="COMEX", **extra):
+    return {
+        "displayName": name,
+        "priceNumber": price,
+        "currency": currency,
+        "securityType": security_type,
+        "exchangeName": exchange,
+        **extra,
+    }
+
+
+STATE = {
+    "marketBrief": {
+        "quotes": [
+            _quote("Gold", 2390.5, security_type="index", exchange="LBMA", id="gold-spot"),
+            _quote("Silver", 28.1, currency="EUR", id="silver-eur"),
+        ]
+    },
+    "commodities": {
+        "items": [
+            {"card": _quote("Gold", 2401.25, id="gold-fut", changeValueNumber=3.5)},
+            _quote("Silver", 29.75, currency=None, id="silver-fut"),
+            _quote("Copper", "n/a", id="copper-no-price"),
+        ]
+    },
+}
+
+
+def test_quote_index_keys():
+    """Quotes are indexed by (displayName, currency, securityType, exchangeName)"""
+    index = MsnQuoteIndex(STATE)
+
+    assert len(index) == 4  # quotes without a numeric price are skipped
+    assert index.get("Gold", "USD", "future", "COMEX")["id"] == "gold-fut"
+    assert index.get("Gold", "USD", "index", "LBMA")["id"] == "gold-spot"
+    assert index.get("Silver", "EUR", "future", "COMEX")["id"] == "silver-eur"
+    assert index.get("Copper", "USD", "future", "COMEX") is None
+
+
+def test_quote_index_find_prefers_comex_future():
+    """find() prefers COMEX futures, accepts missing currency, skips other currencies"""
+    index = MsnQuoteIndex(STATE)
+
+    assert index.find("Gold")["id"] == "gold-fut"
+    assert index.find("Gold", prefer=("index", "LBMA"))["id"] == "gold-spot"
+    assert index.find("Silver")["id"] == "silver-fut"
+    assert index.find("Platinum") is None
+
+
+def test_quote_index_non_string_key_fields():
+    """Nested objects in key fields neither break the build nor match string lookups"""
+    state = {
+        "a": {"displayName": "Gold", "priceNumber": 1.0, "currency": {"code": "USD"}},
+        "b": {"displayName": {"en": "Gold"}, "priceNumber": 2.0},
+        "c": _quote("Gold", 2401.25, exchange=["COMEX"], id="gold-list-exchange"),
+    }
+    index = MsnQuoteIndex(state)
+
+    assert len(index) == 2
+    assert index.get("Gold", "USD", "future", "COMEX") is None
+    assert index.get("Gold", "USD", "future", "['COMEX']")["id"] == "gold-list-exchange"
+    assert index.find("Gold")["id"] == "gold-list-exchange"
+
+
+def test_failed_index_build_backs_off(monkeypatch):
+    """An index error records a failure and leaves the previous state and index in place"""
+    import international_metals_pkg.core as core
+
+    with open(FIXTURE, "rb") as f:
+        html = f.read()
+    requests_made = []
+
+    class FakeResponse:
+        status_code = 200
+        content = html
+
+    def fake_get(*args, **kwargs):
+        requests_made.append(1)
+        return FakeResponse()
+
+    def broken_index(state):
+        raise TypeError("unhashable type: 'dict'")
+
+    monkeypatch.setattr(core.requests, "get", fake_get)
+    monkeypatch.setattr(core, "MsnQuoteIndex", broken_index)
+    pm = PreciousMetalsPrice()
+    previous_index = MsnQuoteIndex(STATE)
+    pm._msn_state_cache, pm._msn_quote_index = STATE, previous_index
+
+    assert pm._fetch_msn_redux_state() is None
+    assert pm._msn_state_failed_at is not None
+    assert pm._msn_state_cache is STATE and pm._msn_quote_index is previous_index
+    assert pm._fetch_msn_redux_state() is None
+    assert len(requests_made) == 1  # second call is inside the failure backoff
+
+
+def test_get_from_msn_money_reads_quote_index():
+    """Gold and silver are looked up in the quote index built from the snapshot"""
+    pm = PreciousMetalsPrice()
+    calls = []
+
+    def fake_fetch():
+        calls.append(1)
+        pm._msn_quote_index = MsnQuoteIndex(STATE)
+        return STATE
+
+    pm._fetch_msn_redux_state = fake_fetch
+
+    gold = pm._get_from_msn_money("gold")
+    silver = pm._get_from_msn_money("silver")
+
+    assert gold["price"] == 2401.25
+    assert gold["change"] == 3.5
+    assert gold["msn_id"] == "gold-fut"
+    assert silver["price"] == 29.75
+    assert len(calls) == 2
+
+
+def test_extract_redux_payload_from_fixture():
+    """The byte scanner skips look-alike markers and finds script#redux-data"""
+    with open(FIXTURE, "rb") as f:
+        html = f.read()
+
+    payload = extract_redux_payload(html)
+    assert payload is not None
+    state = decode_redux_payload(payload)
+
+    index = MsnQuoteIndex(state)
+    assert index.find("Gold")["symbol"] == "GCcv1"
+    assert index.find("Silver")["symbol"] == "SIcv1"
+    # Escaped "<\/script>" inside the JSON must not end the payload early
+    assert "</script>" in state["feed"]["cards"][0]["abstract"]
+
+    # str input gives the same result
+    assert decode_redux_payload(extract_redux_payload(html.decode("utf-8"))) == state
+
+
+def test_extract_redux_payload_missing():
+    """No payload for pages without the script, or with an empty/unterminated one"""
+    assert extract_redux_payload(b"<html><body>shell page</body></html>") is None
+    assert extract_redux_payload(b'<div id="redux-data"></div>') is None
+    assert extract_redux_payload(b'<script id="redux-data"> </script>') is None
+    assert extract_redux_payload(b'<script id="redux-data">{"a": 1}') is None
+    assert extract_redux_payload(b"<script id='redux-data'>{\"a\": 1}</script>") == b'{"a": 1}'
+
+
+def test_extract_redux_payload_requires_whole_id_attribute():
+    """data-id="redux-data" and id=redux-data-x are not the redux-data script"""
+    assert extract_redux_payload(b'<script data-id="redux-data">{"a": 1}</script>') is None
+    assert extract_redux_payload(b'<script id=redux-data-x>{"a": 1}</script>') is None
+    assert extract_redux_payload(b'<script id="redux-data-x">{"a": 1}</script>') is None
+    assert extract_redux_payload(
+        b'<script data-id="redux-data">{"a": 1}</script>'
+        b'<script type="application/json" id=redux-data>{"b": 2}</script>'
+    ) == b'{"b": 2}'
+    assert extract_redux_payload(b'<script ID = "redux-data" >{"c": 3}</script>') == b'{"c": 3}'
+
+
+def test_decode_redux_payload_stdlib_fallback():
+    """Payloads the fast decoder rejects still decode"""
+    assert decode_redux_payload(b'{"x": NaN, "n": 123456789012345678901234567890}')["n"] == 123456789012345678901234567890
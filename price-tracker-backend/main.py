@@ -3,19 +3,32 @@ Price Tracker FastAPI Backend
 REST API for Gold and Silver price tracking
 """
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import datetime
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 from typing import Optional
+import asyncio
+import functools
+import hashlib
 import sys
+import importlib.util
 import os
 import sqlite3
+import threading
 import csv
 import io
+import json
 import requests
 import subprocess
 import re
 import time
+import uuid
 
 # Add ui directory to path to import data_fetcher
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -23,15 +36,54 @@ parent_dir = os.path.dirname(current_dir)
 ui_dir = os.path.join(parent_dir, 'ui')
 sys.path.insert(0, ui_dir)
 
+try:
+    # Optional: faster JSON serialization (native float/datetime/numpy encoding).
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class _ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (FastAPI's own ORJSONResponse is deprecated)."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+
+_JSONResponseClass = _ORJSONResponse if orjson is not None else JSONResponse
+
+try:
+    # Optional: brotli negotiation (falls back to gzip for clients without `br`).
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+try:
+    # Optional: memory-mapped Feather/Parquet loads for the CSV-backed datasets.
+    import pyarrow.feather as pa_feather
+    import pyarrow.parquet as pa_parquet
+except ImportError:
+    pa_feather = None
+    pa_parquet = None
+
 from data_fetcher import PriceDataFetcher
+from history_db import PRICE_DAILY_UPDATED_AT_KEY, get_history_db, refresh_price_daily
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Price Tracker API",
     description="Gold and Silver price tracking API for Vietnam and International markets",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=_JSONResponseClass,
 )
 
+# Compress large JSON payloads (history, item histories, reserves).
+COMPRESSION_MIN_SIZE_BYTES = 1024
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_SIZE_BYTES, gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE_BYTES)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -53,48 +105,195 @@ app.add_middleware(
 fetcher = PriceDataFetcher()
 
 HISTORY_DB_PATH = os.path.join(ui_dir, "price_history.db")
+# Shared with `fetcher`: one writer + pooled readers; schema is migrated once here.
+_HISTORY_DB = get_history_db(HISTORY_DB_PATH)
 RESERVES_CSV_PATH = os.path.join(parent_dir, "Du_tru", "reserves_gold_by_country_year.csv")
 WGC_OUTDIR = os.path.join(parent_dir, "data_wgc")
 WGC_CSV_PATH = os.path.join(WGC_OUTDIR, "wgc_gold_reserves_latest.csv")
+# Written by the downloader on every check, including "not modified" runs.
+WGC_DOWNLOAD_STATE_PATH = os.path.join(WGC_OUTDIR, "wgc_download_state.json")
 WGC_COOKIE_FILE_DEFAULT = os.path.join(parent_dir, ".secrets", "wgc_auth_cookie.txt")
 
 _TOKEN_CACHE: Optional[dict] = None
 _TOKEN_LAST_FETCH: Optional[datetime] = None
-_RESERVES_CACHE: Optional[dict] = None
-_WGC_CACHE: Optional[dict] = None
-_WGC_CACHE_MTIME: Optional[float] = None
 _GOLD_SPOT_CACHE: Optional[dict] = None
 _GOLD_SPOT_LAST_FETCH: Optional[datetime] = None
 
+# Background price collector: interval in seconds (<= 0 disables the loop and
+# falls back to collecting on demand).
+PRICE_COLLECTOR_INTERVAL_SECONDS = float(os.environ.get("PRICE_COLLECTOR_INTERVAL_SECONDS") or 300)
+# With the collector disabled, a request re-collects once the snapshot is older than this.
+PRICE_SNAPSHOT_MAX_AGE_SECONDS = float(os.environ.get("PRICE_SNAPSHOT_MAX_AGE_SECONDS") or 60)
+
+
+@dataclass(frozen=True)
+class PriceSnapshot:
+    """Latest fully post-processed `/api/prices/today` payload. Never mutated once published."""
+    data: dict
+    collected_at: datetime
+    duration_seconds: float
+
+
+_PRICE_SNAPSHOT: Optional[PriceSnapshot] = None
+_PRICE_COLLECTOR_TASK: Optional[asyncio.Task] = None
+_PRICE_COLLECTOR_LAST_ERROR: Optional[str] = None
+
+# Blocking work never runs on the event loop. Upstream calls (HTTP scrapes, the WGC
+# subprocess) and local I/O (SQLite, CSV datasets) get separate bounded pools so a slow
+# upstream can saturate its own pool without stalling history/health endpoints.
+_UPSTREAM_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("BACKEND_UPSTREAM_WORKERS") or 8),
+    thread_name_prefix="upstream",
+)
+_LOCAL_IO_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("BACKEND_LOCAL_IO_WORKERS") or 8),
+    thread_name_prefix="local-io",
+)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it is in flight
+    wait for (and share) the same result or exception. Works from worker threads (`do`)
+    and from the event loop (`do_async`, which waits without tying up a thread).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inflight: dict[str, Future] = {}
+
+    def _claim(self, key: str) -> tuple[Future, bool]:
+        with self._lock:
+            fut = self._inflight.get(key)
+            if fut is not None:
+                return fut, False
+            fut = Future()
+            self._inflight[key] = fut
+            return fut, True
+
+    def _execute(self, key: str, fut: Future, fn) -> None:
+        try:
+            fut.set_result(fn())
+        except BaseException as e:
+            fut.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def do(self, key: str, fn):
+        fut, leader = self._claim(key)
+        if leader:
+            self._execute(key, fut, fn)
+        return fut.result()
+
+    async def do_async(self, key: str, fn, executor: Optional[ThreadPoolExecutor] = None):
+        fut, leader = self._claim(key)
+        if leader:
+            asyncio.get_running_loop().run_in_executor(executor, self._execute, key, fut, fn)
+        return await asyncio.wrap_future(fut)
+
+
+_SINGLE_FLIGHT = SingleFlight()
+
 
-def _connect_history_db() -> sqlite3.Connection:
-    conn = sqlite3.connect(HISTORY_DB_PATH, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL;")
-    conn.execute("PRAGMA synchronous=NORMAL;")
-    _ensure_price_snapshots_columns(conn)
-    return conn
+async def _run_upstream(fn, *args, **kwargs):
+    """Run a blocking upstream call (network/subprocess) off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_UPSTREAM_EXECUTOR, functools.partial(fn, *args, **kwargs))
+
+
+async def _run_local_io(fn, *args, **kwargs):
+    """Run blocking local I/O (SQLite queries, dataset loads) off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_LOCAL_IO_EXECUTOR, functools.partial(fn, *args, **kwargs))
+
+
+@dataclass(frozen=True)
+class DatasetSnapshot:
+    """One published build of a file-backed dataset. Never mutated once published."""
+    data: dict
+    version: Optional[str]
+    last_modified: Optional[datetime]
+    loaded_at: datetime
+
+
+class WatchedDataset:
+    """
+    File-backed dataset served from immutable snapshots.
+
+    `get()` never waits on a reload: when `version_fn()` (file mtime/size) no longer
+    matches the published snapshot, a rebuild is scheduled on the local I/O pool and the
+    finished snapshot replaces the old one with a single reference swap. Only the first
+    load blocks. A version that failed to build is not retried until the files change.
+    """
+
+    def __init__(self, name: str, loader, version_fn) -> None:
+        self.name = name
+        self._loader = loader
+        self._version_fn = version_fn
+        self._snapshot: Optional[DatasetSnapshot] = None
+        self._lock = threading.Lock()
+        self._rebuilding = False
+        self._failed_version: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    def _build(self) -> DatasetSnapshot:
+        # Version is read before loading: a change mid-load just triggers another rebuild.
+        version, last_modified = self._version_fn()
+        try:
+            data = self._loader()
+        except Exception as e:
+            self._failed_version = version
+            self.last_error = str(e)
+            raise
+        snap = DatasetSnapshot(data=data, version=version, last_modified=last_modified, loaded_at=datetime.now())
+        self._snapshot = snap
+        self._failed_version = None
+        self.last_error = None
+        return snap
+
+    def _rebuild(self) -> None:
+        try:
+            self.reload()
+        except Exception as e:
+            print(f"⚠️ Dataset reload failed ({self.name}): {e}")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+    def reload(self) -> DatasetSnapshot:
+        """Rebuild now (blocking), e.g. right after the source files were rewritten."""
+        return _SINGLE_FLIGHT.do(f"dataset:{self.name}", self._build)
+
+    def get(self) -> DatasetSnapshot:
+        snap = self._snapshot
+        if snap is None:
+            return self.reload()
+        version, _ = self._version_fn()
+        if version != snap.version and version != self._failed_version:
+            with self._lock:
+                start = not self._rebuilding
+                self._rebuilding = True
+            if start:
+                _LOCAL_IO_EXECUTOR.submit(self._rebuild)
+        return snap
+
+    def status(self) -> dict:
+        snap = self._snapshot
+        return {
+            "loaded": snap is not None,
+            "version": snap.version if snap else None,
+            "loaded_at": snap.loaded_at.isoformat() if snap else None,
+            "rebuilding": self._rebuilding,
+            "last_error": self.last_error,
+        }
 
 
 def _rows_to_dicts(rows):
     return [dict(r) for r in rows]
 
-def _ensure_price_snapshots_columns(conn: sqlite3.Connection) -> None:
-    try:
-        cols = {r[1] for r in conn.execute("PRAGMA table_info(price_snapshots)").fetchall()}
-        expected = [
-            ("paxg_usd_oz", "REAL"),
-            ("paxg_source", "TEXT"),
-            ("xaut_usd_oz", "REAL"),
-            ("xaut_source", "TEXT"),
-        ]
-        for name, sql_type in expected:
-            if name not in cols:
-                conn.execute(f"ALTER TABLE price_snapshots ADD COLUMN {name} {sql_type}")
-        conn.commit()
-    except Exception:
-        return
-
 def _to_float(value):
     try:
         if value is None:
@@ -108,9 +307,128 @@ def _to_float(value):
     except Exception:
         return None
 
-def _load_reserves_dataset() -> dict:
+_COLUMNAR_EXTENSIONS = (".feather", ".arrow", ".parquet")
+
+
+def _columnar_sibling(csv_path: str) -> Optional[str]:
     """
-    Load World Bank reserves dataset (gold inferred + non-gold) from CSV and cache in memory.
+    Feather/Parquet twin of `csv_path` (same basename), if pyarrow is available and the
+    file is at least as new as the CSV. A stale twin is ignored so the CSV stays the
+    source of truth.
+    """
+    if pa_parquet is None:
+        return None
+    base = os.path.splitext(csv_path)[0]
+    try:
+        csv_mtime = os.stat(csv_path).st_mtime_ns
+    except OSError:
+        csv_mtime = None
+    for ext in _COLUMNAR_EXTENSIONS:
+        path = base + ext
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if csv_mtime is None or st.st_mtime_ns >= csv_mtime:
+            return path
+    return None
+
+
+def _read_columnar(path: str):
+    """Memory-mapped Arrow read into pandas (blocks released as they are converted)."""
+    if path.endswith(".parquet"):
+        table = pa_parquet.read_table(path, memory_map=True)
+    else:
+        table = pa_feather.read_table(path, memory_map=True)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+# Reserves kinds exposed by /api/reserves/top -> CSV column.
+_RESERVES_KIND_COLUMNS = {
+    "gold": "gold_value_usd_inferred",
+    "non_gold": "non_gold_reserves_usd",
+    "total": "total_reserves_usd",
+}
+_RESERVES_VALUE_COLUMNS = ["total_reserves_usd", "non_gold_reserves_usd", "gold_value_usd_inferred"]
+
+
+def _empty_reserves_dataset() -> dict:
+    return {"global_min_year": None, "global_max_year": None, "countries": {}, "rankings": {}}
+
+
+def _build_reserves_dataset(df) -> dict:
+    """
+    Build the reserves dataset from a raw (string-typed) frame.
+
+    - `countries`: per-country metadata + year-sorted series (for /api/reserves/country)
+    - `rankings`: {(kind, year): (iso2 array, value array)} sorted by value desc, so a
+      top-N lookup is a slice
+    """
+    import numpy as np
+    import pandas as pd
+
+    df = df.copy()
+    df["iso2"] = df["iso2"].fillna("").astype(str).str.strip().str.upper()
+    df["country_name"] = df["country_name"].fillna("").astype(str).str.strip()
+    df["year"] = pd.to_numeric(df["year"], errors="coerce")
+    for col in _RESERVES_VALUE_COLUMNS:
+        if not pd.api.types.is_numeric_dtype(df[col]):
+            # Handle common formatted numbers like "2,823,000"
+            df[col] = df[col].astype(str).str.replace(",", "", regex=False).str.strip()
+        # float64 even when a columnar twin stores integral values, so series values stay floats
+        df[col] = pd.to_numeric(df[col], errors="coerce").astype(float)
+    qf = df["quality_flag"].fillna("").astype(str).str.strip()
+    df["quality_flag"] = qf.where(qf != "")
+    df = df[(df["iso2"] != "") & df["year"].notna()]
+    if df.empty:
+        return _empty_reserves_dataset()
+    df["year"] = df["year"].astype(int)
+    df = df.drop_duplicates(subset=["year", "iso2"], keep="first")
+
+    countries: dict[str, dict] = {}
+    series_cols = ["year", *_RESERVES_VALUE_COLUMNS, "quality_flag"]
+    by_country = df.sort_values(["iso2", "year"], kind="mergesort")
+    series_frame = by_country[series_cols].astype(object).where(by_country[series_cols].notna(), None)
+    for iso2, idx in by_country.groupby("iso2", sort=False).indices.items():
+        group = by_country.iloc[idx]
+        names = group["country_name"][group["country_name"] != ""]
+        years = group["year"]
+        countries[iso2] = {
+            "iso2": iso2,
+            "country_name": names.iloc[0] if len(names) else iso2,
+            "min_year": int(years.min()),
+            "max_year": int(years.max()),
+            "series": series_frame.iloc[idx].to_dict("records"),
+        }
+    for entry in countries.values():
+        for r in entry["series"]:
+            r["year"] = int(r["year"])
+
+    rankings: dict[tuple[str, int], tuple] = {}
+    for kind, col in _RESERVES_KIND_COLUMNS.items():
+        sub = df.loc[df[col].notna(), ["year", "iso2", col]]
+        # Stable: ties keep CSV order, as the previous per-request sort did.
+        sub = sub.sort_values(["year", col], ascending=[True, False], kind="mergesort")
+        years = sub["year"].to_numpy()
+        iso2s = sub["iso2"].to_numpy()
+        values = sub[col].to_numpy(dtype=float)
+        bounds = np.flatnonzero(np.diff(years)) + 1
+        for lo, hi in zip(np.concatenate(([0], bounds)), np.concatenate((bounds, [len(years)]))):
+            if hi > lo:
+                rankings[(kind, int(years[lo]))] = (iso2s[lo:hi], values[lo:hi])
+
+    return {
+        "global_min_year": int(df["year"].min()),
+        "global_max_year": int(df["year"].max()),
+        "countries": countries,
+        "rankings": rankings,
+    }
+
+
+def _read_reserves_dataset() -> dict:
+    """
+    Build the World Bank reserves dataset (gold inferred + non-gold) from disk.
+    Reads the Feather/Parquet twin of the CSV when present (see `_columnar_sibling`).
 
     Returns:
       {
@@ -125,88 +443,56 @@ def _load_reserves_dataset() -> dict:
               "series": [{"year": 1960, "total_reserves_usd": ..., "non_gold_reserves_usd": ..., "gold_value_usd_inferred": ..., "quality_flag": "OK"}, ...]
            },
            ...
-        }
+        },
+        "rankings": {("gold", 2024): (iso2 array, value array), ...}  # value desc
       }
     """
-    global _RESERVES_CACHE
-    if _RESERVES_CACHE is not None:
-        return _RESERVES_CACHE
-
-    countries: dict[str, dict] = {}
-    global_min_year: Optional[int] = None
-    global_max_year: Optional[int] = None
-
-    if not os.path.exists(RESERVES_CSV_PATH):
-        _RESERVES_CACHE = {"global_min_year": None, "global_max_year": None, "countries": {}}
-        return _RESERVES_CACHE
-
-    with open(RESERVES_CSV_PATH, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            iso2 = (row.get("iso2") or "").strip().upper()
-            name = (row.get("country_name") or "").strip()
-            year_raw = row.get("year")
-            try:
-                year = int(year_raw) if year_raw is not None else None
-            except Exception:
-                year = None
-            if not iso2 or year is None:
-                continue
+    columnar_path = _columnar_sibling(RESERVES_CSV_PATH)
+    if columnar_path is None and not os.path.exists(RESERVES_CSV_PATH):
+        return _empty_reserves_dataset()
+
+    import pandas as pd
+
+    if columnar_path is not None:
+        df = _read_columnar(columnar_path)
+    else:
+        # keep_default_na=False: ISO2 "NA" (Namibia) must not become NaN.
+        df = pd.read_csv(RESERVES_CSV_PATH, dtype=str, keep_default_na=False, encoding="utf-8")
+    for col in ["iso2", "country_name", "year", *_RESERVES_VALUE_COLUMNS, "quality_flag"]:
+        if col not in df.columns:
+            df[col] = ""
+    return _build_reserves_dataset(df)
+
+
+def _dataset_files_version(csv_path: str) -> tuple[Optional[str], Optional[datetime]]:
+    """(version, last-modified) over a dataset CSV and its columnar twin."""
+    parts: list[str] = []
+    latest: Optional[datetime] = None
+    for path in (csv_path, _columnar_sibling(csv_path)):
+        if path is None:
+            continue
+        version, last_modified = _file_validator(path)
+        if version is None:
+            continue
+        parts.append(f"{os.path.basename(path)}={version}")
+        if latest is None or last_modified > latest:
+            latest = last_modified
+    return ("|".join(parts) or None), latest
 
-            total_usd = _to_float(row.get("total_reserves_usd"))
-            non_gold_usd = _to_float(row.get("non_gold_reserves_usd"))
-            gold_usd = _to_float(row.get("gold_value_usd_inferred"))
-            qf = (row.get("quality_flag") or "").strip() or None
-
-            global_min_year = year if global_min_year is None else min(global_min_year, year)
-            global_max_year = year if global_max_year is None else max(global_max_year, year)
-
-            entry = countries.get(iso2)
-            if entry is None:
-                entry = {
-                    "iso2": iso2,
-                    "country_name": name or iso2,
-                    "min_year": year,
-                    "max_year": year,
-                    "series": [],
-                }
-                countries[iso2] = entry
 
-            entry["min_year"] = min(entry["min_year"], year)
-            entry["max_year"] = max(entry["max_year"], year)
-            entry["series"].append(
-                {
-                    "year": year,
-                    "total_reserves_usd": total_usd,
-                    "non_gold_reserves_usd": non_gold_usd,
-                    "gold_value_usd_inferred": gold_usd,
-                    "quality_flag": qf,
-                }
-            )
+_RESERVES_DATASET = WatchedDataset(
+    "reserves", _read_reserves_dataset, lambda: _dataset_files_version(RESERVES_CSV_PATH)
+)
 
-    for iso2, entry in countries.items():
-        entry["series"].sort(key=lambda r: r["year"])
 
-    _RESERVES_CACHE = {
-        "global_min_year": global_min_year,
-        "global_max_year": global_max_year,
-        "countries": countries,
-    }
-    return _RESERVES_CACHE
-
-def _reserves_kind_value(row: dict, kind: str) -> Optional[float]:
-    if kind == "gold":
-        return row.get("gold_value_usd_inferred")
-    if kind == "non_gold":
-        return row.get("non_gold_reserves_usd")
-    if kind == "total":
-        return row.get("total_reserves_usd")
-    return None
+def _load_reserves_dataset() -> dict:
+    """Current reserves dataset (see `_read_reserves_dataset` for the shape)."""
+    return _RESERVES_DATASET.get().data
 
 def _norm_country_name(name: str) -> str:
     s = (name or "").lower().strip()
     s = s.replace("&", " and ")
-    s = re.sub(r"[\(\)\[\]\.,'’]", " ", s)
+    s = re.sub(r"[\(\)\[\]\.,:'’]", " ", s)
     s = re.sub(r"\s+", " ", s).strip()
     # Some common normalizations
     s = s.replace("russian federation", "russia")
@@ -219,102 +505,226 @@ def _norm_country_name(name: str) -> str:
     s = s.replace("turkiye", "turkey")
     return s
 
+_COUNTRY_STOPWORDS = {"the", "of", "and", "rep", "republic"}
+_COUNTRY_MATCH_MIN_SCORE = 0.6
+
+# WGC display names (normalized) that neither exact nor token matching resolve.
+_WGC_COUNTRY_ALIASES = {
+    "united states": "US",
+    "united states of america": "US",
+    "usa": "US",
+    "uk": "GB",
+    "united kingdom": "GB",
+    "south korea": "KR",
+    "korea south": "KR",
+    "china p r mainland": "CN",
+    "china mainland": "CN",
+    "hong kong sar": "HK",
+    "czech republic": "CZ",
+    "czechia": "CZ",
+    "kyrgyzstan": "KG",
+    "laos": "LA",
+    "macedonia": "MK",
+    "syria": "SY",
+    "vietnam": "VN",
+    "yemen": "YE",
+}
+
+# Resolved WGC name -> ISO2 mappings, persisted per reserves dataset version.
+WGC_COUNTRY_MAP_META_KEY = "wgc_country_iso2"
+
+
 def _country_token_set(name: str) -> set[str]:
     s = _norm_country_name(name)
-    tokens = {t for t in s.split(" ") if t and t not in {"the", "of", "and", "rep", "republic"}}
+    tokens = {t for t in s.split(" ") if t and t not in _COUNTRY_STOPWORDS}
     return tokens
 
-def _build_wdi_country_index() -> list[tuple[str, str, set[str]]]:
-    ds = _load_reserves_dataset()
-    out: list[tuple[str, str, set[str]]] = []
-    for iso2, entry in (ds.get("countries") or {}).items():
-        cname = entry.get("country_name") or iso2
-        out.append((iso2, cname, _country_token_set(cname)))
-    return out
 
-def _map_country_to_iso2(name: str) -> Optional[str]:
-    ds = _load_reserves_dataset()
-    countries = ds.get("countries") or {}
-    if not countries:
-        return None
+class CountryResolver:
+    """
+    Name -> ISO2 index over the reserves dataset's countries, built once per dataset.
 
-    target_norm = _norm_country_name(name)
-    for iso2, entry in countries.items():
-        if _norm_country_name(entry.get("country_name") or "") == target_norm:
+    Lookup order: memo of earlier resolutions, exact normalized name, alias table,
+    then Jaccard over token sets restricted to candidates sharing a token
+    (inverted index), so a miss costs O(postings) rather than O(countries).
+    """
+
+    def __init__(self, countries: dict, version: Optional[str] = None):
+        self.countries = countries
+        self.version = version
+        self._order: dict[str, int] = {}
+        self._exact: dict[str, str] = {}
+        self._tokens: dict[str, set[str]] = {}
+        self._postings: dict[str, set[str]] = {}
+        for i, (iso2, entry) in enumerate(countries.items()):
+            cname = entry.get("country_name") or iso2
+            self._order[iso2] = i
+            self._exact.setdefault(_norm_country_name(cname), iso2)
+            tokens = _country_token_set(cname)
+            self._tokens[iso2] = tokens
+            for t in tokens:
+                self._postings.setdefault(t, set()).add(iso2)
+        self._aliases = {k: v for k, v in _WGC_COUNTRY_ALIASES.items() if v in self._order}
+        self._resolved: dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+        self.dirty = False
+
+    def resolve(self, name: str) -> Optional[str]:
+        key = (name or "").strip()
+        with self._lock:
+            if key in self._resolved:
+                return self._resolved[key]
+        iso2 = self._match(key)
+        with self._lock:
+            self._resolved[key] = iso2
+            self.dirty = True
+        return iso2
+
+    def _match(self, name: str) -> Optional[str]:
+        if not self._order:
+            return None
+        target_norm = _norm_country_name(name)
+        iso2 = self._exact.get(target_norm) or self._aliases.get(target_norm)
+        if iso2:
             return iso2
 
-    target_tokens = _country_token_set(name)
-    if not target_tokens:
-        return None
+        target_tokens = _country_token_set(name)
+        if not target_tokens:
+            return None
+        candidates: set[str] = set()
+        for t in target_tokens:
+            candidates |= self._postings.get(t, set())
+
+        best_iso2 = None
+        best_score = 0.0
+        # Dataset order keeps tie-breaking identical to a full scan.
+        for iso2 in sorted(candidates, key=self._order.__getitem__):
+            tokens = self._tokens[iso2]
+            union = len(tokens | target_tokens)
+            score = (len(tokens & target_tokens) / union) if union else 0.0
+            if score > best_score:
+                best_score = score
+                best_iso2 = iso2
+        return best_iso2 if best_score >= _COUNTRY_MATCH_MIN_SCORE else None
+
+    def load_mappings(self, payload: Optional[str]) -> None:
+        try:
+            state = json.loads(payload) if payload else None
+        except Exception:
+            state = None
+        if not isinstance(state, dict) or state.get("version") != self.version:
+            return
+        mappings = state.get("mappings") or {}
+        with self._lock:
+            for name, iso2 in mappings.items():
+                if iso2 is None or iso2 in self._order:
+                    self._resolved.setdefault(name, iso2)
+
+    def dump_mappings(self) -> str:
+        with self._lock:
+            self.dirty = False
+            return json.dumps({"version": self.version, "mappings": dict(self._resolved)})
+
+
+_COUNTRY_RESOLVER: Optional[CountryResolver] = None
+_COUNTRY_RESOLVER_LOCK = threading.Lock()
+
+
+def _get_country_resolver() -> CountryResolver:
+    """Resolver for the currently loaded reserves dataset (rebuilt when the dataset changes)."""
+    global _COUNTRY_RESOLVER
+    snap = _RESERVES_DATASET.get()
+    with _COUNTRY_RESOLVER_LOCK:
+        resolver = _COUNTRY_RESOLVER
+        countries = snap.data.get("countries")
+        if resolver is not None and resolver.countries is countries:
+            return resolver
+        version = snap.version
+        resolver = CountryResolver(countries or {}, version=version)
+        try:
+            with _HISTORY_DB.read() as conn:
+                resolver.load_mappings(_get_meta(conn, WGC_COUNTRY_MAP_META_KEY))
+        except Exception:
+            pass
+        _COUNTRY_RESOLVER = resolver
+        return resolver
 
-    best_iso2 = None
-    best_score = 0.0
-    for iso2, cname, tokens in _build_wdi_country_index():
-        if not tokens:
-            continue
-        inter = len(tokens & target_tokens)
-        union = len(tokens | target_tokens)
-        score = (inter / union) if union else 0.0
-        if score > best_score:
-            best_score = score
-            best_iso2 = iso2
 
-    return best_iso2 if best_score >= 0.6 else None
+def _persist_country_mappings(resolver: CountryResolver) -> None:
+    if not resolver.dirty or resolver.version is None:
+        return
+    try:
+        with _HISTORY_DB.write() as conn:
+            _set_meta(conn, WGC_COUNTRY_MAP_META_KEY, resolver.dump_mappings())
+    except Exception as e:
+        print(f"⚠️ Persist WGC country mappings failed: {e}")
 
-def _load_wgc_latest() -> dict:
-    """
-    Load latest WGC gold reserves snapshot from CSV.
-    Returns cached result when possible.
-    """
-    global _WGC_CACHE, _WGC_CACHE_MTIME
 
-    if not os.path.exists(WGC_CSV_PATH):
-        _WGC_CACHE = {"meta": None, "rows": []}
-        _WGC_CACHE_MTIME = None
-        return _WGC_CACHE
+def _read_wgc_records() -> list[dict]:
+    """Raw WGC rows from the Parquet twin when present, else the CSV."""
+    columnar_path = _columnar_sibling(WGC_CSV_PATH)
+    if columnar_path is not None:
+        df = _read_columnar(columnar_path)
+        return df.astype(object).where(df.notna(), None).to_dict("records")
+    with open(WGC_CSV_PATH, "r", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
 
-    try:
-        mtime = os.path.getmtime(WGC_CSV_PATH)
-    except Exception:
-        mtime = None
 
-    if _WGC_CACHE is not None and _WGC_CACHE_MTIME is not None and mtime is not None and abs(_WGC_CACHE_MTIME - mtime) < 1e-6:
-        return _WGC_CACHE
+def _read_wgc_dataset() -> dict:
+    """Parse the latest WGC gold reserves snapshot (Parquet twin if present, else CSV)."""
+    if not os.path.exists(WGC_CSV_PATH):
+        return {"meta": None, "rows": []}
 
     rows: list[dict] = []
     retrieved_at_utc = None
     holdings_as_of_max: Optional[str] = None
-    with open(WGC_CSV_PATH, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            country = (r.get("country_name") or "").strip()
-            if not country:
-                continue
-            tonnes = _to_float(r.get("tonnes"))
-            pct = _to_float(r.get("pct_of_reserves"))
-            value = _to_float(r.get("value_usd"))
-            retrieved_at_utc = retrieved_at_utc or (r.get("retrieved_at_utc") or None)
-            row_asof = (r.get("holdings_as_of") or "").strip() or None
-            if row_asof:
-                if holdings_as_of_max is None or row_asof > holdings_as_of_max:
-                    holdings_as_of_max = row_asof
-            iso2 = _map_country_to_iso2(country)
-            rows.append(
-                {
-                    "country_name": country,
-                    "iso2": iso2,
-                    "tonnes": tonnes,
-                    "pct_of_reserves": pct,
-                    "value_usd": value,
-                    "holdings_as_of": r.get("holdings_as_of") or None,
-                    "source": "WGC",
-                    "retrieved_at_utc": r.get("retrieved_at_utc") or None,
-                }
-            )
+    resolver = _get_country_resolver()
+    for r in _read_wgc_records():
+        country = (r.get("country_name") or "").strip()
+        if not country:
+            continue
+        tonnes = _to_float(r.get("tonnes"))
+        pct = _to_float(r.get("pct_of_reserves"))
+        value = _to_float(r.get("value_usd"))
+        retrieved_at_utc = retrieved_at_utc or (r.get("retrieved_at_utc") or None)
+        row_asof = (r.get("holdings_as_of") or "").strip() or None
+        if row_asof:
+            if holdings_as_of_max is None or row_asof > holdings_as_of_max:
+                holdings_as_of_max = row_asof
+        iso2 = resolver.resolve(country)
+        rows.append(
+            {
+                "country_name": country,
+                "iso2": iso2,
+                "tonnes": tonnes,
+                "pct_of_reserves": pct,
+                "value_usd": value,
+                "holdings_as_of": r.get("holdings_as_of") or None,
+                "source": "WGC",
+                "retrieved_at_utc": r.get("retrieved_at_utc") or None,
+            }
+        )
 
-    _WGC_CACHE = {"meta": {"holdings_as_of": holdings_as_of_max, "retrieved_at_utc": retrieved_at_utc}, "rows": rows}
-    _WGC_CACHE_MTIME = mtime
-    return _WGC_CACHE
+    _persist_country_mappings(resolver)
+
+    return {"meta": {"holdings_as_of": holdings_as_of_max, "retrieved_at_utc": retrieved_at_utc}, "rows": rows}
+
+
+def _wgc_dataset_version() -> tuple[Optional[str], Optional[datetime]]:
+    version, last_modified = _dataset_files_version(WGC_CSV_PATH)
+    if version is None:
+        return None, None
+    # ISO2 mapping depends on the reserves dataset, so a new reserves build re-maps WGC rows.
+    reserves_version, _ = _dataset_files_version(RESERVES_CSV_PATH)
+    return f"{version}|reserves:{reserves_version}", last_modified
+
+
+_WGC_DATASET = WatchedDataset("wgc", _read_wgc_dataset, _wgc_dataset_version)
+
+
+def _load_wgc_latest() -> dict:
+    """Current WGC snapshot: {"meta": {...}, "rows": [...]}."""
+    return _WGC_DATASET.get().data
 
 def _get_wgc_auth_cookie() -> Optional[str]:
     val = os.environ.get("WGC_AUTH_COOKIE")
@@ -330,18 +740,70 @@ def _get_wgc_auth_cookie() -> Optional[str]:
         return None
     return None
 
-def _refresh_wgc_dataset() -> dict:
+class WgcRefreshBlockedError(RuntimeError):
+    """The WGC site blocked the download (auth cookie missing/expired or bot check)."""
+
+
+# Downloader exit code for DownloadBlockedError.
+WGC_DOWNLOADER_BLOCKED_EXIT_CODE = 3
+_WGC_DOWNLOADER = None
+
+
+def _wgc_downloader():
+    """`download_wgc_gold_reserves` (repo root), imported on first use."""
+    global _WGC_DOWNLOADER
+    if _WGC_DOWNLOADER is None:
+        path = os.path.join(parent_dir, "download_wgc_gold_reserves.py")
+        spec = importlib.util.spec_from_file_location("download_wgc_gold_reserves", path)
+        module = importlib.util.module_from_spec(spec)
+        # Registered before exec: dataclasses and unpickling worker errors look the module up by name
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+        _WGC_DOWNLOADER = module
+    return _WGC_DOWNLOADER
+
+
+def _refresh_wgc_via_worker(address: str, cookie: str, progress=None) -> dict:
+    """
+    Send a refresh job to a running downloader worker
+    (`download_wgc_gold_reserves.py --serve HOST:PORT --mode playwright --outdir data_wgc`),
+    which keeps the interpreter and a Chromium context warm. Raises ConnectionError if none
+    is listening, WgcRefreshBlockedError if the download was blocked.
+    """
+    downloader = _wgc_downloader()
+    try:
+        result = downloader.submit_worker_job(
+            downloader._parse_address(address), {"auth_cookie": cookie}, on_log=progress
+        )
+    except downloader.DownloadBlockedError as e:
+        raise WgcRefreshBlockedError(f"WGC download blocked (worker): {e}") from e
+    csv_path = result.get("csv_path")
+    if csv_path and os.path.dirname(os.path.abspath(csv_path)) != os.path.abspath(WGC_OUTDIR):
+        print(f"⚠️ WGC worker wrote {csv_path}, but the backend reads {WGC_OUTDIR}; start the worker with --outdir {WGC_OUTDIR}")
+    return result
+
+
+def _refresh_wgc_dataset(progress=None) -> dict:
     """
-    Refresh WGC dataset by running the downloader script using Playwright mode.
+    Refresh WGC dataset via the downloader worker (env `WGC_WORKER_ADDRESS`) when one is
+    running, else by running the downloader script using Playwright mode.
+    `progress(line)` receives the downloader's output as it runs.
     """
-    global _WGC_CACHE, _WGC_CACHE_MTIME
     os.makedirs(WGC_OUTDIR, exist_ok=True)
+    cookie = _get_wgc_auth_cookie()
+    worker_address = os.environ.get("WGC_WORKER_ADDRESS")
+    if worker_address and cookie:
+        try:
+            _refresh_wgc_via_worker(worker_address, cookie, progress)
+            return _WGC_DATASET.reload().data
+        except ConnectionError as e:
+            print(f"⚠️ WGC worker unavailable at {worker_address} ({e}); running downloader subprocess")
+
     script_path = os.path.join(parent_dir, "download_wgc_gold_reserves.py")
     if not os.path.exists(script_path):
         raise RuntimeError("Downloader script not found: download_wgc_gold_reserves.py")
 
     python_bin = os.environ.get("WGC_PYTHON") or sys.executable
-    cookie = _get_wgc_auth_cookie()
     if not cookie:
         raise RuntimeError("Missing WGC auth cookie. Set env `WGC_AUTH_COOKIE` or put it in `.secrets/wgc_auth_cookie.txt`.")
     cmd = [
@@ -351,40 +813,223 @@ def _refresh_wgc_dataset() -> dict:
         "playwright",
         "--outdir",
         WGC_OUTDIR,
-        "--no-parquet",
     ]
     env = os.environ.copy()
     env["WGC_AUTH_COOKIE"] = cookie
-    proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
+    output: deque[str] = deque(maxlen=200)
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=env)
+    with proc:
+        for line in proc.stdout:
+            line = line.rstrip()
+            output.append(line)
+            if progress is not None and line:
+                progress(line)
+    if proc.returncode == WGC_DOWNLOADER_BLOCKED_EXIT_CODE:
+        raise WgcRefreshBlockedError("WGC download blocked.\nOUTPUT:\n" + "\n".join(output))
     if proc.returncode != 0:
-        raise RuntimeError(f"WGC refresh failed (code={proc.returncode}).\nSTDOUT:\n{proc.stdout}\nSTDERR:\n{proc.stderr}")
+        raise RuntimeError(f"WGC refresh failed (code={proc.returncode}).\nOUTPUT:\n" + "\n".join(output))
+
+    return _WGC_DATASET.reload().data
+
+
+# WGC refresh jobs: the downloader runs for tens of seconds, so requests only start a
+# job (at most one at a time) and clients poll its status.
+WGC_MAX_AGE_HOURS = 24 * 14
+WGC_JOBS_KEPT = 20
+# After a failed job, automatic (missing/stale) refreshes back off for this long.
+WGC_REFRESH_FAILURE_COOLDOWN_SECONDS = float(os.environ.get("WGC_REFRESH_FAILURE_COOLDOWN_SECONDS") or 300)
+_WGC_JOBS: "OrderedDict[str, dict]" = OrderedDict()
+_WGC_ACTIVE_JOB_ID: Optional[str] = None
+_WGC_LAST_FAILURE: Optional[tuple[float, str]] = None  # (time.monotonic(), job id)
+_WGC_JOBS_LOCK = threading.Lock()
+
+
+def _wgc_job_view(job: Optional[dict]) -> Optional[dict]:
+    if job is None:
+        return None
+    out = dict(job)
+    out["log_tail"] = list(job["log_tail"])
+    return out
 
-    _WGC_CACHE = None
-    _WGC_CACHE_MTIME = None
-    return _load_wgc_latest()
 
-def _ensure_wgc_dataset(max_age_hours: int = 24 * 14) -> dict:
+def _update_wgc_job(job_id: str, **fields) -> None:
+    with _WGC_JOBS_LOCK:
+        job = _WGC_JOBS.get(job_id)
+        if job is not None:
+            job.update(fields)
+
+
+def _run_wgc_refresh_job(job_id: str) -> None:
+    global _WGC_ACTIVE_JOB_ID, _WGC_LAST_FAILURE
+
+    def progress(line: str) -> None:
+        with _WGC_JOBS_LOCK:
+            job = _WGC_JOBS.get(job_id)
+            if job is not None:
+                job["log_tail"].append(line)
+                job["updated_at"] = datetime.now().isoformat()
+
+    _update_wgc_job(job_id, status="running", stage="downloading", started_at=datetime.now().isoformat())
+    try:
+        ds = _refresh_wgc_dataset(progress=progress)
+        _update_wgc_job(
+            job_id,
+            status="succeeded",
+            stage="done",
+            meta=ds.get("meta"),
+            count=len(ds.get("rows") or []),
+        )
+        with _WGC_JOBS_LOCK:
+            _WGC_LAST_FAILURE = None
+    except Exception as e:
+        print(f"⚠️ WGC refresh job {job_id} failed: {e}")
+        _update_wgc_job(
+            job_id, status="failed", stage="done", error=str(e), blocked=isinstance(e, WgcRefreshBlockedError)
+        )
+        with _WGC_JOBS_LOCK:
+            _WGC_LAST_FAILURE = (time.monotonic(), job_id)
+    finally:
+        with _WGC_JOBS_LOCK:
+            job = _WGC_JOBS.get(job_id)
+            if job is not None:
+                job["finished_at"] = datetime.now().isoformat()
+            if _WGC_ACTIVE_JOB_ID == job_id:
+                _WGC_ACTIVE_JOB_ID = None
+
+
+def _wgc_refresh_cooldown_remaining() -> float:
+    """Seconds until automatic refreshes resume after the last failed job (0 if none)."""
+    failure = _WGC_LAST_FAILURE
+    if failure is None:
+        return 0.0
+    return max(0.0, WGC_REFRESH_FAILURE_COOLDOWN_SECONDS - (time.monotonic() - failure[0]))
+
+
+def _start_wgc_refresh_job(reason: str, *, force: bool = False) -> Optional[dict]:
+    """
+    Start a background WGC refresh, or return the one already running.
+    Within the cooldown after a failure, returns the failed job instead of starting
+    another (None if it was evicted) unless `force` is set (manual refresh).
     """
-    Ensure we have a reasonably fresh WGC snapshot (default: 14 days).
-    If missing or stale, attempt a refresh using Playwright.
+    global _WGC_ACTIVE_JOB_ID
+    with _WGC_JOBS_LOCK:
+        if _WGC_ACTIVE_JOB_ID is not None:
+            return _wgc_job_view(_WGC_JOBS[_WGC_ACTIVE_JOB_ID])
+        if not force and _wgc_refresh_cooldown_remaining() > 0:
+            return _wgc_job_view(_WGC_JOBS.get(_WGC_LAST_FAILURE[1]))
+        job_id = uuid.uuid4().hex
+        now = datetime.now().isoformat()
+        job = {
+            "id": job_id,
+            "status": "queued",
+            "stage": "queued",
+            "reason": reason,
+            "created_at": now,
+            "updated_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "blocked": False,
+            "meta": None,
+            "count": None,
+            "log_tail": deque(maxlen=20),
+        }
+        _WGC_JOBS[job_id] = job
+        while len(_WGC_JOBS) > WGC_JOBS_KEPT:
+            _WGC_JOBS.popitem(last=False)
+        _WGC_ACTIVE_JOB_ID = job_id
+        view = _wgc_job_view(job)
+    _UPSTREAM_EXECUTOR.submit(_run_wgc_refresh_job, job_id)
+    return view
+
+
+def _get_wgc_job(job_id: Optional[str] = None) -> Optional[dict]:
+    """Job by id, or the most recent one when `job_id` is None."""
+    with _WGC_JOBS_LOCK:
+        if job_id is None:
+            job = next(reversed(_WGC_JOBS.values()), None)
+        else:
+            job = _WGC_JOBS.get(job_id)
+        return _wgc_job_view(job)
+
+
+def _ensure_wgc_dataset(max_age_hours: int = WGC_MAX_AGE_HOURS) -> tuple[DatasetSnapshot, Optional[dict]]:
+    """
+    Return the current WGC snapshot without waiting on a download (stale-while-revalidate).
+    If missing or stale, a background refresh job is started and returned alongside
+    (after a recent failure, that failed job is returned until the cooldown ends).
     """
     if not os.path.exists(WGC_CSV_PATH):
-        return _refresh_wgc_dataset()
+        return _WGC_DATASET.get(), _start_wgc_refresh_job("missing")
+    job = None
     try:
-        mtime = os.path.getmtime(WGC_CSV_PATH)
+        # A check that found nothing new leaves the CSV untouched but counts as fresh.
+        mtime = max(os.path.getmtime(p) for p in (WGC_CSV_PATH, WGC_DOWNLOAD_STATE_PATH) if os.path.exists(p))
         age_hours = (time.time() - mtime) / 3600.0
-        if age_hours > max_age_hours:
-            return _refresh_wgc_dataset()
+        if age_hours > max_age_hours and _get_wgc_auth_cookie():
+            job = _start_wgc_refresh_job("stale")
     except Exception:
         pass
-    return _load_wgc_latest()
+    return _WGC_DATASET.get(), job
+
+
+# Valued + ranked WGC table, materialized once per (dataset version, spot price).
+_WGC_VALUATION_CACHE: Optional[dict] = None
+
+
+def _build_wgc_valuation(rows: list[dict], spot_price: Optional[float]) -> dict:
+    import numpy as np
+
+    def column(name: str):
+        return np.array(
+            [r.get(name) if isinstance(r.get(name), (int, float)) else np.nan for r in rows], dtype=float
+        )
+
+    tonnes = column("tonnes")
+    value = column("value_usd")
+    if spot_price:
+        # Fill missing values from tonnes at spot; reported WGC values win.
+        computed = np.round(tonnes * TROY_OZ_PER_TONNE * float(spot_price), 2)
+        value = np.where(np.isnan(value) & (tonnes > 0), computed, value)
+
+    ranked: dict[str, list[dict]] = {}
+    for sort_key, values in (("tonnes", tonnes), ("value_usd", value)):
+        # Missing values sort last; stable so ties keep CSV order.
+        order = np.argsort(-np.where(np.isnan(values), -1.0, values), kind="stable")
+        out = []
+        for rank, i in enumerate(order.tolist(), start=1):
+            r = dict(rows[i])
+            r["value_usd"] = None if np.isnan(value[i]) else float(value[i])
+            r["rank"] = rank
+            out.append(r)
+        ranked[sort_key] = out
+    return {"ranked": ranked}
+
+
+def _get_wgc_valuation(ds: dict, version: Optional[str], spot_price: Optional[float]) -> dict:
+    """Cached valuation of `ds`; rebuilt only when the dataset or the spot price changes."""
+    global _WGC_VALUATION_CACHE
+    rows = ds.get("rows") or []
+    key = (version, spot_price)
+    cached = _WGC_VALUATION_CACHE
+    if cached is not None and cached["key"] == key and cached["rows"] is rows:
+        return cached
+
+    def build() -> dict:
+        global _WGC_VALUATION_CACHE
+        out = _build_wgc_valuation(rows, spot_price)
+        out.update(key=key, rows=rows)
+        _WGC_VALUATION_CACHE = out
+        return out
+
+    return _SINGLE_FLIGHT.do(f"wgc_valuation:{version}:{spot_price}", build)
+
 
 def _get_gold_spot_usd_oz() -> Optional[dict]:
     """
     Get current international gold price in USD/oz with a short in-process cache.
     Uses the existing fetcher (international prices only).
     """
-    global _GOLD_SPOT_CACHE, _GOLD_SPOT_LAST_FETCH
     now = datetime.now()
     try:
         if _GOLD_SPOT_LAST_FETCH and _GOLD_SPOT_CACHE and (now - _GOLD_SPOT_LAST_FETCH).total_seconds() < 300:
@@ -392,6 +1037,13 @@ def _get_gold_spot_usd_oz() -> Optional[dict]:
     except Exception:
         pass
 
+    # Concurrent cache misses share one upstream fetch.
+    out = _SINGLE_FLIGHT.do("gold_spot", _fetch_gold_spot_usd_oz)
+    return dict(out) if out else None
+
+def _fetch_gold_spot_usd_oz() -> Optional[dict]:
+    global _GOLD_SPOT_CACHE, _GOLD_SPOT_LAST_FETCH
+    now = datetime.now()
     try:
         intl = fetcher.fetch_international_prices() or {}
         gold = intl.get("gold") if isinstance(intl, dict) else None
@@ -407,13 +1059,89 @@ def _get_gold_spot_usd_oz() -> Optional[dict]:
         }
         _GOLD_SPOT_CACHE = out
         _GOLD_SPOT_LAST_FETCH = now
-        return dict(out)
+        return out
     except Exception:
         return None
 
-def _tonnes_to_troy_oz(tonnes: float) -> float:
-    # 1 metric tonne = 1,000,000 g; 1 troy oz = 31.1034768 g
-    return tonnes * (1_000_000.0 / 31.1034768)
+# HTTP caching for slow-changing payloads (daily history, CSV-backed datasets).
+HISTORY_CACHE_MAX_AGE_SECONDS = 60
+RESERVES_CACHE_MAX_AGE_SECONDS = 300
+
+
+def _make_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def _file_validator(path: str) -> tuple[Optional[str], Optional[datetime]]:
+    """(version token, last-modified) for a dataset file, or (None, None) if missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None, None
+    return f"{st.st_mtime_ns}:{st.st_size}", datetime.fromtimestamp(st.st_mtime, tz=timezone.utc)
+
+
+def _cache_headers(etag: str, last_modified: Optional[datetime], max_age: int) -> dict:
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}, must-revalidate"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+
+def _is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """RFC 9110 conditional GET: If-None-Match wins; If-Modified-Since is the fallback."""
+    inm = request.headers.get("if-none-match")
+    if inm:
+        tags = {t.strip().removeprefix("W/") for t in inm.split(",")}
+        return "*" in tags or etag in tags
+    ims = request.headers.get("if-modified-since")
+    if ims and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(ims)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def _not_modified_response(headers: dict) -> Response:
+    return Response(status_code=304, headers=headers)
+
+
+def _json_response(payload: dict, headers: Optional[dict] = None) -> Response:
+    """Serialize directly with the fast response class, skipping FastAPI's jsonable_encoder pass."""
+    return _JSONResponseClass(content=payload, headers=headers)
+
+
+def _to_columnar(rows: list[dict]) -> dict[str, list]:
+    """Row dicts -> one array per column (same order as the rows)."""
+    if not rows:
+        return {}
+    columns = list(rows[0].keys())
+    return {c: [r.get(c) for r in rows] for c in columns}
+
+
+def _shape_rows_payload(data: list[dict], shape: str, **extra) -> dict:
+    """Build the standard `{success, data, count}` payload in `rows` or `columns` shape."""
+    payload = {"success": True, "shape": shape}
+    payload["data"] = _to_columnar(data) if shape == "columns" else data
+    payload["count"] = len(data)
+    payload.update(extra)
+    return payload
+
+
+_SHAPE_QUERY = Query(
+    default="rows",
+    pattern="^(rows|columns)$",
+    description="rows (list of objects) | columns (one array per column, smaller for charts)",
+)
+
+
+# 1 metric tonne = 1,000,000 g; 1 troy oz = 31.1034768 g
+TROY_OZ_PER_TONNE = 1_000_000.0 / 31.1034768
 
 def _maybe_override_vn_prices_with_sell(data: dict) -> dict:
     """
@@ -528,7 +1256,6 @@ def _fetch_tokenized_gold_today() -> dict:
     Fetch tokenized gold prices (PAXG, XAUT) in USD/oz.
     Uses CryptoCompare, with a short in-process cache.
     """
-    global _TOKEN_CACHE, _TOKEN_LAST_FETCH
     now = datetime.now()
     try:
         if _TOKEN_LAST_FETCH and _TOKEN_CACHE and (now - _TOKEN_LAST_FETCH).total_seconds() < 300:
@@ -536,6 +1263,12 @@ def _fetch_tokenized_gold_today() -> dict:
     except Exception:
         pass
 
+    # Concurrent cache misses share one CryptoCompare call.
+    return dict(_SINGLE_FLIGHT.do("tokenized_gold", _fetch_tokenized_gold_uncached))
+
+def _fetch_tokenized_gold_uncached() -> dict:
+    global _TOKEN_CACHE, _TOKEN_LAST_FETCH
+    now = datetime.now()
     url = "https://min-api.cryptocompare.com/data/pricemultifull"
     params = {"fsyms": "PAXG,XAUT", "tsyms": "USD"}
     try:
@@ -568,8 +1301,7 @@ def _fetch_tokenized_gold_today() -> dict:
 
 def _read_latest_tokenized_from_db() -> dict:
     try:
-        conn = _connect_history_db()
-        try:
+        with _HISTORY_DB.read() as conn:
             row = conn.execute(
                 """
                 SELECT paxg_usd_oz, paxg_source, xaut_usd_oz, xaut_source
@@ -603,8 +1335,6 @@ def _read_latest_tokenized_from_db() -> dict:
                 if xaut is not None
                 else None,
             }
-        finally:
-            conn.close()
     except Exception:
         return {"paxg": None, "xaut": None}
 
@@ -612,8 +1342,7 @@ def _persist_tokenized_to_latest_snapshot(tokens: dict) -> None:
     paxg = (tokens or {}).get("paxg") or {}
     xaut = (tokens or {}).get("xaut") or {}
     try:
-        conn = _connect_history_db()
-        try:
+        with _HISTORY_DB.write() as conn:
             latest = conn.execute("SELECT ts FROM price_snapshots ORDER BY ts DESC LIMIT 1").fetchone()
             if not latest:
                 return
@@ -636,9 +1365,7 @@ def _persist_tokenized_to_latest_snapshot(tokens: dict) -> None:
                     ts,
                 ),
             )
-            conn.commit()
-        finally:
-            conn.close()
+            refresh_price_daily(conn, ts[:10], ts[:10])
     except Exception:
         return
 
@@ -652,8 +1379,7 @@ def _persist_vn_sell_to_latest_snapshot(
     Persist sell-based VN prices/spreads to the latest snapshot row so History matches Today.
     """
     try:
-        conn = _connect_history_db()
-        try:
+        with _HISTORY_DB.write() as conn:
             latest = conn.execute("SELECT ts FROM price_snapshots ORDER BY ts DESC LIMIT 1").fetchone()
             if not latest:
                 return
@@ -692,9 +1418,7 @@ def _persist_vn_sell_to_latest_snapshot(
                     ts,
                 ),
             )
-            conn.commit()
-        finally:
-            conn.close()
+            refresh_price_daily(conn, ts[:10], ts[:10])
     except Exception:
         return
 
@@ -759,25 +1483,12 @@ def _normalize_stooq_today_payload(data: dict) -> dict:
         return data
     return data
 
-def _ensure_meta_table(conn: sqlite3.Connection) -> None:
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS meta (
-            key TEXT PRIMARY KEY,
-            value TEXT
-        )
-        """
-    )
-
-
 def _get_meta(conn: sqlite3.Connection, key: str) -> Optional[str]:
-    _ensure_meta_table(conn)
     row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
     return row[0] if row else None
 
 
 def _set_meta(conn: sqlite3.Connection, key: str, value: str) -> None:
-    _ensure_meta_table(conn)
     conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, value))
 
 
@@ -801,16 +1512,15 @@ def _fetch_stooq_daily_close(symbol: str, days: int = 730) -> list[tuple[str, fl
     return rows
 
 
-def _ensure_intl_history_backfill(days: int = 730) -> None:
+def _ensure_intl_history_backfill(days: int = 730) -> int:
     """
     Backfill 2y of XAU/XAG daily closes into `price_snapshots` (ts=YYYY-MM-DDT00:00:00).
     This allows charts/ratio to work immediately, then daily updates append new points.
     """
-    conn = _connect_history_db()
-    try:
-        key = "intl_stooq_backfill_v1"
+    key = "intl_stooq_backfill_v1"
+    with _HISTORY_DB.read() as conn:
         if _get_meta(conn, key) == "1":
-            return
+            return 0
 
         # If we already have enough daily points for both metals, skip.
         existing = conn.execute(
@@ -827,32 +1537,34 @@ def _ensure_intl_history_backfill(days: int = 730) -> None:
             )
             """
         ).fetchone()
-        if existing and existing[0] and existing[1] and existing[0] >= days and existing[1] >= days:
+    if existing and existing[0] and existing[1] and existing[0] >= days and existing[1] >= days:
+        with _HISTORY_DB.write() as conn:
             _set_meta(conn, key, "1")
-            conn.commit()
-            return
-
-        gold = _fetch_stooq_daily_close("xauusd", days=days)
-        silver = _fetch_stooq_daily_close("xagusd", days=days)
-        gold_by_day = {d: p for d, p in gold}
-        silver_by_day = {d: p for d, p in silver}
-        days_union = sorted(set(gold_by_day.keys()) | set(silver_by_day.keys()))
-
-        created_at = datetime.now().isoformat()
-        rows = []
-        for day in days_union:
-            ts = f"{day}T00:00:00"
-            rows.append(
-                (
-                    ts,
-                    created_at,
-                    gold_by_day.get(day),
-                    "stooq",
-                    silver_by_day.get(day),
-                    "stooq",
-                )
+        return 0
+
+    # Download outside the writer lock so snapshot writes aren't held up by the network.
+    gold = _fetch_stooq_daily_close("xauusd", days=days)
+    silver = _fetch_stooq_daily_close("xagusd", days=days)
+    gold_by_day = {d: p for d, p in gold}
+    silver_by_day = {d: p for d, p in silver}
+    days_union = sorted(set(gold_by_day.keys()) | set(silver_by_day.keys()))
+
+    created_at = datetime.now().isoformat()
+    rows = []
+    for day in days_union:
+        ts = f"{day}T00:00:00"
+        rows.append(
+            (
+                ts,
+                created_at,
+                gold_by_day.get(day),
+                "stooq",
+                silver_by_day.get(day),
+                "stooq",
             )
+        )
 
+    with _HISTORY_DB.write() as conn:
         conn.executemany(
             """
             INSERT OR IGNORE INTO price_snapshots
@@ -861,10 +1573,10 @@ def _ensure_intl_history_backfill(days: int = 730) -> None:
             """,
             rows,
         )
+        if days_union:
+            refresh_price_daily(conn, days_union[0], days_union[-1])
         _set_meta(conn, key, "1")
-        conn.commit()
-    finally:
-        conn.close()
+    return len(rows)
 
 def _fetch_cryptocompare_histoday(fsym: str, days: int = 730) -> list[tuple[str, float]]:
     url = "https://min-api.cryptocompare.com/data/v2/histoday"
@@ -890,34 +1602,34 @@ def _fetch_cryptocompare_histoday(fsym: str, days: int = 730) -> list[tuple[str,
     return out
 
 
-def _ensure_tokenized_gold_backfill(days: int = 730) -> None:
-    conn = _connect_history_db()
-    try:
-        key = "token_gold_backfill_v1"
+def _ensure_tokenized_gold_backfill(days: int = 730) -> int:
+    key = "token_gold_backfill_v1"
+    with _HISTORY_DB.read() as conn:
         if _get_meta(conn, key) == "1":
-            return
-
-        paxg = _fetch_cryptocompare_histoday("PAXG", days=days)
-        xaut = _fetch_cryptocompare_histoday("XAUT", days=days)
-        paxg_by_day = {d: p for d, p in paxg}
-        xaut_by_day = {d: p for d, p in xaut}
-        days_union = sorted(set(paxg_by_day.keys()) | set(xaut_by_day.keys()))
-
-        created_at = datetime.now().isoformat()
-        rows = []
-        for day in days_union:
-            ts = f"{day}T00:00:00"
-            rows.append(
-                (
-                    ts,
-                    created_at,
-                    paxg_by_day.get(day),
-                    "CryptoCompare",
-                    xaut_by_day.get(day),
-                    "CryptoCompare",
-                )
+            return 0
+
+    paxg = _fetch_cryptocompare_histoday("PAXG", days=days)
+    xaut = _fetch_cryptocompare_histoday("XAUT", days=days)
+    paxg_by_day = {d: p for d, p in paxg}
+    xaut_by_day = {d: p for d, p in xaut}
+    days_union = sorted(set(paxg_by_day.keys()) | set(xaut_by_day.keys()))
+
+    created_at = datetime.now().isoformat()
+    rows = []
+    for day in days_union:
+        ts = f"{day}T00:00:00"
+        rows.append(
+            (
+                ts,
+                created_at,
+                paxg_by_day.get(day),
+                "CryptoCompare",
+                xaut_by_day.get(day),
+                "CryptoCompare",
             )
+        )
 
+    with _HISTORY_DB.write() as conn:
         conn.executemany(
             """
             INSERT INTO price_snapshots
@@ -931,10 +1643,226 @@ def _ensure_tokenized_gold_backfill(days: int = 730) -> None:
             """,
             rows,
         )
+        if days_union:
+            refresh_price_daily(conn, days_union[0], days_union[-1])
         _set_meta(conn, key, "1")
-        conn.commit()
-    finally:
-        conn.close()
+    return len(rows)
+
+
+# History maintenance: backfills (and other DB upkeep) run at startup and on a schedule,
+# never on the request path. Each job records its progress in the `meta` table under
+# `maintenance:<job>` as JSON.
+HISTORY_MAINTENANCE_INTERVAL_SECONDS = float(os.environ.get("HISTORY_MAINTENANCE_INTERVAL_SECONDS") or 6 * 3600)
+HISTORY_BACKFILL_DAYS = 730
+
+def _resync_recent_price_daily(days: int = 3) -> int:
+    """
+    Self-heal the `price_daily` rollup for recent days (writes outside the app, clock skew).
+    Unchanged rows are left alone, so history ETags only move when a day was actually fixed.
+    """
+    from datetime import timedelta
+
+    start_day = (datetime.now() - timedelta(days=days)).date().isoformat()
+    with _HISTORY_DB.write() as conn:
+        refresh_price_daily(conn, start_day)
+        return conn.execute("SELECT COUNT(*) FROM price_daily WHERE day >= ?", (start_day,)).fetchone()[0]
+
+
+_MAINTENANCE_JOBS = [
+    ("intl_history_backfill", lambda: _ensure_intl_history_backfill(days=HISTORY_BACKFILL_DAYS)),
+    ("tokenized_gold_backfill", lambda: _ensure_tokenized_gold_backfill(days=HISTORY_BACKFILL_DAYS)),
+    ("price_daily_resync", _resync_recent_price_daily),
+]
+_MAINTENANCE_TASK: Optional[asyncio.Task] = None
+
+
+def _record_maintenance_progress(job: str, **fields) -> None:
+    key = f"maintenance:{job}"
+    try:
+        with _HISTORY_DB.write() as conn:
+            current = _get_meta(conn, key)
+            state = json.loads(current) if current else {}
+            state.update(fields)
+            _set_meta(conn, key, json.dumps(state))
+    except Exception:
+        return
+
+
+def _run_history_maintenance() -> dict:
+    """Run every maintenance job once; a failing job doesn't stop the others."""
+    results = {}
+    for job, fn in _MAINTENANCE_JOBS:
+        started = time.monotonic()
+        _record_maintenance_progress(
+            job, status="running", started_at=datetime.now().isoformat(), finished_at=None, error=None
+        )
+        try:
+            rows = fn()
+            state = {"status": "ok", "rows_written": rows}
+        except Exception as e:
+            state = {"status": "error", "error": str(e)}
+        state["finished_at"] = datetime.now().isoformat()
+        state["duration_seconds"] = round(time.monotonic() - started, 3)
+        _record_maintenance_progress(job, **state)
+        results[job] = state
+    return results
+
+
+def _read_maintenance_status() -> dict:
+    with _HISTORY_DB.read() as conn:
+        rows = conn.execute("SELECT key, value FROM meta WHERE key LIKE 'maintenance:%'").fetchall()
+    out = {}
+    for r in rows:
+        try:
+            out[r["key"].split(":", 1)[1]] = json.loads(r["value"])
+        except Exception:
+            continue
+    return out
+
+
+async def _history_maintenance_loop(interval_seconds: float) -> None:
+    while True:
+        try:
+            await _SINGLE_FLIGHT.do_async("history_maintenance", _run_history_maintenance, _UPSTREAM_EXECUTOR)
+        except Exception:
+            pass
+        if interval_seconds <= 0:
+            return
+        await asyncio.sleep(interval_seconds)
+
+
+def _collect_today_prices() -> dict:
+    """
+    Run all upstream fetches and post-processing for the `/api/prices/today` payload.
+    Blocking; called from the background collector (or on demand before the first run).
+    """
+    data = fetcher.get_formatted_data()
+    # Back-compat: if the scraper/fetcher doesn't provide tokenized assets yet,
+    # inject PAXG/XAUT from CryptoCompare (or DB fallback) so UI cards never show N/A.
+    if not isinstance(data, dict):
+        data = {}
+
+    tokens = _fetch_tokenized_gold_today()
+    if not (tokens.get("paxg") or tokens.get("xaut")):
+        tokens = _read_latest_tokenized_from_db()
+
+    if isinstance(tokens.get("paxg"), dict) and (not isinstance(data.get("paxg"), dict) or data.get("paxg") is None):
+        data["paxg"] = tokens["paxg"]
+    if isinstance(tokens.get("xaut"), dict) and (not isinstance(data.get("xaut"), dict) or data.get("xaut") is None):
+        data["xaut"] = tokens["xaut"]
+
+    # Persist to the latest snapshot row if the underlying fetcher didn't.
+    if tokens.get("paxg") or tokens.get("xaut"):
+        _persist_tokenized_to_latest_snapshot(tokens)
+
+    # Ensure VN prices use sell price and recompute spreads.
+    data = _maybe_override_vn_prices_with_sell(data)
+
+    data = _normalize_stooq_today_payload(data)
+    return data
+
+
+async def _publish_price_snapshot() -> PriceSnapshot:
+    """Collect prices and publish a new snapshot; concurrent callers share one collection."""
+    return await _SINGLE_FLIGHT.do_async("prices:today", _collect_and_publish_price_snapshot, _UPSTREAM_EXECUTOR)
+
+
+def _collect_and_publish_price_snapshot() -> PriceSnapshot:
+    """Collect prices and atomically swap in a new immutable snapshot."""
+    global _PRICE_SNAPSHOT, _PRICE_COLLECTOR_LAST_ERROR
+    started = time.monotonic()
+    data = _collect_today_prices()
+    snapshot = PriceSnapshot(
+        data=data,
+        collected_at=datetime.now(),
+        duration_seconds=round(time.monotonic() - started, 3),
+    )
+    _PRICE_SNAPSHOT = snapshot
+    _PRICE_COLLECTOR_LAST_ERROR = None
+    return snapshot
+
+
+async def _current_price_snapshot() -> PriceSnapshot:
+    """
+    Snapshot for a request. The collector keeps it fresh when enabled; otherwise a
+    missing or expired snapshot is re-collected on demand (shared via SingleFlight).
+    A failed re-collection keeps serving the previous snapshot.
+    """
+    global _PRICE_COLLECTOR_LAST_ERROR
+    snapshot = _PRICE_SNAPSHOT
+    if snapshot is not None and (
+        PRICE_COLLECTOR_INTERVAL_SECONDS > 0
+        or (datetime.now() - snapshot.collected_at).total_seconds() < PRICE_SNAPSHOT_MAX_AGE_SECONDS
+    ):
+        return snapshot
+    try:
+        return await _publish_price_snapshot()
+    except Exception as e:
+        if snapshot is None:
+            raise
+        _PRICE_COLLECTOR_LAST_ERROR = str(e)
+        return snapshot
+
+
+async def _price_collector_loop(interval_seconds: float) -> None:
+    global _PRICE_COLLECTOR_LAST_ERROR
+    while True:
+        try:
+            await _publish_price_snapshot()
+        except Exception as e:
+            # Keep serving the previous snapshot; retry on the next tick.
+            _PRICE_COLLECTOR_LAST_ERROR = str(e)
+        await asyncio.sleep(interval_seconds)
+
+
+def _price_collector_status() -> dict:
+    snapshot = _PRICE_SNAPSHOT
+    return {
+        "enabled": PRICE_COLLECTOR_INTERVAL_SECONDS > 0,
+        "interval_seconds": PRICE_COLLECTOR_INTERVAL_SECONDS,
+        "max_age_seconds": None if PRICE_COLLECTOR_INTERVAL_SECONDS > 0 else PRICE_SNAPSHOT_MAX_AGE_SECONDS,
+        "running": _PRICE_COLLECTOR_TASK is not None and not _PRICE_COLLECTOR_TASK.done(),
+        "last_collected_at": snapshot.collected_at.isoformat() if snapshot else None,
+        "last_duration_seconds": snapshot.duration_seconds if snapshot else None,
+        "last_error": _PRICE_COLLECTOR_LAST_ERROR,
+    }
+
+
+@app.on_event("startup")
+async def _check_wgc_worker_config() -> None:
+    # The worker protocol exchanges pickles: refuse to run with a missing or weak shared key.
+    if os.environ.get("WGC_WORKER_ADDRESS"):
+        _wgc_downloader()._worker_authkey()
+
+
+@app.on_event("startup")
+async def _start_price_collector() -> None:
+    global _PRICE_COLLECTOR_TASK
+    if PRICE_COLLECTOR_INTERVAL_SECONDS > 0:
+        _PRICE_COLLECTOR_TASK = asyncio.create_task(_price_collector_loop(PRICE_COLLECTOR_INTERVAL_SECONDS))
+
+
+@app.on_event("startup")
+async def _start_history_maintenance() -> None:
+    # Always runs once at startup; repeats only when an interval is configured.
+    global _MAINTENANCE_TASK
+    _MAINTENANCE_TASK = asyncio.create_task(_history_maintenance_loop(HISTORY_MAINTENANCE_INTERVAL_SECONDS))
+
+
+@app.on_event("shutdown")
+async def _stop_price_collector() -> None:
+    global _PRICE_COLLECTOR_TASK, _MAINTENANCE_TASK
+    tasks = [t for t in (_PRICE_COLLECTOR_TASK, _MAINTENANCE_TASK) if t is not None]
+    _PRICE_COLLECTOR_TASK = None
+    _MAINTENANCE_TASK = None
+    for task in tasks:
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+    _UPSTREAM_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+    _LOCAL_IO_EXECUTOR.shutdown(wait=False, cancel_futures=True)
 
 
 @app.get("/")
@@ -955,44 +1883,19 @@ async def get_today_prices():
     Returns SJC gold, Phu Quy silver, and international prices
     """
     try:
-        # Ensure we have intl history available for charts/ratio.
-        try:
-            _ensure_intl_history_backfill(days=730)
-            _ensure_tokenized_gold_backfill(days=730)
-        except Exception:
-            pass
-        data = fetcher.get_formatted_data()
-        # Back-compat: if the scraper/fetcher doesn't provide tokenized assets yet,
-        # inject PAXG/XAUT from CryptoCompare (or DB fallback) so UI cards never show N/A.
-        if not isinstance(data, dict):
-            data = {}
-
-        tokens = _fetch_tokenized_gold_today()
-        if not (tokens.get("paxg") or tokens.get("xaut")):
-            tokens = _read_latest_tokenized_from_db()
-
-        if isinstance(tokens.get("paxg"), dict) and (not isinstance(data.get("paxg"), dict) or data.get("paxg") is None):
-            data["paxg"] = tokens["paxg"]
-        if isinstance(tokens.get("xaut"), dict) and (not isinstance(data.get("xaut"), dict) or data.get("xaut") is None):
-            data["xaut"] = tokens["xaut"]
-
-        # Persist to the latest snapshot row if the underlying fetcher didn't.
-        if tokens.get("paxg") or tokens.get("xaut"):
-            _persist_tokenized_to_latest_snapshot(tokens)
-
-        # Ensure VN prices use sell price and recompute spreads.
-        data = _maybe_override_vn_prices_with_sell(data)
-
-        data = _normalize_stooq_today_payload(data)
+        snapshot = await _current_price_snapshot()
         return {
             "success": True,
-            "data": data
+            "data": snapshot.data,
+            "collected_at": snapshot.collected_at.isoformat(),
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/reserves/top")
 async def get_reserves_top(
+    request: Request,
+    response: Response,
     kind: str = Query(default="gold", description="gold | non_gold | total"),
     year: Optional[int] = Query(default=None, description="Year (defaults to latest available)"),
     limit: int = Query(default=20, ge=1, le=200),
@@ -1003,7 +1906,18 @@ async def get_reserves_top(
     - kind=non_gold: reserves minus gold (USD)
     - kind=total: total reserves incl. gold (USD)
     """
-    ds = _load_reserves_dataset()
+    # Validators come from the published snapshot, so they always match the body served.
+    snap = await _run_local_io(_RESERVES_DATASET.get)
+    version, last_modified = snap.version, snap.last_modified
+    if version is not None:
+        cache_headers = _cache_headers(
+            _make_etag("reserves_top", version, kind, year, limit), last_modified, RESERVES_CACHE_MAX_AGE_SECONDS
+        )
+        if _is_not_modified(request, cache_headers["ETag"], last_modified):
+            return _not_modified_response(cache_headers)
+        response.headers.update(cache_headers)
+
+    ds = snap.data
     countries = ds.get("countries") or {}
     max_year = ds.get("global_max_year")
     min_year = ds.get("global_min_year")
@@ -1019,31 +1933,21 @@ async def get_reserves_top(
     if target_year < min_year or target_year > max_year:
         raise HTTPException(status_code=400, detail=f"Year out of range ({min_year}..{max_year})")
 
+    # Rankings are precomputed per (kind, year) at load time: O(limit) slice.
+    iso2s, values = (ds.get("rankings") or {}).get((kind_norm, target_year), ((), ()))
     rows: list[dict] = []
-    for iso2, entry in countries.items():
-        series = entry.get("series") or []
-        # Find exact year point
-        value = None
-        for r in series:
-            if r.get("year") == target_year:
-                value = _reserves_kind_value(r, kind_norm)
-                break
-        if value is None:
-            continue
+    for rank, (iso2, value) in enumerate(zip(iso2s[:limit], values[:limit]), start=1):
+        entry = countries.get(iso2) or {}
         rows.append(
             {
                 "iso2": iso2,
                 "country_name": entry.get("country_name") or iso2,
                 "value_usd": float(value),
                 "data_end_year": entry.get("max_year"),
+                "rank": rank,
             }
         )
 
-    rows.sort(key=lambda r: r["value_usd"], reverse=True)
-    rows = rows[:limit]
-    for i, r in enumerate(rows, start=1):
-        r["rank"] = i
-
     return {
         "success": True,
         "kind": kind_norm,
@@ -1056,13 +1960,27 @@ async def get_reserves_top(
 
 @app.get("/api/reserves/country")
 async def get_reserves_country(
+    request: Request,
+    response: Response,
     iso2: str = Query(..., min_length=2, max_length=3, description="Country ISO2 code, e.g. US"),
 ):
     """
     Full time series for a country (gold inferred + non-gold + total).
     Adds a note if data ends before global end year.
     """
-    ds = _load_reserves_dataset()
+    snap = await _run_local_io(_RESERVES_DATASET.get)
+    version, last_modified = snap.version, snap.last_modified
+    if version is not None:
+        cache_headers = _cache_headers(
+            _make_etag("reserves_country", version, (iso2 or "").strip().upper()),
+            last_modified,
+            RESERVES_CACHE_MAX_AGE_SECONDS,
+        )
+        if _is_not_modified(request, cache_headers["ETag"], last_modified):
+            return _not_modified_response(cache_headers)
+        response.headers.update(cache_headers)
+
+    ds = snap.data
     countries = ds.get("countries") or {}
     max_year = ds.get("global_max_year")
     min_year = ds.get("global_min_year")
@@ -1100,7 +2018,7 @@ async def get_wgc_status():
     meta = None
     if exists:
         try:
-            meta = _load_wgc_latest().get("meta")
+            meta = (await _run_local_io(_load_wgc_latest)).get("meta")
         except Exception:
             meta = None
     return {
@@ -1108,26 +2026,37 @@ async def get_wgc_status():
         "exists": exists,
         "path": WGC_CSV_PATH,
         "meta": meta,
+        "refresh_job": _get_wgc_job(),
     }
 
 
-@app.post("/api/reserves/wgc/refresh")
+@app.post("/api/reserves/wgc/refresh", status_code=202)
 async def refresh_wgc():
-    """Force refresh of WGC snapshot via Playwright downloader."""
-    if not _get_wgc_auth_cookie() and not os.path.exists(WGC_CSV_PATH):
+    """
+    Start a WGC refresh (Playwright downloader) in the background.
+    Returns the job immediately; poll GET /api/reserves/wgc/refresh/{job_id}.
+    """
+    if not _get_wgc_auth_cookie():
         raise HTTPException(
             status_code=503,
             detail="WGC download requires authentication. Set env `WGC_AUTH_COOKIE` (wgcAuth_cookie) or save it to `.secrets/wgc_auth_cookie.txt`.",
         )
-    try:
-        data = _refresh_wgc_dataset()
-        return {"success": True, "meta": data.get("meta"), "count": len(data.get("rows") or [])}
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=str(e))
+    return {"success": True, "job": _start_wgc_refresh_job("manual", force=True)}
+
+
+@app.get("/api/reserves/wgc/refresh/{job_id}")
+async def get_wgc_refresh_job(job_id: str):
+    """Status of a WGC refresh job (queued | running | succeeded | failed)."""
+    job = _get_wgc_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown WGC refresh job")
+    return {"success": True, "job": job}
 
 
 @app.get("/api/reserves/wgc/top")
 async def get_wgc_top(
+    request: Request,
+    response: Response,
     limit: int = Query(default=20, ge=1, le=200),
     sort: str = Query(default="tonnes", description="tonnes | value_usd"),
 ):
@@ -1141,212 +2070,232 @@ async def get_wgc_top(
         )
 
     try:
-        ds = _ensure_wgc_dataset()
+        snap, refresh_job = await _run_local_io(_ensure_wgc_dataset)
     except Exception as e:
         raise HTTPException(status_code=502, detail=str(e))
+    ds = snap.data
+    if not ds.get("rows"):
+        # First download still in progress (or backing off after a failure): nothing stale to serve yet.
+        cooldown = _wgc_refresh_cooldown_remaining()
+        message = "WGC download failed; retry later." if cooldown > 0 else "WGC dataset is being downloaded; retry later."
+        raise HTTPException(
+            status_code=503,
+            detail={"message": message, "job": refresh_job},
+            headers={"Retry-After": str(max(30, int(cooldown)))},
+        )
     meta = ds.get("meta") or {}
-    rows = list(ds.get("rows") or [])
     sort_key = (sort or "").strip().lower()
     if sort_key not in {"tonnes", "value_usd"}:
         raise HTTPException(status_code=400, detail="Invalid sort (use: tonnes | value_usd)")
 
-    gold_spot = _get_gold_spot_usd_oz()
+    gold_spot = await _run_upstream(_get_gold_spot_usd_oz)
+    spot_price = gold_spot.get("price_usd_oz") if gold_spot else None
+    version, last_modified = snap.version, snap.last_modified
+    if version is not None:
+        # Valuation depends on the spot price, so it is part of the validator.
+        cache_headers = _cache_headers(
+            _make_etag("wgc_top", version, spot_price, limit, sort_key), last_modified, RESERVES_CACHE_MAX_AGE_SECONDS
+        )
+        if _is_not_modified(request, cache_headers["ETag"], last_modified):
+            return _not_modified_response(cache_headers)
+        response.headers.update(cache_headers)
+
+    valuation = await _run_local_io(_get_wgc_valuation, ds, version, spot_price)
     valuation_note = None
     if gold_spot:
         valuation_note = f"Value (USD) = tonnes × troy_oz_per_tonne × spot_price_usd_oz (spot from {gold_spot.get('source') or 'unknown'})"
-        for r in rows:
-            tonnes = r.get("tonnes")
-            if r.get("value_usd") is None and isinstance(tonnes, (int, float)) and tonnes > 0:
-                try:
-                    r["value_usd"] = round(_tonnes_to_troy_oz(float(tonnes)) * float(gold_spot["price_usd_oz"]), 2)
-                except Exception:
-                    pass
     meta_out = dict(meta)
     meta_out["valuation"] = {
-        "spot_price_usd_oz": gold_spot.get("price_usd_oz") if gold_spot else None,
+        "spot_price_usd_oz": spot_price,
         "spot_source": gold_spot.get("source") if gold_spot else None,
         "spot_retrieved_at": gold_spot.get("retrieved_at") if gold_spot else None,
         "note": valuation_note,
     }
 
-    def key_fn(r: dict):
-        v = r.get(sort_key)
-        return v if isinstance(v, (int, float)) else -1.0
-
-    rows.sort(key=key_fn, reverse=True)
-    rows = rows[:limit]
-    for i, r in enumerate(rows, start=1):
-        r["rank"] = i
+    rows = valuation["ranked"][sort_key][:limit]
+    if refresh_job is not None:
+        meta_out["refresh_job"] = {"id": refresh_job["id"], "status": refresh_job["status"]}
     return {"success": True, "meta": meta_out, "sort": sort_key, "count": len(rows), "data": rows}
 
 
+def _query_price_history(days: int) -> list[dict]:
+    """Latest snapshot per day for the last `days` days (blocking SQLite read)."""
+    # Prefer DB query (no pandas dependency), 1 point/day.
+    with _HISTORY_DB.read() as conn:
+        from datetime import timedelta
+
+        # Whole days only (today plus the previous `days - 1`), so the window is stable
+        # within a day and HTTP validators stay valid.
+        cutoff = (datetime.now() - timedelta(days=days)).date().isoformat()
+        # `price_daily` keeps the last snapshot per day (token columns coalesced), so this
+        # is an indexed range scan over at most `days` rows.
+        rows = conn.execute(
+            """
+            SELECT
+              ts,
+              created_at,
+              usd_vnd,
+              sjc_vnd_luong,
+              phuquy_silver_vnd,
+              phuquy_silver_unit,
+              intl_gold_usd_oz,
+              intl_gold_source,
+              intl_silver_usd_oz,
+              intl_silver_source,
+              gold_spread_vnd,
+              gold_spread_percent,
+              gold_intl_vnd_per_luong,
+              silver_spread_vnd,
+              silver_spread_percent,
+              silver_intl_vnd_per_unit,
+              silver_spread_unit,
+              paxg_usd_oz,
+              paxg_source,
+              xaut_usd_oz,
+              xaut_source
+            FROM price_daily
+            WHERE day > ?
+            ORDER BY day ASC
+            """,
+            (cutoff[:10],),
+        ).fetchall()
+        data = _rows_to_dicts(rows)
+
+    # Normalize legacy snapshots where silver was stored as VND/kg.
+    kg_to_luong = 1000.0 / 37.5
+    for r in data:
+        unit = (r.get("phuquy_silver_unit") or "").strip().lower()
+        if "kg" in unit and r.get("phuquy_silver_vnd") is not None:
+            try:
+                r["phuquy_silver_vnd"] = float(r["phuquy_silver_vnd"]) / kg_to_luong
+            except Exception:
+                pass
+            r["phuquy_silver_unit"] = "VND/lượng"
+        spread_unit = (r.get("silver_spread_unit") or "").strip().lower()
+        if "kg" in spread_unit and r.get("silver_spread_vnd") is not None:
+            try:
+                r["silver_spread_vnd"] = float(r["silver_spread_vnd"]) / kg_to_luong
+            except Exception:
+                pass
+            r["silver_spread_unit"] = "VND/lượng"
+    return data
+
+
+def _read_price_daily_updated_at() -> Optional[str]:
+    with _HISTORY_DB.read() as conn:
+        return _get_meta(conn, PRICE_DAILY_UPDATED_AT_KEY)
+
+
 @app.get("/api/prices/history")
 async def get_price_history(
-    days: int = Query(default=7, ge=1, le=730, description="Number of days to fetch")
+    request: Request,
+    days: int = Query(default=7, ge=1, le=730, description="Number of days to fetch"),
+    shape: str = _SHAPE_QUERY,
 ):
     """
     Get price history for the specified number of days
     """
     try:
-        if days >= 365:
+        cache_headers = None
+        updated_at = await _run_local_io(_read_price_daily_updated_at)
+        if updated_at:
             try:
-                _ensure_intl_history_backfill(days=730)
-                _ensure_tokenized_gold_backfill(days=730)
-            except Exception:
-                pass
-        # Prefer DB query (no pandas dependency), 1 point/day.
-        conn = _connect_history_db()
-        try:
-            from datetime import timedelta
+                last_modified = datetime.fromisoformat(updated_at)
+            except ValueError:
+                last_modified = None
+            # The window start moves daily, so it is part of the validator too.
+            window_start = datetime.now().date().toordinal() - days
+            cache_headers = _cache_headers(
+                _make_etag("history", updated_at, days, window_start, shape),
+                last_modified,
+                HISTORY_CACHE_MAX_AGE_SECONDS,
+            )
+            if _is_not_modified(request, cache_headers["ETag"], last_modified):
+                return _not_modified_response(cache_headers)
 
-            cutoff = (datetime.now() - timedelta(days=days)).replace(second=0, microsecond=0).isoformat()
-            rows = conn.execute(
-                """
-                WITH per_day AS (
-                    SELECT substr(ts, 1, 10) AS day, MAX(ts) AS ts
-                    FROM price_snapshots
-                    WHERE ts >= ?
-                    GROUP BY day
-                ),
-                token_day AS (
-                    SELECT
-                      substr(ts, 1, 10) AS day,
-                      MAX(paxg_usd_oz) AS paxg_usd_oz,
-                      MAX(paxg_source) AS paxg_source,
-                      MAX(xaut_usd_oz) AS xaut_usd_oz,
-                      MAX(xaut_source) AS xaut_source
-                    FROM price_snapshots
-                    WHERE ts >= ?
-                    GROUP BY day
-                )
-                SELECT
-                  ps.ts,
-                  ps.created_at,
-                  ps.usd_vnd,
-                  ps.sjc_vnd_luong,
-                  ps.phuquy_silver_vnd,
-                  ps.phuquy_silver_unit,
-                  ps.intl_gold_usd_oz,
-                  ps.intl_gold_source,
-                  ps.intl_silver_usd_oz,
-                  ps.intl_silver_source,
-                  ps.gold_spread_vnd,
-                  ps.gold_spread_percent,
-                  ps.gold_intl_vnd_per_luong,
-                  ps.silver_spread_vnd,
-                  ps.silver_spread_percent,
-                  ps.silver_intl_vnd_per_unit,
-                  ps.silver_spread_unit,
-                  COALESCE(ps.paxg_usd_oz, td.paxg_usd_oz) AS paxg_usd_oz,
-                  COALESCE(ps.paxg_source, td.paxg_source) AS paxg_source,
-                  COALESCE(ps.xaut_usd_oz, td.xaut_usd_oz) AS xaut_usd_oz,
-                  COALESCE(ps.xaut_source, td.xaut_source) AS xaut_source
-                FROM price_snapshots ps
-                JOIN per_day pd ON ps.ts = pd.ts
-                LEFT JOIN token_day td ON td.day = pd.day
-                ORDER BY ps.ts ASC
-                """,
-                (cutoff, cutoff),
-            ).fetchall()
-            data = _rows_to_dicts(rows)
-        finally:
-            conn.close()
-
-        # Normalize legacy snapshots where silver was stored as VND/kg.
-        kg_to_luong = 1000.0 / 37.5
-        for r in data:
-            unit = (r.get("phuquy_silver_unit") or "").strip().lower()
-            if "kg" in unit and r.get("phuquy_silver_vnd") is not None:
-                try:
-                    r["phuquy_silver_vnd"] = float(r["phuquy_silver_vnd"]) / kg_to_luong
-                except Exception:
-                    pass
-                r["phuquy_silver_unit"] = "VND/lượng"
-            spread_unit = (r.get("silver_spread_unit") or "").strip().lower()
-            if "kg" in spread_unit and r.get("silver_spread_vnd") is not None:
-                try:
-                    r["silver_spread_vnd"] = float(r["silver_spread_vnd"]) / kg_to_luong
-                except Exception:
-                    pass
-                r["silver_spread_unit"] = "VND/lượng"
+        data = await _run_local_io(_query_price_history, days)
 
         if not data:
-            return {
-                "success": True,
-                "data": [],
-                "message": "No history data available"
-            }
+            return _json_response(
+                _shape_rows_payload([], shape, message="No history data available"), headers=cache_headers
+            )
 
-        return {
-            "success": True,
-            "data": data,
-            "count": len(data),
-        }
+        return _json_response(_shape_rows_payload(data, shape), headers=cache_headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _query_latest_sjc_items() -> list[dict]:
+    with _HISTORY_DB.read() as conn:
+        from datetime import timedelta
+
+        cutoff = (datetime.now() - timedelta(days=30)).replace(second=0, microsecond=0).isoformat()
+        rows = conn.execute(
+            """
+            WITH latest AS (
+                SELECT
+                    name,
+                    COALESCE(branch, '') AS branch_key,
+                    MAX(ts) AS ts
+                FROM sjc_items
+                WHERE ts >= ?
+                GROUP BY name, branch_key
+            )
+            SELECT s.*
+            FROM sjc_items s
+            JOIN latest l
+              ON s.name = l.name
+             AND COALESCE(s.branch, '') = l.branch_key
+             AND s.ts = l.ts
+            ORDER BY s.name, s.branch
+            """,
+            (cutoff,),
+        ).fetchall()
+        return _rows_to_dicts(rows)
+
+
+def _fetch_live_sjc_items() -> list[dict]:
+    sjc_data = fetcher.fetch_sjc_gold()
+    rows = []
+    for item in (sjc_data or []):
+        name = item.get("name")
+        buy = fetcher._to_float(item.get("buy_price") or item.get("buy"))
+        sell = fetcher._to_float(item.get("sell_price") or item.get("sell"))
+        if name and (buy is not None or sell is not None):
+            rows.append(
+                {
+                    "ts": datetime.now().isoformat(),
+                    "name": name,
+                    "branch": item.get("branch"),
+                    "buy_price": buy,
+                    "sell_price": sell,
+                    "date": item.get("date"),
+                }
+            )
+    return rows
+
+
+async def _warm_up_price_snapshot() -> None:
+    # Per-item rows in the DB are written with each snapshot; collect on demand when
+    # there is none yet or (collector disabled) it has expired.
+    try:
+        await _current_price_snapshot()
+    except Exception:
+        pass
+
+
 @app.get("/api/prices/sjc-items")
 async def get_sjc_items():
     """Get latest SJC items with detailed prices"""
     try:
-        # Warm-up: ensure DB has per-item rows by fetching today's snapshot once.
-        try:
-            fetcher.get_formatted_data()
-        except Exception:
-            pass
-
-        conn = _connect_history_db()
-        try:
-            from datetime import timedelta
-
-            cutoff = (datetime.now() - timedelta(days=30)).replace(second=0, microsecond=0).isoformat()
-            rows = conn.execute(
-                """
-                WITH latest AS (
-                    SELECT
-                        name,
-                        COALESCE(branch, '') AS branch_key,
-                        MAX(ts) AS ts
-                    FROM sjc_items
-                    WHERE ts >= ?
-                    GROUP BY name, branch_key
-                )
-                SELECT s.*
-                FROM sjc_items s
-                JOIN latest l
-                  ON s.name = l.name
-                 AND COALESCE(s.branch, '') = l.branch_key
-                 AND s.ts = l.ts
-                ORDER BY s.name, s.branch
-                """,
-                (cutoff,),
-            ).fetchall()
-            data = _rows_to_dicts(rows)
-        finally:
-            conn.close()
+        await _warm_up_price_snapshot()
 
+        data = await _run_local_io(_query_latest_sjc_items)
         if data:
             return {"success": True, "data": data, "count": len(data), "source": "db"}
 
         # Last resort: return live scraped data (not DB-backed).
-        sjc_data = fetcher.fetch_sjc_gold()
-        rows = []
-        for item in (sjc_data or []):
-            name = item.get("name")
-            buy = fetcher._to_float(item.get("buy_price") or item.get("buy"))
-            sell = fetcher._to_float(item.get("sell_price") or item.get("sell"))
-            if name and (buy is not None or sell is not None):
-                rows.append(
-                    {
-                        "ts": datetime.now().isoformat(),
-                        "name": name,
-                        "branch": item.get("branch"),
-                        "buy_price": buy,
-                        "sell_price": sell,
-                        "date": item.get("date"),
-                    }
-                )
+        rows = await _run_upstream(_fetch_live_sjc_items)
         if rows:
             return {"success": True, "data": rows, "count": len(rows), "source": "live"}
 
@@ -1355,117 +2304,112 @@ async def get_sjc_items():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _query_sjc_item_history(name: str, branch: Optional[str], days: int) -> list[dict]:
+    with _HISTORY_DB.read() as conn:
+        from datetime import timedelta
+
+        cutoff = (datetime.now() - timedelta(days=days)).replace(second=0, microsecond=0).isoformat()
+        if branch:
+            rows = conn.execute(
+                """
+                SELECT ts, name, branch, buy_price, sell_price
+                FROM sjc_items
+                WHERE ts >= ? AND name = ? AND branch = ?
+                ORDER BY ts ASC
+                """,
+                (cutoff, name, branch),
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                """
+                SELECT ts, name, branch, buy_price, sell_price
+                FROM sjc_items
+                WHERE ts >= ? AND name = ?
+                ORDER BY ts ASC
+                """,
+                (cutoff, name),
+            ).fetchall()
+        return _rows_to_dicts(rows)
+
+
 @app.get("/api/prices/sjc-item-history")
 async def get_sjc_item_history(
     name: str = Query(..., description="Product name"),
     branch: Optional[str] = Query(None, description="Branch name"),
-    days: int = Query(default=365, ge=1, le=365)
+    days: int = Query(default=365, ge=1, le=365),
+    shape: str = _SHAPE_QUERY,
 ):
     """Get history for a specific SJC item"""
     try:
-        conn = _connect_history_db()
-        try:
-            from datetime import timedelta
-
-            cutoff = (datetime.now() - timedelta(days=days)).replace(second=0, microsecond=0).isoformat()
-            if branch:
-                rows = conn.execute(
-                    """
-                    SELECT ts, name, branch, buy_price, sell_price
-                    FROM sjc_items
-                    WHERE ts >= ? AND name = ? AND branch = ?
-                    ORDER BY ts ASC
-                    """,
-                    (cutoff, name, branch),
-                ).fetchall()
-            else:
-                rows = conn.execute(
-                    """
-                    SELECT ts, name, branch, buy_price, sell_price
-                    FROM sjc_items
-                    WHERE ts >= ? AND name = ?
-                    ORDER BY ts ASC
-                    """,
-                    (cutoff, name),
-                ).fetchall()
-            data = _rows_to_dicts(rows)
-        finally:
-            conn.close()
+        data = await _run_local_io(_query_sjc_item_history, name, branch, days)
 
         if not data:
-            return {
-                "success": True,
-                "data": [],
-                "message": "No history available for this item"
-            }
+            return _json_response(_shape_rows_payload([], shape, message="No history available for this item"))
 
-        return {
-            "success": True,
-            "data": data,
-            "count": len(data)
-        }
+        return _json_response(_shape_rows_payload(data, shape))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _query_latest_phuquy_items() -> list[dict]:
+    with _HISTORY_DB.read() as conn:
+        from datetime import timedelta
+
+        cutoff = (datetime.now() - timedelta(days=30)).replace(second=0, microsecond=0).isoformat()
+        rows = conn.execute(
+            """
+            WITH latest AS (
+                SELECT product, MAX(ts) AS ts
+                FROM phuquy_items
+                WHERE ts >= ?
+                GROUP BY product
+            )
+            SELECT p.*
+            FROM phuquy_items p
+            JOIN latest l
+              ON p.product = l.product
+             AND p.ts = l.ts
+            ORDER BY p.product
+            """,
+            (cutoff,),
+        ).fetchall()
+        return _rows_to_dicts(rows)
+
+
+def _fetch_live_phuquy_items() -> list[dict]:
+    pq = fetcher.fetch_phuquy_silver() or {}
+    rows = []
+    for item in (pq.get("prices") or []):
+        product = (item.get("product") or item.get("type") or "").strip()
+        unit = item.get("unit")
+        buy = fetcher._to_float(item.get("buy_price") or item.get("buy"))
+        sell = fetcher._to_float(item.get("sell_price") or item.get("sell"))
+        if product and (buy is not None or sell is not None):
+            rows.append(
+                {
+                    "ts": datetime.now().isoformat(),
+                    "product": product,
+                    "unit": unit,
+                    "buy_price": buy,
+                    "sell_price": sell,
+                }
+            )
+    return rows
+
+
 @app.get("/api/prices/phuquy-items")
 async def get_phuquy_items():
     """Get latest Phu Quy silver items"""
     try:
-        # Warm-up: ensure DB has per-item rows by fetching today's snapshot once.
-        try:
-            fetcher.get_formatted_data()
-        except Exception:
-            pass
-
-        conn = _connect_history_db()
-        try:
-            from datetime import timedelta
-
-            cutoff = (datetime.now() - timedelta(days=30)).replace(second=0, microsecond=0).isoformat()
-            rows = conn.execute(
-                """
-                WITH latest AS (
-                    SELECT product, MAX(ts) AS ts
-                    FROM phuquy_items
-                    WHERE ts >= ?
-                    GROUP BY product
-                )
-                SELECT p.*
-                FROM phuquy_items p
-                JOIN latest l
-                  ON p.product = l.product
-                 AND p.ts = l.ts
-                ORDER BY p.product
-                """,
-                (cutoff,),
-            ).fetchall()
-            data = _rows_to_dicts(rows)
-        finally:
-            conn.close()
+        await _warm_up_price_snapshot()
 
+        data = await _run_local_io(_query_latest_phuquy_items)
         if data:
             data = [_normalize_phuquy_to_luong(d) for d in data]
             return {"success": True, "data": data, "count": len(data), "source": "db"}
 
         # Last resort: return live scraped data (not DB-backed).
-        pq = fetcher.fetch_phuquy_silver() or {}
-        rows = []
-        for item in (pq.get("prices") or []):
-            product = (item.get("product") or item.get("type") or "").strip()
-            unit = item.get("unit")
-            buy = fetcher._to_float(item.get("buy_price") or item.get("buy"))
-            sell = fetcher._to_float(item.get("sell_price") or item.get("sell"))
-            if product and (buy is not None or sell is not None):
-                rows.append(
-                    {
-                        "ts": datetime.now().isoformat(),
-                        "product": product,
-                        "unit": unit,
-                        "buy_price": buy,
-                        "sell_price": sell,
-                    }
-                )
+        rows = await _run_upstream(_fetch_live_phuquy_items)
         if rows:
             rows = [_normalize_phuquy_to_luong(d) for d in rows]
             return {"success": True, "data": rows, "count": len(rows), "source": "live"}
@@ -1475,54 +2419,65 @@ async def get_phuquy_items():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _query_phuquy_item_history(product: str, days: int) -> list[dict]:
+    with _HISTORY_DB.read() as conn:
+        from datetime import timedelta
+
+        cutoff = (datetime.now() - timedelta(days=days)).replace(second=0, microsecond=0).isoformat()
+        rows = conn.execute(
+            """
+            SELECT ts, product, unit, buy_price, sell_price
+            FROM phuquy_items
+            WHERE ts >= ? AND product = ?
+            ORDER BY ts ASC
+            """,
+            (cutoff, product),
+        ).fetchall()
+        return _rows_to_dicts(rows)
+
+
 @app.get("/api/prices/phuquy-item-history")
 async def get_phuquy_item_history(
     product: str = Query(..., description="Product name"),
-    days: int = Query(default=365, ge=1, le=730)
+    days: int = Query(default=365, ge=1, le=730),
+    shape: str = _SHAPE_QUERY,
 ):
     """Get history for a specific Phu Quy item"""
     try:
-        conn = _connect_history_db()
-        try:
-            from datetime import timedelta
-
-            cutoff = (datetime.now() - timedelta(days=days)).replace(second=0, microsecond=0).isoformat()
-            rows = conn.execute(
-                """
-                SELECT ts, product, unit, buy_price, sell_price
-                FROM phuquy_items
-                WHERE ts >= ? AND product = ?
-                ORDER BY ts ASC
-                """,
-                (cutoff, product),
-            ).fetchall()
-            data = _rows_to_dicts(rows)
-        finally:
-            conn.close()
+        data = await _run_local_io(_query_phuquy_item_history, product, days)
 
         if not data:
-            return {
-                "success": True,
-                "data": [],
-                "message": "No history available for this product"
-            }
+            return _json_response(_shape_rows_payload([], shape, message="No history available for this product"))
 
         data = [_normalize_phuquy_to_luong(d) for d in data]
-        return {
-            "success": True,
-            "data": data,
-            "count": len(data)
-        }
+        return _json_response(_shape_rows_payload(data, shape))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/maintenance/status")
+async def get_maintenance_status():
+    """Progress of history backfill/maintenance jobs (persisted in the `meta` table)."""
+    try:
+        jobs = await _run_local_io(_read_maintenance_status)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "success": True,
+        "interval_seconds": HISTORY_MAINTENANCE_INTERVAL_SECONDS,
+        "running": _MAINTENANCE_TASK is not None and not _MAINTENANCE_TASK.done(),
+        "jobs": jobs,
+    }
+
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": datetime.now().isoformat(),
+        "price_collector": _price_collector_status(),
+        "datasets": {d.name: d.status() for d in (_RESERVES_DATASET, _WGC_DATASET)},
     }
 
 
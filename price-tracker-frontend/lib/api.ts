@@ -131,6 +131,23 @@ export interface WgcMeta {
     spot_retrieved_at: string | null;
     note: string | null;
   };
+  refresh_job?: { id: string; status: WgcRefreshJob['status'] };
+}
+
+export interface WgcRefreshJob {
+  id: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  stage: string;
+  reason: string;
+  created_at: string;
+  updated_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+  error: string | null;
+  blocked: boolean;
+  meta: WgcMeta | null;
+  count: number | null;
+  log_tail: string[];
 }
 
 export interface SjcItemRow {
@@ -313,10 +330,14 @@ class ApiClient {
     return this.request(`/api/reserves/wgc/top?limit=${limit}&sort=${sort}`);
   }
 
-  async refreshWgc(): Promise<{ success: boolean; meta: WgcMeta | null; count: number }> {
+  async refreshWgc(): Promise<{ success: boolean; job: WgcRefreshJob }> {
     return this.request(`/api/reserves/wgc/refresh`, { method: 'POST' });
   }
 
+  async getWgcRefreshJob(jobId: string): Promise<{ success: boolean; job: WgcRefreshJob }> {
+    return this.request(`/api/reserves/wgc/refresh/${encodeURIComponent(jobId)}`);
+  }
+
   async healthCheck(): Promise<{ status: string; timestamp: string }> {
     return this.request('/api/health');
   }
@@ -45,7 +45,6 @@ def main(argv: list[str]) -> int:
         "playwright",
         "--outdir",
         args.outdir,
-        "--no-parquet",
     ]
     proc = subprocess.run(cmd, env=env)
     return proc.returncode
@@ -0,0 +1,130 @@
+"""
+Tests for the resumable WGC XLSX download (no network)
+"""
+
+import io
+import json
+import os
+
+import requests
+
+import download_wgc_gold_reserves as wgc
+
+URL = "https://example.test/files/wgc_gold_reserves.xlsx"
+BODY = b"PK\x03\x04" + bytes(range(256)) * 64
+ETAG = '"v1"'
+
+
+def _response(status, body=b"", headers=None):
+    resp = requests.Response()
+    resp.status_code = status
+    resp.url = URL
+    resp.reason = "Requested Range Not Satisfiable" if status == 416 else "OK"
+    resp.headers.update(headers or {})
+    resp.raw = io.BytesIO(body)
+    return resp
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def request(self, method, url, headers=None, **kwargs):
+        self.requests.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+
+def _interrupted_download(outdir, received):
+    """A .part file holding the first `received` bytes, recorded in the state file."""
+    out_path = os.path.join(outdir, "wgc_gold_reserves.xlsx")
+    with open(f"{out_path}.part", "wb") as f:
+        f.write(BODY[:received])
+    wgc._write_download_state(
+        outdir,
+        partial={"url": URL, "out_path": out_path, "part_path": f"{out_path}.part", "etag": ETAG},
+    )
+    return out_path
+
+
+def _read_state(outdir):
+    with open(os.path.join(outdir, wgc.DOWNLOAD_STATE_FILENAME), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_download_resumes_with_range(tmp_path):
+    """A 206 reply appends to the .part file from the stored offset"""
+    outdir = str(tmp_path)
+    out_path = _interrupted_download(outdir, 1000)
+    session = FakeSession(
+        _response(206, BODY[1000:], {"Content-Range": f"bytes 1000-{len(BODY) - 1}/{len(BODY)}", "ETag": ETAG}),
+    )
+
+    result = wgc.download_file(session, URL, outdir)
+
+    assert session.requests[0]["Range"] == "bytes=1000-"
+    assert session.requests[0]["If-Range"] == ETAG
+    assert result.path == out_path and result.size_bytes == len(BODY)
+    with open(out_path, "rb") as f:
+        assert f.read() == BODY
+    assert not os.path.exists(f"{out_path}.part")
+    assert "partial" not in _read_state(outdir)
+
+
+def test_download_restarts_after_416(tmp_path):
+    """A rejected range drops the partial file and state, then downloads from scratch"""
+    outdir = str(tmp_path)
+    out_path = _interrupted_download(outdir, 1000)
+    session = FakeSession(
+        _response(416, headers={"Content-Range": "bytes */500"}),
+        _response(200, BODY, {"ETag": '"v2"'}),
+    )
+
+    result = wgc.download_file(session, URL, outdir)
+
+    assert len(session.requests) == 2
+    assert "Range" in session.requests[0]
+    assert "Range" not in session.requests[1]
+    with open(out_path, "rb") as f:
+        assert f.read() == BODY
+    assert result.size_bytes == len(BODY)
+    state = _read_state(outdir)
+    assert "partial" not in state
+    assert state["etag"] == '"v2"'
+
+
+def test_worker_rejects_malformed_jobs(monkeypatch, tmp_path):
+    """A non-dict job gets an error reply and the worker keeps serving"""
+    import socket
+    import threading
+    from multiprocessing.connection import Client
+
+    key = "k" * wgc.WORKER_AUTHKEY_MIN_LENGTH
+    monkeypatch.setenv(wgc.WORKER_AUTHKEY_ENV, key)
+    monkeypatch.setattr(wgc, "refresh", lambda outdir, **kwargs: {"csv_path": os.path.join(outdir, "x.csv")})
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        address = ("127.0.0.1", s.getsockname()[1])
+    worker = threading.Thread(
+        target=wgc.serve_worker,
+        args=(address,),
+        kwargs={"outdir": str(tmp_path), "mode": "requests", "max_jobs": 1},
+        daemon=True,
+    )
+    worker.start()
+
+    for _ in range(50):
+        try:
+            client = Client(address, authkey=key.encode())
+            break
+        except ConnectionRefusedError:
+            worker.join(0.05)
+    with client:
+        client.send(["not", "a", "job"])
+        reply = client.recv()
+    assert reply["ok"] is False and "dict" in reply["error"]
+
+    result = wgc.submit_worker_job(address, {"outdir": "/elsewhere"})
+    assert result["csv_path"] == os.path.join(str(tmp_path), "x.csv")
+    worker.join(5)
+    assert not worker.is_alive()
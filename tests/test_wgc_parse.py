@@ -0,0 +1,91 @@
+"""
+Tests for the streaming WGC XLSX parser and its parse cache (no network)
+
+The *_expected.csv fixtures are the output of the previous pandas-based parser
+(two reads per sheet) on the same workbooks, minus retrieved_at_utc.
+"""
+
+import os
+
+import pytest
+
+import download_wgc_gold_reserves as wgc
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+LAYOUTS = ["generic", "pdf"]
+
+
+def _fixture(layout, suffix=".xlsx"):
+    return os.path.join(FIXTURES, f"wgc_gold_reserves_{layout}{suffix}")
+
+
+def _as_csv(df):
+    return df.drop(columns=["retrieved_at_utc"]).to_csv(index=False)
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_parse_xlsx_matches_previous_parser(layout):
+    with open(_fixture(layout, "_expected.csv"), encoding="utf-8") as f:
+        expected = f.read()
+
+    df = wgc.parse_xlsx(_fixture(layout))
+
+    assert list(df.columns) == wgc.OUTPUT_COLUMNS
+    assert _as_csv(df) == expected
+
+
+def test_scan_sheet_detects_both_header_layouts():
+    from openpyxl import load_workbook
+
+    wb = load_workbook(_fixture("generic"), read_only=True, data_only=True)
+    try:
+        scan = wgc._scan_sheet(wb["Gold reserves"])
+    finally:
+        wb.close()
+    assert scan.header_row == 3
+    assert scan.pdf_header_row is None
+    assert scan.rows[-1][1] == "Notes: data subject to revision"  # trailing blank rows dropped
+
+    wb = load_workbook(_fixture("pdf"), read_only=True, data_only=True)
+    try:
+        scan = wgc._scan_sheet(wb["PDF"])
+    finally:
+        wb.close()
+    assert (scan.pdf_header_row, scan.pdf_tonnes_cols) == (2, [2, 7])
+
+
+@pytest.fixture
+def counted_parse(monkeypatch):
+    calls = []
+    parse = wgc.parse_xlsx
+
+    def counting_parse(path):
+        calls.append(path)
+        return parse(path)
+
+    monkeypatch.setattr(wgc, "parse_xlsx", counting_parse)
+    return calls
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_parse_cache_hit_and_version_invalidation(tmp_path, monkeypatch, counted_parse, layout):
+    xlsx = _fixture(layout)
+    cache_path = str(tmp_path / wgc.PARSE_CACHE_FILENAME)
+
+    first = wgc.parse_xlsx_cached(xlsx, cache_path)
+    second = wgc.parse_xlsx_cached(xlsx, cache_path)
+    assert len(counted_parse) == 1
+    assert _as_csv(second) == _as_csv(first)
+    assert list(second.columns) == wgc.OUTPUT_COLUMNS
+
+    # A different content hash is a miss
+    wgc.parse_xlsx_cached(xlsx, cache_path, sha256="0" * 64)
+    assert len(counted_parse) == 2
+
+    # So is a parser version bump
+    wgc.parse_xlsx_cached(xlsx, cache_path)
+    monkeypatch.setattr(wgc, "PARSER_VERSION", wgc.PARSER_VERSION + 1)
+    wgc.parse_xlsx_cached(xlsx, cache_path)
+    assert len(counted_parse) == 4
+    wgc.parse_xlsx_cached(xlsx, cache_path)
+    assert len(counted_parse) == 4
@@ -5,9 +5,9 @@ Fetches data from all 3 modules and calculates spreads
 
 import sys
 import os
-import sqlite3
 from datetime import datetime, timedelta
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+from typing import Callable, Dict, Optional
 import importlib
 import inspect
 import re
@@ -38,6 +38,8 @@ _prepend_sys_path(vn_gold_path)
 _prepend_sys_path(silver_path)
 _prepend_sys_path(intl_path)
 
+from history_db import get_history_db, refresh_price_daily
+
 try:
     from vn_gold_tracker.gold_data_pg import GoldDataPG
 except ImportError:
@@ -82,6 +84,16 @@ class PriceDataFetcher:
     KG_TO_OZ = KG_TO_GRAM / OZ_TO_GRAM  # 32.1507466...
     KG_TO_LUONG = KG_TO_GRAM / LUONG_TO_GRAM  # 26.6666666...
 
+    # Per-source deadlines (seconds) for the concurrent fan-out in fetch_all_data().
+    # A source that misses its budget is reported as "timeout" and its default is used.
+    SOURCE_TIMEOUTS = {
+        "usd_vnd": 15.0,
+        "sjc": 20.0,
+        "phuquy": 20.0,
+        "international": 25.0,
+        "tokenized": 20.0,
+    }
+
     def __init__(self):
         """Initialize all data fetchers"""
         self.gold_fetcher = GoldDataPG() if GoldDataPG else None
@@ -105,98 +117,21 @@ class PriceDataFetcher:
         self._token_cache: Dict = {}
         self._token_last_fetch: Optional[datetime] = None
         self._history_db_path = os.path.join(current_dir, "price_history.db")
+        self.history_db = None
         self._init_history_db()
-
-    def _connect_history_db(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self._history_db_path, check_same_thread=False)
-        conn.execute("PRAGMA journal_mode=WAL;")
-        conn.execute("PRAGMA synchronous=NORMAL;")
-        return conn
+        # Shared pool for the concurrent fan-out. Sized above the number of sources so a
+        # source stuck past its deadline doesn't starve the next refresh.
+        self._fetch_pool = ThreadPoolExecutor(
+            max_workers=len(self.SOURCE_TIMEOUTS) * 2,
+            thread_name_prefix="price-fetch",
+        )
 
     def _init_history_db(self) -> None:
+        # Schema creation and migrations run once per process inside the shared pool.
         try:
-            conn = self._connect_history_db()
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS price_snapshots (
-                    ts TEXT PRIMARY KEY,
-                    created_at TEXT NOT NULL,
-                    usd_vnd REAL,
-                    sjc_vnd_luong REAL,
-                    phuquy_silver_vnd REAL,
-                    phuquy_silver_unit TEXT,
-                    intl_gold_usd_oz REAL,
-                    intl_gold_source TEXT,
-                    intl_silver_usd_oz REAL,
-                    intl_silver_source TEXT,
-                    paxg_usd_oz REAL,
-                    paxg_source TEXT,
-                    xaut_usd_oz REAL,
-                    xaut_source TEXT,
-                    gold_spread_vnd REAL,
-                    gold_spread_percent REAL,
-                    gold_intl_vnd_per_luong REAL,
-                    silver_spread_vnd REAL,
-                    silver_spread_percent REAL,
-                    silver_intl_vnd_per_unit REAL,
-                    silver_spread_unit TEXT
-                )
-                """
-            )
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS sjc_items (
-                    ts TEXT NOT NULL,
-                    name TEXT NOT NULL,
-                    branch TEXT,
-                    buy_price REAL,
-                    sell_price REAL,
-                    date TEXT,
-                    PRIMARY KEY (ts, name, branch)
-                )
-                """
-            )
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_sjc_items_name ON sjc_items(name)"
-            )
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_sjc_items_ts ON sjc_items(ts)"
-            )
-            conn.execute(
-                """
-                CREATE TABLE IF NOT EXISTS phuquy_items (
-                    ts TEXT NOT NULL,
-                    product TEXT NOT NULL,
-                    unit TEXT,
-                    buy_price REAL,
-                    sell_price REAL,
-                    PRIMARY KEY (ts, product)
-                )
-                """
-            )
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_phuquy_items_product ON phuquy_items(product)"
-            )
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_phuquy_items_ts ON phuquy_items(ts)"
-            )
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_price_snapshots_created_at ON price_snapshots(created_at DESC)"
-            )
-            # Lightweight migrations for existing DBs
-            cols = {r[1] for r in conn.execute("PRAGMA table_info(price_snapshots)").fetchall()}
-            for name, sql_type in [
-                ("paxg_usd_oz", "REAL"),
-                ("paxg_source", "TEXT"),
-                ("xaut_usd_oz", "REAL"),
-                ("xaut_source", "TEXT"),
-            ]:
-                if name not in cols:
-                    conn.execute(f"ALTER TABLE price_snapshots ADD COLUMN {name} {sql_type}")
-            conn.commit()
-            conn.close()
+            self.history_db = get_history_db(self._history_db_path)
         except Exception:
-            return
+            self.history_db = None
 
     def _save_snapshot(self, result: Dict) -> None:
         try:
@@ -217,99 +152,97 @@ class PriceDataFetcher:
             gold_spread = (result.get("spreads") or {}).get("gold") or {}
             silver_spread = (result.get("spreads") or {}).get("silver") or {}
 
-            conn = self._connect_history_db()
-            conn.execute(
-                """
-                INSERT OR REPLACE INTO price_snapshots (
-                    ts, created_at,
-                    usd_vnd, sjc_vnd_luong,
-                    phuquy_silver_vnd, phuquy_silver_unit,
-                    intl_gold_usd_oz, intl_gold_source,
-                    intl_silver_usd_oz, intl_silver_source,
-                    paxg_usd_oz, paxg_source,
-                    xaut_usd_oz, xaut_source,
-                    gold_spread_vnd, gold_spread_percent, gold_intl_vnd_per_luong,
-                    silver_spread_vnd, silver_spread_percent, silver_intl_vnd_per_unit, silver_spread_unit
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    ts,
-                    datetime.now().isoformat(),
-                    usd_vnd,
-                    sjc,
-                    phuquy_price,
-                    phuquy_unit,
-                    intl_gold.get("price"),
-                    intl_gold.get("source"),
-                    intl_silver.get("price"),
-                    intl_silver.get("source"),
-                    paxg.get("price"),
-                    paxg.get("source"),
-                    xaut.get("price"),
-                    xaut.get("source"),
-                    gold_spread.get("spread_vnd"),
-                    gold_spread.get("spread_percent"),
-                    gold_spread.get("intl_per_luong"),
-                    silver_spread.get("spread_vnd"),
-                    silver_spread.get("spread_percent"),
-                    silver_spread.get("intl_per_luong"),
-                    phuquy_unit,
-                ),
-            )
-
-            # Save per-product details (SJC)
-            sjc_rows = (result.get("sjc") or {}).get("data") or []
-            if isinstance(sjc_rows, list) and sjc_rows:
-                rows = []
-                for item in sjc_rows:
-                    name = (item.get("name") or "").strip()
-                    branch = (item.get("branch") or "").strip() or None
-                    buy = self._to_float(item.get("buy_price"))
-                    sell = self._to_float(item.get("sell_price"))
-                    date = item.get("date")
-                    if name:
-                        rows.append((ts, name, branch, buy, sell, date))
-                if rows:
-                    conn.executemany(
-                        """
-                        INSERT OR REPLACE INTO sjc_items
-                        (ts, name, branch, buy_price, sell_price, date)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                        """,
-                        rows,
-                    )
-
-            # Save per-product details (Phu Quý)
-            pq = (result.get("phuquy_silver") or {}).get("data") or {}
-            pq_prices = pq.get("prices") if isinstance(pq, dict) else None
-            if isinstance(pq_prices, list) and pq_prices:
-                rows = []
-                for item in pq_prices:
-                    product = (item.get("product") or item.get("type") or "").strip()
-                    unit = (item.get("unit") or "").strip() or None
-                    buy = self._to_float(item.get("buy_price") or item.get("buy"))
-                    sell = self._to_float(item.get("sell_price") or item.get("sell"))
-                    if product:
-                        rows.append((ts, product, unit, buy, sell))
-                if rows:
-                    conn.executemany(
-                        """
-                        INSERT OR REPLACE INTO phuquy_items
-                        (ts, product, unit, buy_price, sell_price)
-                        VALUES (?, ?, ?, ?, ?)
-                        """,
-                        rows,
-                    )
+            with self.history_db.write() as conn:
+                conn.execute(
+                    """
+                    INSERT OR REPLACE INTO price_snapshots (
+                        ts, created_at,
+                        usd_vnd, sjc_vnd_luong,
+                        phuquy_silver_vnd, phuquy_silver_unit,
+                        intl_gold_usd_oz, intl_gold_source,
+                        intl_silver_usd_oz, intl_silver_source,
+                        paxg_usd_oz, paxg_source,
+                        xaut_usd_oz, xaut_source,
+                        gold_spread_vnd, gold_spread_percent, gold_intl_vnd_per_luong,
+                        silver_spread_vnd, silver_spread_percent, silver_intl_vnd_per_unit, silver_spread_unit
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        ts,
+                        datetime.now().isoformat(),
+                        usd_vnd,
+                        sjc,
+                        phuquy_price,
+                        phuquy_unit,
+                        intl_gold.get("price"),
+                        intl_gold.get("source"),
+                        intl_silver.get("price"),
+                        intl_silver.get("source"),
+                        paxg.get("price"),
+                        paxg.get("source"),
+                        xaut.get("price"),
+                        xaut.get("source"),
+                        gold_spread.get("spread_vnd"),
+                        gold_spread.get("spread_percent"),
+                        gold_spread.get("intl_per_luong"),
+                        silver_spread.get("spread_vnd"),
+                        silver_spread.get("spread_percent"),
+                        silver_spread.get("intl_per_luong"),
+                        phuquy_unit,
+                    ),
+                )
 
-            conn.commit()
-            conn.close()
+                # Save per-product details (SJC)
+                sjc_rows = (result.get("sjc") or {}).get("data") or []
+                if isinstance(sjc_rows, list) and sjc_rows:
+                    rows = []
+                    for item in sjc_rows:
+                        name = (item.get("name") or "").strip()
+                        branch = (item.get("branch") or "").strip() or None
+                        buy = self._to_float(item.get("buy_price"))
+                        sell = self._to_float(item.get("sell_price"))
+                        date = item.get("date")
+                        if name:
+                            rows.append((ts, name, branch, buy, sell, date))
+                    if rows:
+                        conn.executemany(
+                            """
+                            INSERT OR REPLACE INTO sjc_items
+                            (ts, name, branch, buy_price, sell_price, date)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                            """,
+                            rows,
+                        )
+
+                # Save per-product details (Phu Quý)
+                pq = (result.get("phuquy_silver") or {}).get("data") or {}
+                pq_prices = pq.get("prices") if isinstance(pq, dict) else None
+                if isinstance(pq_prices, list) and pq_prices:
+                    rows = []
+                    for item in pq_prices:
+                        product = (item.get("product") or item.get("type") or "").strip()
+                        unit = (item.get("unit") or "").strip() or None
+                        buy = self._to_float(item.get("buy_price") or item.get("buy"))
+                        sell = self._to_float(item.get("sell_price") or item.get("sell"))
+                        if product:
+                            rows.append((ts, product, unit, buy, sell))
+                    if rows:
+                        conn.executemany(
+                            """
+                            INSERT OR REPLACE INTO phuquy_items
+                            (ts, product, unit, buy_price, sell_price)
+                            VALUES (?, ?, ?, ?, ?)
+                            """,
+                            rows,
+                        )
+
+                refresh_price_daily(conn, ts[:10], ts[:10])
         except Exception:
             return
 
     def get_history(self, days_back: int = 7):
         cutoff = (datetime.now() - timedelta(days=days_back)).replace(second=0, microsecond=0).isoformat()
-        conn = self._connect_history_db()
-        try:
+        with self.history_db.read(row_factory=None) as conn:
             import pandas as pd
 
             df = pd.read_sql_query(
@@ -323,8 +256,6 @@ class PriceDataFetcher:
                 params=(cutoff,),
             )
             return df
-        finally:
-            conn.close()
 
     def get_history_daily(self, days_back: int = 30):
         """
@@ -333,8 +264,7 @@ class PriceDataFetcher:
         We pick the latest snapshot for each day to avoid showing data for every refresh.
         """
         cutoff = (datetime.now() - timedelta(days=days_back)).replace(second=0, microsecond=0).isoformat()
-        conn = self._connect_history_db()
-        try:
+        with self.history_db.read(row_factory=None) as conn:
             import pandas as pd
 
             df = pd.read_sql_query(
@@ -354,12 +284,9 @@ class PriceDataFetcher:
                 params=(cutoff,),
             )
             return df
-        finally:
-            conn.close()
 
     def get_sjc_items_latest(self, max_age_days: int = 30):
-        conn = self._connect_history_db()
-        try:
+        with self.history_db.read(row_factory=None) as conn:
             import pandas as pd
 
             # If the most recent refresh was partial (e.g., fallback source), MAX(ts) can
@@ -417,13 +344,10 @@ class PriceDataFetcher:
                 conn,
             )
             return df
-        finally:
-            conn.close()
 
     def get_sjc_item_history(self, name: str, branch: Optional[str] = None, days_back: int = 365):
         cutoff = (datetime.now() - timedelta(days=days_back)).replace(second=0, microsecond=0).isoformat()
-        conn = self._connect_history_db()
-        try:
+        with self.history_db.read(row_factory=None) as conn:
             import pandas as pd
 
             if branch:
@@ -449,12 +373,9 @@ class PriceDataFetcher:
                     params=(cutoff, name),
                 )
             return df
-        finally:
-            conn.close()
 
     def get_phuquy_items_latest(self, max_age_days: int = 30):
-        conn = self._connect_history_db()
-        try:
+        with self.history_db.read(row_factory=None) as conn:
             import pandas as pd
 
             cutoff = (datetime.now() - timedelta(days=max_age_days)).replace(second=0, microsecond=0).isoformat()
@@ -497,13 +418,10 @@ class PriceDataFetcher:
                 conn,
             )
             return df
-        finally:
-            conn.close()
 
     def get_phuquy_item_history(self, product: str, days_back: int = 365):
         cutoff = (datetime.now() - timedelta(days=days_back)).replace(second=0, microsecond=0).isoformat()
-        conn = self._connect_history_db()
-        try:
+        with self.history_db.read(row_factory=None) as conn:
             import pandas as pd
 
             df = pd.read_sql_query(
@@ -517,8 +435,6 @@ class PriceDataFetcher:
                 params=(cutoff, product),
             )
             return df
-        finally:
-            conn.close()
 
     def _load_intl_disk_cache(self) -> None:
         try:
@@ -854,19 +770,104 @@ class PriceDataFetcher:
             'intl_per_luong': round(intl_per_unit, 2)
         }
 
-    def fetch_all_data(self) -> Dict:
+    @staticmethod
+    def _timed_call(fn: Callable) -> tuple:
+        started = time.monotonic()
+        value = fn()
+        return value, round((time.monotonic() - started) * 1000)
+
+    def _fetch_sources_sequentially(self, sources: Dict[str, tuple]) -> tuple:
+        fetched: Dict = {}
+        status: Dict[str, Dict] = {}
+        for name, (fn, default) in sources.items():
+            started = time.monotonic()
+            try:
+                fetched[name], elapsed_ms = self._timed_call(fn)
+                status[name] = {"status": "ok" if fetched[name] else "empty", "elapsed_ms": elapsed_ms}
+            except Exception as e:
+                fetched[name] = default
+                status[name] = {
+                    "status": "error",
+                    "error": str(e),
+                    "elapsed_ms": round((time.monotonic() - started) * 1000),
+                }
+        return fetched, status
+
+    def _fetch_sources_concurrently(
+        self, sources: Dict[str, tuple], timeouts: Optional[Dict[str, float]] = None
+    ) -> tuple:
+        """
+        Run all source fetchers in parallel, each bounded by its own deadline.
+
+        Wall time is bounded by the largest deadline rather than the sum of round trips.
+        Sources that miss their budget keep running in the pool (their caches still warm up)
+        but the result uses the default value and reports status "timeout".
+        """
+        budgets = dict(self.SOURCE_TIMEOUTS)
+        budgets.update(timeouts or {})
+        started = time.monotonic()
+        futures = {
+            name: self._fetch_pool.submit(self._timed_call, fn)
+            for name, (fn, _default) in sources.items()
+        }
+
+        fetched: Dict = {}
+        status: Dict[str, Dict] = {}
+        # Deadlines are measured from the common start, so waiting on each future in turn
+        # never extends the total past the largest budget.
+        for name, future in futures.items():
+            default = sources[name][1]
+            budget = budgets.get(name, 20.0)
+            wait_futures([future], timeout=max(0.0, started + budget - time.monotonic()))
+            if not future.done():
+                fetched[name] = default
+                status[name] = {
+                    "status": "timeout",
+                    "elapsed_ms": round((time.monotonic() - started) * 1000),
+                    "budget_s": budget,
+                }
+                continue
+            try:
+                fetched[name], elapsed_ms = future.result()
+                status[name] = {"status": "ok" if fetched[name] else "empty", "elapsed_ms": elapsed_ms}
+            except Exception as e:
+                fetched[name] = default
+                status[name] = {
+                    "status": "error",
+                    "error": str(e),
+                    "elapsed_ms": round((time.monotonic() - started) * 1000),
+                }
+        return fetched, status
+
+    def fetch_all_data(self, concurrent: bool = True, timeouts: Optional[Dict[str, float]] = None) -> Dict:
         """
         Fetch all data and calculate spreads
 
+        Args:
+            concurrent: Fan out to all sources in parallel with per-source deadlines
+                (default). When False, sources are fetched one after another.
+            timeouts: Optional per-source deadline overrides (see SOURCE_TIMEOUTS)
+
         Returns:
-            Dict with all price data and spreads
+            Dict with all price data and spreads, plus per-source fetch status under 'sources'
         """
-        # Fetch all data
-        usd_vnd = self.fetch_vnd_usd_rate()
-        sjc_data = self.fetch_sjc_gold()
-        phuquy_data = self.fetch_phuquy_silver()
-        intl_data = self.fetch_international_prices()
-        token_data = self.fetch_tokenized_gold_prices()
+        sources = {
+            "usd_vnd": (self.fetch_vnd_usd_rate, None),
+            "sjc": (self.fetch_sjc_gold, {}),
+            "phuquy": (self.fetch_phuquy_silver, {}),
+            "international": (self.fetch_international_prices, {'gold': None, 'silver': None}),
+            "tokenized": (self.fetch_tokenized_gold_prices, {"paxg": None, "xaut": None}),
+        }
+        if concurrent:
+            fetched, source_status = self._fetch_sources_concurrently(sources, timeouts)
+        else:
+            fetched, source_status = self._fetch_sources_sequentially(sources)
+
+        usd_vnd = fetched["usd_vnd"]
+        sjc_data = fetched["sjc"]
+        phuquy_data = fetched["phuquy"]
+        intl_data = fetched["international"] or {'gold': None, 'silver': None}
+        token_data = fetched["tokenized"]
 
         # Extract relevant prices
         sjc_price = None
@@ -954,7 +955,8 @@ class PriceDataFetcher:
             'spreads': {
                 'gold': gold_spread,
                 'silver': silver_spread
-            }
+            },
+            'sources': source_status,
         }
 
         # Cache result
@@ -979,6 +981,7 @@ class PriceDataFetcher:
 
         return {
             'update_time': data['timestamp'],
+            'sources': data.get('sources'),
             'usd_vnd': data['usd_vnd'],
             'sjc_gold_all': data['sjc'].get('data') if data.get('sjc') else None,
             'phuquy_silver_all': data['phuquy_silver'].get('data') if data.get('phuquy_silver') else None,
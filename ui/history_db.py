@@ -0,0 +1,297 @@
+"""
+Pooled SQLite access for price_history.db
+
+One writer connection (serialized by a lock) and a small pool of read-only
+connections. Connections are long-lived, so PRAGMAs and schema migrations run
+once per process and sqlite3's per-connection statement cache keeps prepared
+statements warm across requests.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterator, Optional
+
+# sqlite3 caches prepared statements per connection keyed by SQL text.
+STATEMENT_CACHE_SIZE = 256
+BUSY_TIMEOUT_SECONDS = 30.0
+
+_PRICE_SNAPSHOTS_ADDED_COLUMNS = [
+    ("paxg_usd_oz", "REAL"),
+    ("paxg_source", "TEXT"),
+    ("xaut_usd_oz", "REAL"),
+    ("xaut_source", "TEXT"),
+]
+
+
+# Columns carried into the `price_daily` rollup (everything the history API returns).
+PRICE_DAILY_COLUMNS = [
+    "ts",
+    "created_at",
+    "usd_vnd",
+    "sjc_vnd_luong",
+    "phuquy_silver_vnd",
+    "phuquy_silver_unit",
+    "intl_gold_usd_oz",
+    "intl_gold_source",
+    "intl_silver_usd_oz",
+    "intl_silver_source",
+    "gold_spread_vnd",
+    "gold_spread_percent",
+    "gold_intl_vnd_per_luong",
+    "silver_spread_vnd",
+    "silver_spread_percent",
+    "silver_intl_vnd_per_unit",
+    "silver_spread_unit",
+    "paxg_usd_oz",
+    "paxg_source",
+    "xaut_usd_oz",
+    "xaut_source",
+]
+_PRICE_DAILY_TOKEN_COLUMNS = {"paxg_usd_oz", "paxg_source", "xaut_usd_oz", "xaut_source"}
+PRICE_DAILY_UPDATED_AT_KEY = "price_daily_updated_at"
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    """Create tables/indexes and apply lightweight migrations (idempotent)."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS price_snapshots (
+            ts TEXT PRIMARY KEY,
+            created_at TEXT NOT NULL,
+            usd_vnd REAL,
+            sjc_vnd_luong REAL,
+            phuquy_silver_vnd REAL,
+            phuquy_silver_unit TEXT,
+            intl_gold_usd_oz REAL,
+            intl_gold_source TEXT,
+            intl_silver_usd_oz REAL,
+            intl_silver_source TEXT,
+            paxg_usd_oz REAL,
+            paxg_source TEXT,
+            xaut_usd_oz REAL,
+            xaut_source TEXT,
+            gold_spread_vnd REAL,
+            gold_spread_percent REAL,
+            gold_intl_vnd_per_luong REAL,
+            silver_spread_vnd REAL,
+            silver_spread_percent REAL,
+            silver_intl_vnd_per_unit REAL,
+            silver_spread_unit TEXT
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sjc_items (
+            ts TEXT NOT NULL,
+            name TEXT NOT NULL,
+            branch TEXT,
+            buy_price REAL,
+            sell_price REAL,
+            date TEXT,
+            PRIMARY KEY (ts, name, branch)
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sjc_items_name ON sjc_items(name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sjc_items_ts ON sjc_items(ts)")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS phuquy_items (
+            ts TEXT NOT NULL,
+            product TEXT NOT NULL,
+            unit TEXT,
+            buy_price REAL,
+            sell_price REAL,
+            PRIMARY KEY (ts, product)
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_phuquy_items_product ON phuquy_items(product)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_phuquy_items_ts ON phuquy_items(ts)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_price_snapshots_created_at ON price_snapshots(created_at DESC)"
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+        """
+    )
+
+    # Lightweight migrations for existing DBs
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(price_snapshots)").fetchall()}
+    for name, sql_type in _PRICE_SNAPSHOTS_ADDED_COLUMNS:
+        if name not in cols:
+            conn.execute(f"ALTER TABLE price_snapshots ADD COLUMN {name} {sql_type}")
+
+    # Daily rollup: last snapshot per day, token columns already coalesced over the day.
+    rollup_exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'price_daily'"
+    ).fetchone()
+    snapshot_types = {r[1]: r[2] for r in conn.execute("PRAGMA table_info(price_snapshots)").fetchall()}
+    column_defs = ",\n            ".join(f"{c} {snapshot_types.get(c) or 'TEXT'}" for c in PRICE_DAILY_COLUMNS)
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS price_daily (
+            day TEXT PRIMARY KEY,
+            {column_defs}
+        )
+        """
+    )
+    if not rollup_exists:
+        refresh_price_daily(conn)
+
+
+def _next_day(day: str) -> str:
+    return (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+
+
+def refresh_price_daily(conn: sqlite3.Connection, start_day: Optional[str] = None, end_day: Optional[str] = None) -> bool:
+    """
+    Recompute `price_daily` rows for days in [start_day, end_day] (inclusive, YYYY-MM-DD).
+
+    The source scan is a `ts` range on the primary key, so refreshing one day after a
+    snapshot write touches only that day's rows. With no bounds, rebuilds everything.
+    Rows whose values are unchanged are not rewritten; returns True if any row changed
+    (only then is the `price_daily_updated_at` marker bumped).
+    """
+    where = []
+    params: list = []
+    if start_day:
+        where.append("ts >= ?")
+        params.append(start_day)
+    if end_day:
+        where.append("ts < ?")
+        params.append(_next_day(end_day))
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+    select_cols = ",\n              ".join(
+        f"COALESCE(ps.{c}, pd.{c}) AS {c}" if c in _PRICE_DAILY_TOKEN_COLUMNS else f"ps.{c}"
+        for c in PRICE_DAILY_COLUMNS
+    )
+    update_sql = ", ".join(f"{c} = excluded.{c}" for c in PRICE_DAILY_COLUMNS)
+    differs_sql = " OR ".join(f"price_daily.{c} IS NOT excluded.{c}" for c in PRICE_DAILY_COLUMNS)
+    changes_before = conn.total_changes
+    conn.execute(
+        f"""
+        INSERT INTO price_daily (day, {", ".join(PRICE_DAILY_COLUMNS)})
+        SELECT
+          pd.day,
+          {select_cols}
+        FROM price_snapshots ps
+        JOIN (
+            SELECT
+              substr(ts, 1, 10) AS day,
+              MAX(ts) AS ts,
+              MAX(paxg_usd_oz) AS paxg_usd_oz,
+              MAX(paxg_source) AS paxg_source,
+              MAX(xaut_usd_oz) AS xaut_usd_oz,
+              MAX(xaut_source) AS xaut_source
+            FROM price_snapshots
+            {where_sql}
+            GROUP BY day
+        ) pd ON ps.ts = pd.ts
+        WHERE true
+        ON CONFLICT(day) DO UPDATE SET {update_sql}
+        WHERE {differs_sql}
+        """,
+        params,
+    )
+    if conn.total_changes == changes_before:
+        return False
+    # Change marker for HTTP validators (ETag/Last-Modified) on history responses.
+    conn.execute(
+        "INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)",
+        (PRICE_DAILY_UPDATED_AT_KEY, datetime.now(timezone.utc).isoformat(timespec="microseconds")),
+    )
+    return True
+
+
+class HistoryDB:
+    """Single-writer / multi-reader connection manager for one SQLite file."""
+
+    def __init__(self, path: str, max_readers: int = 8):
+        self.path = path
+        self._write_lock = threading.Lock()
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(max_readers)
+        self._writer = self._open(readonly=False)
+        with self.write() as conn:
+            ensure_schema(conn)
+
+    def _open(self, readonly: bool) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            check_same_thread=False,
+            timeout=BUSY_TIMEOUT_SECONDS,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=NORMAL;")
+        if readonly:
+            conn.execute("PRAGMA query_only=ON;")
+        return conn
+
+    @contextmanager
+    def read(self, row_factory=sqlite3.Row) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection (blocks when all readers are checked out)."""
+        self._reader_slots.acquire()
+        try:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                conn = self._open(readonly=True)
+            conn.row_factory = row_factory
+            try:
+                yield conn
+            finally:
+                # Never leave a read transaction open on a pooled connection.
+                if conn.in_transaction:
+                    conn.rollback()
+                self._readers.put(conn)
+        finally:
+            self._reader_slots.release()
+
+    @contextmanager
+    def write(self, row_factory=sqlite3.Row) -> Iterator[sqlite3.Connection]:
+        """Hold the single writer connection; commits on success, rolls back on error."""
+        with self._write_lock:
+            conn = self._writer
+            conn.row_factory = row_factory
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    def close(self) -> None:
+        with self._write_lock:
+            self._writer.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_INSTANCES: Dict[str, HistoryDB] = {}
+_INSTANCES_LOCK = threading.Lock()
+
+
+def get_history_db(path: str, max_readers: Optional[int] = None) -> HistoryDB:
+    """Process-wide HistoryDB for `path`, so every caller shares one writer."""
+    key = os.path.abspath(path)
+    with _INSTANCES_LOCK:
+        db = _INSTANCES.get(key)
+        if db is None:
+            db = HistoryDB(path, max_readers=max_readers or 8)
+            _INSTANCES[key] = db
+        return db